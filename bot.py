@@ -1,107 +1,168 @@
+import time
+
+# Time-to-ready is measured from here (before discord.py and the cogs are imported)
+_STARTED = time.perf_counter()
+
+import asyncio
 import discord
-import json
+import logging
 import os
+from discord import app_commands
 from discord.ext import commands
-from pathlib import Path
-
-# Prefer environment variables for secrets/config. If python-dotenv is installed
-# and a .env file exists, load it. This is optional and fails silently.
-try:
-    from dotenv import load_dotenv
-    env_path = Path(__file__).parent / '.env'
-    if env_path.exists():
-        load_dotenv(dotenv_path=env_path)
-except Exception:
-    pass
-
-# Helper to get config values (env preferred, fallback to config.json if present)
-_CONFIG_JSON = None
-def _load_config_json():
-    global _CONFIG_JSON
-    if _CONFIG_JSON is not None:
-        return _CONFIG_JSON
-    try:
-        path = Path(__file__).parent / 'config.json'
-        if path.exists():
-            with open(path, 'r', encoding='utf-8') as f:
-                _CONFIG_JSON = json.load(f)
-                return _CONFIG_JSON
-    except Exception:
-        _CONFIG_JSON = {}
-    _CONFIG_JSON = {}
-    return _CONFIG_JSON
-
-def cfg(key, default=None):
-    # environment variable names use upper case
-    val = os.environ.get(key)
-    if val is not None:
-        return val
-    # try config.json fallback
-    return _load_config_json().get(key, default)
+
+from services import command_sync, tracing
+from services.config import cfg
+from services.logs import setup_logging, stop_logging
+from services.message_router import router
+
+logger = logging.getLogger('bot')
 
 # Bot setup
 # Enable necessary intents for message content and guilds
 intents = discord.Intents.default()
 intents.message_content = True  # Required to read message content in channels
 intents.guilds = True  # Required for guild/channel access
-bot = commands.Bot(command_prefix='!', intents=intents)
 
-async def log_to_channel(message):
-    channel_id = cfg('LOG_CHANNEL_ID') or cfg('log_channel_id')
-    if channel_id:  # Only try to send if we have a non-null channel ID
+class TracedCommandTree(app_commands.CommandTree):
+    """Opens a latency trace for every slash command (see services/tracing.py)"""
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.type is discord.InteractionType.application_command and interaction.command:
+            tracing.start_trace(f"/{interaction.command.qualified_name}")
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        tracing.finish_trace(tracing.current_trace(), error=True)
+        await super().on_error(interaction, error)
+
+bot = commands.Bot(command_prefix='!', intents=intents, tree_cls=TracedCommandTree)
+
+@bot.listen('on_app_command_completion')
+async def _finish_command_trace(interaction, command):
+    # Dispatched from the command's task, so the trace is still in context
+    tracing.finish_trace(tracing.current_trace())
+
+@bot.listen('on_message')
+async def _route_message(message):
+    # Cogs register what they want to hear in services/message_router.py;
+    # prefix commands are still processed by the default on_message
+    await router.dispatch(message)
+
+# Log channel delivery: lines are queued and sent in batches by one background task,
+# and the channel is resolved once, so callers never wait on Discord round-trips
+LOG_CHANNEL_FLUSH_DELAY = 2  # seconds to collect lines before sending
+LOG_CHANNEL_MAX_CHARS = 1900
+_log_channel = None
+_log_channel_lines = []
+_log_channel_task = None
+
+async def _get_log_channel(channel_id):
+    global _log_channel
+    if _log_channel is None:
+        _log_channel = bot.get_channel(channel_id) or await bot.fetch_channel(channel_id)
+    return _log_channel
+
+async def _flush_log_channel(channel_id):
+    await asyncio.sleep(LOG_CHANNEL_FLUSH_DELAY)
+    while _log_channel_lines:
+        batch, size = [], 0
+        while _log_channel_lines and size + len(_log_channel_lines[0]) + 1 <= LOG_CHANNEL_MAX_CHARS:
+            line = _log_channel_lines.pop(0)
+            batch.append(line)
+            size += len(line) + 1
+        if not batch:
+            # A single line longer than one message: send it truncated
+            batch = [_log_channel_lines.pop(0)[:LOG_CHANNEL_MAX_CHARS]]
         try:
-            channel = await bot.fetch_channel(int(channel_id))
-            await channel.send(message)
+            channel = await _get_log_channel(channel_id)
+            await channel.send("\n".join(batch))
         except discord.NotFound:
-            print("Log channel not found. Please check the channel ID in config.json.")
+            logger.warning("Log channel not found. Please check the channel ID in config.json.")
+            _log_channel_lines.clear()
         except discord.Forbidden:
-            print("I don't have permission to send messages in the log channel.")
+            logger.warning("I don't have permission to send messages in the log channel.")
+            _log_channel_lines.clear()
         except Exception as e:
-            print(f"Error sending log message: {e}")
-    else:
-        # Just print to console if no log channel is configured
-        print(f"Log: {message}")
+            logger.error("Error sending log message: %s", e)
 
-import asyncio
+async def log_to_channel(message):
+    """Queue a message for the log channel (returns immediately)"""
+    global _log_channel_task
+    logger.info("Log: %s", message)
+    channel_id = cfg('LOG_CHANNEL_ID') or cfg('log_channel_id')
+    if not channel_id:  # Console only if no log channel is configured
+        return
+    _log_channel_lines.append(str(message))
+    if _log_channel_task is None or _log_channel_task.done():
+        _log_channel_task = asyncio.create_task(_flush_log_channel(int(channel_id)))
 
 # Load cogs at startup (before bot.run)
+async def _load_cog(name):
+    """Load one cog and return how long its import + setup took (seconds)"""
+    started = time.perf_counter()
+    await bot.load_extension(f'cogs.{name}')
+    return time.perf_counter() - started
+
 async def load_cogs():
     """Load all cogs from the cogs directory"""
-    cog_load_tasks = []
-    for filename in os.listdir('./cogs'):
-        if filename.endswith('.py'):
-            cog_load_tasks.append(bot.load_extension(f'cogs.{filename[:-3]}'))
+    names = sorted(filename[:-3] for filename in os.listdir('./cogs') if filename.endswith('.py'))
     
     # Wait for all cogs to load
-    if cog_load_tasks:
-        results = await asyncio.gather(*cog_load_tasks, return_exceptions=True)
-        loaded_count = sum(1 for r in results if not isinstance(r, Exception))
-        print(f'Loaded {loaded_count} cogs')
+    if names:
+        results = await asyncio.gather(*(_load_cog(name) for name in names), return_exceptions=True)
+        loaded = [(name, r) for name, r in zip(names, results) if not isinstance(r, Exception)]
+        logger.info('Loaded %d cogs in %.0fms', len(loaded), sum(t for _, t in loaded) * 1000)
+        
+        # Slowest cogs, so import-time regressions are visible in the startup log
+        slowest = sorted(loaded, key=lambda item: item[1], reverse=True)[:3]
+        logger.info('Slowest cogs: %s', ', '.join(f'{name} {t * 1000:.0f}ms' for name, t in slowest))
         
         # Only log errors
-        for filename, result in zip(os.listdir('./cogs'), results):
+        for name, result in zip(names, results):
             if isinstance(result, Exception):
-                print(f'Failed to load {filename}: {result}')
+                logger.error('Failed to load %s.py: %s', name, result)
+
+async def sync_commands(force=False):
+    """
+    Sync the command tree for each scope (global, then guilds with guild-only
+    commands) whose schema changed since the last sync. Returns [(scope, count)].
+    """
+    synced = []
+    scopes = [None] + [guild for guild in bot.guilds if bot.tree.get_commands(guild=guild)]
+    for guild in scopes:
+        guild_id = guild.id if guild else None
+        digest = command_sync.fingerprint(
+            [command.to_dict(bot.tree) for command in bot.tree.get_commands(guild=guild)]
+        )
+        if not force and not await command_sync.needs_sync(bot.application_id, guild_id, digest):
+            continue
+        result = await bot.tree.sync(guild=guild)
+        await command_sync.mark_synced(bot.application_id, guild_id, digest, len(result))
+        synced.append((guild.name if guild else 'global', len(result)))
+    return synced
 
 @bot.event
 async def on_ready():
-    print(f'Logged in as {bot.user.name}')
-    print('------')
+    logger.info('Logged in as %s', bot.user.name)
+    logger.info('Ready in %.2fs', time.perf_counter() - _STARTED)
     
-    # Sync slash commands
+    # Sync slash commands (only scopes whose command schema changed)
     try:
-        synced = await bot.tree.sync()
-        print(f"Synced {len(synced)} slash commands")
+        synced = await sync_commands()
+        if synced:
+            logger.info("Synced slash commands: %s", ', '.join(f"{scope} ({count})" for scope, count in synced))
+        else:
+            logger.info("Slash commands unchanged, skipping sync")
     except Exception as e:
-        print(f"Error syncing slash commands: {e}")
+        logger.error("Error syncing slash commands: %s", e)
 
 @bot.command()
 @commands.is_owner()
 async def sync(ctx):
-    """Syncs the slash commands with Discord."""
+    """Syncs the slash commands with Discord (always, even if unchanged)."""
     try:
-        synced = await bot.tree.sync()
-        log_msg = f"Synced {len(synced)} slash commands successfully."
+        synced = await sync_commands(force=True)
+        log_msg = "Synced slash commands successfully: " + ', '.join(f"{scope} ({count})" for scope, count in synced)
         await ctx.send(log_msg)
         await log_to_channel(log_msg)
     except Exception as e:
@@ -153,10 +214,11 @@ async def reload(ctx, extension):
 
 # Run the bot
 if __name__ == "__main__":
+    setup_logging()
     try:
         token = cfg('TOKEN') or cfg('token')
         if not token:
-            print("Bot token not found. Please set TOKEN in your environment or .env file.")
+            logger.error("Bot token not found. Please set TOKEN in your environment or .env file.")
             raise SystemExit(1)
         
         # Load cogs before running the bot
@@ -167,7 +229,7 @@ if __name__ == "__main__":
                 from cogs.registration_helpdesk import HelpdeskView
                 bot.add_view(RegistrationView())
                 bot.add_view(HelpdeskView())
-                print("✅ Registered persistent views")
+                logger.info("✅ Registered persistent views")
                 
                 await load_cogs()
                 await bot.start(token)
@@ -176,13 +238,13 @@ if __name__ == "__main__":
         try:
             asyncio.run(main())
         except KeyboardInterrupt:
-            print("Bot stopped by user")
+            logger.info("Bot stopped by user")
         except Exception as e:
-            print(f"Error running bot: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error running bot: %s", e)
         
     except discord.LoginFailure as e:
-        print(f"Login failed: {e}. Please check your token in environment variables.")
+        logger.error("Login failed: %s. Please check your token in environment variables.", e)
     except Exception as e:
-        print(f"An error occurred: {e}")
+        logger.error("An error occurred: %s", e)
+    finally:
+        stop_logging()
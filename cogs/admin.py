@@ -7,7 +7,6 @@ import shutil
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
-import pandas as pd
 from services import db
 
 class AdminSystem(commands.Cog):
@@ -450,6 +449,9 @@ class AdminSystem(commands.Cog):
             export_path.mkdir(exist_ok=True)
             export_file = export_path / export_filename
             
+            # pandas is only needed here; importing it at load time costs seconds on the Pi
+            import pandas as pd
+            
             with pd.ExcelWriter(export_file, engine='openpyxl') as writer:
                 # Players sheet
                 players_data = []
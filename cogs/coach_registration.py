@@ -9,19 +9,14 @@ from discord import app_commands
 import asyncio
 from typing import Optional
 import os
-from dotenv import load_dotenv
-
-# Load environment
-load_dotenv()
 
 # Import database functions
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from services import db
-
-def cfg(key: str) -> str:
-    """Get config value from environment"""
-    return os.getenv(key.upper())
+from services.config import cfg
+from services.panels import reconcile_panel
+from services.team_search import team_search
 
 class CoachRegistrationView(discord.ui.View):
     """Main coach registration view with Register button"""
@@ -49,7 +44,7 @@ class CoachRegistrationView(discord.ui.View):
         await thread.add_user(interaction.user)
         
         # Get all teams
-        teams = await db.get_all_teams()
+        teams = await team_search.all_teams()
         
         if not teams:
             await thread.send(
@@ -336,10 +331,7 @@ class CoachRegistration(commands.Cog):
                 try:
                     channel = self.bot.get_channel(int(coach_channel_id))
                     if channel:
-                        # Purge all messages in the channel
-                        await channel.purge(limit=100)
-                        
-                        # Send the registration UI
+                        # Registration UI
                         embed = discord.Embed(
                             title="Coach Registration",
                             description=(
@@ -357,11 +349,10 @@ class CoachRegistration(commands.Cog):
                         )
                         embed.set_footer(text="Coaches help guide their teams to victory!")
                         
-                        view = CoachRegistrationView()
-                        await channel.send(embed=embed, view=view)
+                        # Edit the existing panel in place (or post it once)
+                        await reconcile_panel('coach_registration', channel, self.bot.user.id, embed, CoachRegistrationView())
                         
                         self.ui_sent = True
-                        print(f"Coach registration UI sent to channel {coach_channel_id}")
                 except Exception as e:
                     print(f"Error setting up coach registration UI: {e}")
         
@@ -2,6 +2,7 @@ import discord
 from discord.ext import commands, tasks
 from datetime import datetime, timedelta
 import asyncio
+from services.message_router import router
 
 class DMPurge(commands.Cog):
     """DM Purge disabled - Messages are kept permanently"""
@@ -13,8 +14,12 @@ class DMPurge(commands.Cog):
         # self.purge_task.start()  # DISABLED - No automatic purging
         print("ℹ️ DM Purge system DISABLED - Messages will NOT be purged automatically")
     
+    async def cog_load(self):
+        router.add_dm_handler(self.on_dm)
+    
     def cog_unload(self):
-        pass  # self.purge_task.cancel()  # DISABLED
+        router.remove(self.on_dm)
+        # self.purge_task.cancel()  # DISABLED
     
     # @tasks.loop(minutes=30)  # DISABLED - No automatic purging
     # async def purge_task(self):
@@ -30,17 +35,13 @@ class DMPurge(commands.Cog):
     #     """Purge existing messages on bot startup - DISABLED"""
     #     pass
     
-    @commands.Cog.listener()
-    async def on_message(self, message):
+    async def on_dm(self, message):
         """Track DM channels - NO PURGING (DISABLED)"""
-        # Only track DM messages
-        if isinstance(message.channel, discord.DMChannel):
-            # Add channel to tracking dict
-            if message.channel.id not in self.dm_channels:
-                self.dm_channels[message.channel.id] = datetime.utcnow()
-            
-            # DISABLED: No purging or notifications
-            pass
+        # Add channel to tracking dict (the message router only sends DMs here)
+        if message.channel.id not in self.dm_channels:
+            self.dm_channels[message.channel.id] = datetime.utcnow()
+        
+        # DISABLED: No purging or notifications
 
 async def setup(bot):
     await bot.add_cog(DMPurge(bot))
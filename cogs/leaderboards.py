@@ -5,6 +5,7 @@ from pathlib import Path
 import io
 from PIL import Image, ImageDraw, ImageFont
 from services import db
+from services.tracing import traced
 
 
 # Font settings
@@ -71,6 +72,7 @@ INDIA_CONFIG = {
 }
 
 
+@traced('render.leaderboard')
 def generate_leaderboard_image(teams: list, page: int = 0) -> io.BytesIO:
     """Generate leaderboard image with team data."""
     # Get template path
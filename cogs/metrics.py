@@ -0,0 +1,102 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+from services import tracing
+from services.payload import payloads
+from services.rate_limiter import limiter
+from services.config import cfg
+
+
+class Metrics(commands.Cog):
+    """Latency histograms: owner-only /latency and /payloads, and a local Prometheus endpoint"""
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def cog_load(self):
+        # METRICS_PORT=0 turns the endpoint off
+        port = int(cfg('METRICS_PORT', 9464))
+        if port:
+            await tracing.start_metrics_server(cfg('METRICS_HOST', '127.0.0.1'), port)
+
+    async def cog_unload(self):
+        await tracing.stop_metrics_server()
+
+    @app_commands.command(name="latency", description="Show where interaction time goes (Bot owner only)")
+    @app_commands.rename(interaction_name="interaction")
+    @app_commands.describe(interaction_name="Only show spans recorded under this interaction",
+                           reset="Clear all histograms after showing them")
+    async def latency(self, interaction: discord.Interaction, interaction_name: str = None, reset: bool = False):
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.response.send_message("❌ Only the bot owner can use this command.", ephemeral=True)
+            return
+
+        rows = tracing.summary(interaction_name, limit=20)
+        if not rows:
+            await interaction.response.send_message("No spans recorded yet.", ephemeral=True)
+            return
+
+        lines = [f"{'interaction / span':<44} {'n':>5} {'p50':>7} {'p95':>7} {'max':>7}"]
+        for row in rows:
+            label = row['span'] if row['interaction'] in ("", row['span']) else f"{row['interaction']} › {row['span']}"
+            errors = f" ({row['errors']} err)" if row['errors'] else ""
+            lines.append(f"{label[:44]:<44} {row['count']:>5} {row['p50_ms']:>6.0f}ms {row['p95_ms']:>6.0f}ms "
+                         f"{row['max_ms']:>6.0f}ms{errors}")
+
+        embed = discord.Embed(
+            title="⏱️ Latency by span",
+            description="```\n" + "\n".join(lines)[:4000] + "\n```",
+            color=0x3498DB
+        )
+        embed.set_footer(text="Ordered by total time spent • percentiles over the last 256 samples")
+        if reset:
+            tracing.reset()
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(name="payloads", description="Show vision payload sizes, latency and rate-limit queues (Bot owner only)")
+    @app_commands.describe(reset="Clear the counters after showing them")
+    async def payload_stats(self, interaction: discord.Interaction, reset: bool = False):
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.response.send_message("❌ Only the bot owner can use this command.", ephemeral=True)
+            return
+
+        rows = payloads.stats()
+        queues = limiter.stats()
+        if not rows and not queues:
+            await interaction.response.send_message("No remote vision calls recorded yet.", ephemeral=True)
+            return
+
+        lines = [f"{'task':<12} {'n':>5} {'avg KB':>7} {'max KB':>7} {'p50':>7} {'p95':>7}  profile"]
+        for task, row in rows.items():
+            profile = row['profile']
+            shape = f"{profile.fmt} q{profile.quality} {profile.max_size or 'full'}px{' roi' if profile.region else ''}"
+            lines.append(f"{task[:12]:<12} {row['calls']:>5} {row['avg_kb']:>7.0f} {row['max_kb']:>7.0f} "
+                         f"{row['p50_ms']:>6.0f}ms {row['p95_ms']:>6.0f}ms  {shape}")
+
+        embed = discord.Embed(
+            title="📦 Vision payloads by task",
+            description="```\n" + "\n".join(lines)[:4000] + "\n```",
+            color=0x3498DB
+        )
+        if queues:
+            queue_lines = [f"{'key / task':<22} {'queued':>6} {'p50 wait':>9} {'p95 wait':>9}"]
+            for name, row in queues.items():
+                if 'queued' in row:
+                    held = f" held {row['held_for_s']:.0f}s" if row['held_for_s'] else ""
+                    queue_lines.append(f"{name:<22} {row['queued']:>6} {row['rate_per_min']:>7.0f}/min{held}")
+                else:
+                    queue_lines.append(f"{name[:22]:<22} {'':>6} {row['p50_ms']:>7.0f}ms {row['p95_ms']:>7.0f}ms")
+            embed.add_field(name="🚦 Rate limiter", value="```\n" + "\n".join(queue_lines)[:1000] + "\n```", inline=False)
+        embed.set_footer(text="Latency is end to end per remote call, including fallbacks • last 256 calls")
+        if reset:
+            payloads.reset_stats()
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @latency.autocomplete('interaction_name')
+    async def latency_interaction_autocomplete(self, interaction: discord.Interaction, current: str):
+        names = sorted({row['interaction'] for row in tracing.summary(limit=1000) if row['interaction']})
+        return [app_commands.Choice(name=name, value=name) for name in names if current.lower() in name.lower()][:25]
+
+
+async def setup(bot):
+    await bot.add_cog(Metrics(bot))
@@ -8,12 +8,14 @@ Simple OCR Scanner:
 - NO AGENT DETECTION
 """
 
-import io
+from __future__ import annotations
+
 import json
 import base64
+import logging
 import colorsys
 import asyncio
-from typing import List, Dict, Optional
+from typing import TYPE_CHECKING, List, Dict, Optional
 from pathlib import Path
 import os
 
@@ -21,10 +23,19 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import aiohttp
-from PIL import Image
-import numpy as np
 from dotenv import load_dotenv
 
+from services import tracing
+from services.payload import payloads
+from services.rate_limiter import CLAUDE, limiter, retry_after_seconds
+from services.vision import vision
+
+logger = logging.getLogger(__name__)
+
+# NumPy/OpenCV are imported on first scan, not when the cog loads
+if TYPE_CHECKING:
+    import numpy as np
+
 load_dotenv()
 
 # Claude API Key
@@ -68,6 +79,7 @@ def translate_map_name(map_text: str) -> str:
 
 def _rgb_to_hsv01(arr_uint8: np.ndarray) -> np.ndarray:
     """Convert RGB (0-255) to HSV (0-1 range)"""
+    import numpy as np
     arr = arr_uint8.astype(np.float32) / 255.0
     out = np.zeros_like(arr)
     for i, (r, g, b) in enumerate(arr):
@@ -77,6 +89,7 @@ def _rgb_to_hsv01(arr_uint8: np.ndarray) -> np.ndarray:
 
 def _mask_hsv(hsv: np.ndarray, ranges_deg, s_min: float, v_min: float):
     """Filter HSV by hue ranges, saturation, and value"""
+    import numpy as np
     h = hsv[:, 0] * 360.0
     s = hsv[:, 1]
     v = hsv[:, 2]
@@ -91,6 +104,7 @@ def _mask_hsv(hsv: np.ndarray, ranges_deg, s_min: float, v_min: float):
 
 def _score_patch(patch_rgb: np.ndarray):
     """Score a color patch for team detection"""
+    import numpy as np
     if patch_rgb.size == 0:
         return 0.0, 0.0, 0.0
     
@@ -111,11 +125,9 @@ def _score_patch(patch_rgb: np.ndarray):
     
     return blue_score, red_score, gold_score
 
-def _sample_color_patches(img: Image.Image, row_idx: int) -> List[np.ndarray]:
-    """Sample 5 color patches from a player row"""
-    im = img.convert("RGB")
-    W, H = im.size
-    arr = np.asarray(im)
+def _sample_color_patches(arr: np.ndarray, row_idx: int) -> List[np.ndarray]:
+    """Sample 5 color patches from a player row (arr is an RGB array, views are not copied)"""
+    H, W = arr.shape[:2]
     
     # Calculate row position (assumes standard VALORANT Mobile layout)
     top = int(0.255 * H)
@@ -145,11 +157,13 @@ def _sample_color_patches(img: Image.Image, row_idx: int) -> List[np.ndarray]:
         patch(int(x_right - 10), width=12),
     ]
 
-def detect_player_team(img: Image.Image, row_idx: int) -> str:
+def detect_player_team(img: np.ndarray, row_idx: int) -> str:
     """
     Detect which team a player belongs to based on background color
     Returns: "CYAN", "RED", or "GOLD"
     """
+    import numpy as np
+
     patches = _sample_color_patches(img, row_idx)
     
     # Weight patches: left patches (near name) are more reliable
@@ -216,10 +230,10 @@ Rules:
 - score_left is the LEFT score number
 - score_right is the RIGHT score number"""
 
-async def call_claude_api(image_bytes: bytes) -> Optional[Dict]:
+async def call_claude_api(image_bytes: bytes, media_type: str = "image/png") -> Optional[Dict]:
     """Call Claude Vision API to extract match data"""
     if not CLAUDE_API_KEY:
-        print("❌ No Claude API key found")
+        logger.error("❌ No Claude API key found")
         return None
     
     try:
@@ -246,7 +260,7 @@ async def call_claude_api(image_bytes: bytes) -> Optional[Dict]:
                             "type": "image",
                             "source": {
                                 "type": "base64",
-                                "media_type": "image/png",
+                                "media_type": media_type,
                                 "data": image_b64
                             }
                         },
@@ -261,21 +275,24 @@ async def call_claude_api(image_bytes: bytes) -> Optional[Dict]:
         
         timeout = aiohttp.ClientTimeout(total=60)
         
-        print(f"🤖 Calling Claude API (claude-3-5-sonnet-20241022)...")
+        logger.debug("🤖 Calling Claude API (claude-3-5-sonnet-20241022)")
         
-        async with aiohttp.ClientSession(timeout=timeout) as session:
+        await limiter.acquire(CLAUDE, 'scoreboard')
+        async with aiohttp.ClientSession(timeout=timeout, trace_configs=[tracing.http_trace_config()]) as session:
             async with session.post(url, headers=headers, json=payload) as resp:
                 if resp.status != 200:
                     error_text = await resp.text()
-                    print(f"  ❌ Error {resp.status}: {error_text}")
+                    if resp.status == 429:
+                        limiter.throttle(CLAUDE, retry_after_seconds(resp.headers.get('retry-after')))
+                    logger.error("❌ Claude API error %s: %s", resp.status, error_text)
                     return None
                 
                 data = await resp.json()
-                print(f"  ✅ Success with Claude")
+                logger.debug("✅ Success with Claude")
                 
                 # Extract text from Claude response
                 if "content" not in data or not data["content"]:
-                    print("  ❌ No content in response")
+                    logger.error("❌ No content in Claude response")
                     return None
                 
                 text = data["content"][0]["text"]
@@ -289,7 +306,7 @@ async def call_claude_api(image_bytes: bytes) -> Optional[Dict]:
                 
                 start = text.find("{")
                 if start == -1:
-                    print("  ❌ No JSON found in response")
+                    logger.error("❌ No JSON found in Claude response")
                     return None
                 
                 depth = 0
@@ -301,11 +318,11 @@ async def call_claude_api(image_bytes: bytes) -> Optional[Dict]:
                         if depth == 0:
                             return json.loads(text[start:i+1])
                 
-                print("  ❌ Unbalanced JSON")
+                logger.error("❌ Unbalanced JSON in Claude response")
                 return None
     
     except Exception as e:
-        print(f"  ❌ Error with Claude API: {e}")
+        logger.error("❌ Error with Claude API: %s", e)
         return None
 
 # ======================== MAIN COG ========================
@@ -327,51 +344,46 @@ class SimpleOCRScanner(commands.Cog):
                 await interaction.followup.send("❌ Please upload a valid image file!")
                 return
             
-            print(f"📸 Processing screenshot: {screenshot.filename}")
-            
-            # Download and process image
-            image_bytes = await screenshot.read()
-            image = Image.open(io.BytesIO(image_bytes))
+            logger.info("📸 Processing screenshot: %s", screenshot.filename)
             
-            print(f"📐 Image size: {image.size}")
+            # Download and decode once; color sampling and the API payload share the pixels
+            from services.image_ingest import ingest_bytes
+            image = await ingest_bytes(await screenshot.read())
             
-            # Resize if needed
-            if max(image.size) > 1600:
-                ratio = 1600 / max(image.size)
-                new_size = tuple(int(dim * ratio) for dim in image.size)
-                image = image.resize(new_size, Image.LANCZOS)
-                print(f"📐 Resized to: {new_size}")
+            logger.debug("📐 Image size: %s", image.size)
             
-            # Convert to PNG
-            png_buffer = io.BytesIO()
-            image.save(png_buffer, format='PNG')
-            png_bytes = png_buffer.getvalue()
+            # Tuned size/format for the scoreboard (see services/payload.py), no PNG re-encode
+            payload = await asyncio.to_thread(payloads.encode, image, 'scoreboard')
             
             # Extract data using Claude
-            await interaction.followup.send("🔍 Analyzing screenshot with Claude API...")
+            notice = limiter.backpressure_notice(CLAUDE, 'scoreboard')
+            await interaction.followup.send("🔍 Analyzing screenshot with Claude API..." + (f"\n{notice}" if notice else ""))
             
-            claude_data = await call_claude_api(png_bytes)
+            with payloads.measure('scoreboard', payload.size):
+                claude_data = await call_claude_api(payload.data, payload.mime_type)
+                if not claude_data:
+                    # Same scoreboard schema from the shared Gemini vision service
+                    claude_data = await vision.extract('scoreboard', payload.b64, payload.mime_type)
             
             if not claude_data:
                 await interaction.followup.send("❌ Could not extract match data. Please ensure the screenshot shows the scoreboard clearly.")
                 return
             
-            print(f"✅ Claude data: {json.dumps(claude_data, indent=2)}")
+            logger.debug("✅ Claude data: %s", claude_data)
             
             # Detect team colors for all 10 players
-            print("\n🎨 Detecting player team colors...")
             color_assignments = []
             for i in range(10):
-                team_color = detect_player_team(image, i)
+                team_color = detect_player_team(image.rgb(), i)
                 color_assignments.append(team_color)
-                print(f"  Row {i}: {team_color}")
+                logger.debug("🎨 Row %d: %s", i, team_color)
             
             # Count cyan, red, and gold players
             cyan_count = color_assignments.count("CYAN")
             red_count = color_assignments.count("RED")
             gold_count = color_assignments.count("GOLD")
             
-            print(f"\n📊 Color counts: Cyan={cyan_count}, Red={red_count}, Gold={gold_count}")
+            logger.debug("📊 Color counts: Cyan=%d, Red=%d, Gold=%d", cyan_count, red_count, gold_count)
             
             # Assign gold players to the team with 4 players
             final_assignments = color_assignments.copy()
@@ -382,22 +394,22 @@ class SimpleOCRScanner(commands.Cog):
                             final_assignments[i] = "CYAN"
                             cyan_count += 1
                             red_count -= 1
-                            print(f"🟡 Assigned gold player (row {i}) to CYAN (was 4v5)")
+                            logger.debug("🟡 Assigned gold player (row %d) to CYAN (was 4v5)", i)
                         elif red_count == 4 and cyan_count == 5:
                             final_assignments[i] = "RED"
                             red_count += 1
                             cyan_count -= 1
-                            print(f"🟡 Assigned gold player (row {i}) to RED (was 5v4)")
+                            logger.debug("🟡 Assigned gold player (row %d) to RED (was 5v4)", i)
                         else:
                             # Default: assign to smaller team or cyan if equal
                             if cyan_count <= red_count:
                                 final_assignments[i] = "CYAN"
                                 cyan_count += 1
-                                print(f"🟡 Assigned gold player (row {i}) to CYAN (default)")
+                                logger.debug("🟡 Assigned gold player (row %d) to CYAN (default)", i)
                             else:
                                 final_assignments[i] = "RED"
                                 red_count += 1
-                                print(f"🟡 Assigned gold player (row {i}) to RED (default)")
+                                logger.debug("🟡 Assigned gold player (row %d) to RED (default)", i)
             
             # Build teams
             players = claude_data.get("players", [])
@@ -410,7 +422,7 @@ class SimpleOCRScanner(commands.Cog):
                 else:
                     team_red.append(player)
             
-            print(f"\n✅ Final teams: Cyan={len(team_cyan)}, Red={len(team_red)}")
+            logger.info("✅ Final teams: Cyan=%d, Red=%d", len(team_cyan), len(team_red))
             
             # Determine scores and winner
             score_left = claude_data.get("score_left", 0)
@@ -447,9 +459,7 @@ class SimpleOCRScanner(commands.Cog):
                                      team_cyan, team_red, winner)
             
         except Exception as e:
-            print(f"❌ Error scanning match: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Error scanning match: %s", e)
             await interaction.followup.send(f"❌ Error: {str(e)}")
     
     async def display_results(self, interaction, map_name, cyan_score, red_score, 
@@ -6,46 +6,11 @@ Player sends profile screenshot, bot reads IGN and ID automatically
 import discord
 from discord import app_commands
 from discord.ext import commands
-import json
-import aiohttp
-import base64
 from pathlib import Path
-from io import BytesIO
-from PIL import Image
 import os
 from services import db
-
-# load .env optionally
-try:
-    from dotenv import load_dotenv
-    env_path = Path(__file__).parent.parent / '.env'
-    if env_path.exists():
-        load_dotenv(dotenv_path=env_path)
-except Exception:
-    pass
-
-# helper: try env then config.json
-_CONFIG_JSON = None
-def _load_config_json():
-    global _CONFIG_JSON
-    if _CONFIG_JSON is not None:
-        return _CONFIG_JSON
-    try:
-        path = Path(__file__).parent.parent / 'config.json'
-        if path.exists():
-            with open(path, 'r', encoding='utf-8') as f:
-                _CONFIG_JSON = json.load(f)
-                return _CONFIG_JSON
-    except Exception:
-        _CONFIG_JSON = {}
-    _CONFIG_JSON = {}
-    return _CONFIG_JSON
-
-def cfg(key, default=None):
-    val = os.environ.get(key)
-    if val is not None:
-        return val
-    return _load_config_json().get(key, default)
+from services.message_router import router
+from services.ocr_service import ocr_service
 
 class OCRRegistrationView(discord.ui.View):
     """View with Approve/Decline buttons after OCR scan"""
@@ -195,9 +160,9 @@ class OCRRegistration(commands.Cog):
         
         # Track users waiting for screenshot
         self.pending_registrations = {}  # {user_id: True}
-        
-        # Load config for Gemini API
-        self.gemini_api_key = cfg('GEMINI_API_KEY')
+    
+    def cog_unload(self):
+        router.remove(self.handle_screenshot_dm)
     
     @app_commands.command(name="register_ocr", description="Register for the tournament using OCR (automatic)")
     async def register_ocr(self, interaction: discord.Interaction):
@@ -260,6 +225,7 @@ class OCRRegistration(commands.Cog):
             
             # Mark user as pending registration
             self.pending_registrations[interaction.user.id] = True
+            router.watch_dm(interaction.user.id, f"ocr_registration:{interaction.user.id}", self.handle_screenshot_dm)
             
             await interaction.followup.send(
                 "✅ Check your DMs! I've sent you registration instructions.",
@@ -280,17 +246,8 @@ class OCRRegistration(commands.Cog):
                 ephemeral=True
             )
     
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        """Listen for screenshots in DMs"""
-        
-        # Ignore bot messages
-        if message.author.bot:
-            return
-        
-        # Only process DMs
-        if not isinstance(message.channel, discord.DMChannel):
-            return
+    async def handle_screenshot_dm(self, message: discord.Message):
+        """Screenshots in DMs from users with a pending registration (routed by the message router)"""
         
         # Check if user is pending registration
         if message.author.id not in self.pending_registrations:
@@ -323,7 +280,7 @@ class OCRRegistration(commands.Cog):
             image_bytes = await attachment.read()
             
             # Run OCR
-            ign, player_id = await self.extract_profile_info(image_bytes)
+            ign, player_id = await self.extract_profile_info(image_bytes, notify=message.channel.send)
             
             if not ign or not player_id:
                 await message.channel.send(
@@ -355,106 +312,17 @@ class OCRRegistration(commands.Cog):
                 f"Please try again with a clearer screenshot."
             )
     
-    async def extract_profile_info(self, image_bytes: bytes) -> tuple[str, str]:
-        """Extract IGN and Player ID from profile screenshot using Gemini OCR"""
-        
-        if not self.gemini_api_key:
-            return None, None
-        
-        # Convert image to base64
-        img = Image.open(BytesIO(image_bytes))
+    async def extract_profile_info(self, image_bytes: bytes, notify=None) -> tuple[str, str]:
+        """Extract IGN and Player ID from profile screenshot (local Tesseract, Gemini fallback)"""
         
-        # Resize if too large
-        max_size = 1600
-        if max(img.size) > max_size:
-            ratio = max_size / max(img.size)
-            new_size = tuple(int(dim * ratio) for dim in img.size)
-            img = img.resize(new_size, Image.LANCZOS)
+        # Decode once; Tesseract reads it locally, Gemini only if that is not confident
+        from services.image_ingest import ingest_bytes
+        img = await ingest_bytes(image_bytes)
         
-        # Convert to base64
-        buffer = BytesIO()
-        img.save(buffer, format='PNG')
-        img_b64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        
-        # Gemini prompt for profile extraction
-        prompt = """
-You are reading a VALORANT Mobile player profile screenshot.
-
-Extract the following information:
-1. IGN (In-Game Name) - the player's username
-2. Player ID - the numeric ID (format: 1234 or #1234)
-
-Return RAW JSON ONLY (no markdown):
-{
-  "ign": "PlayerName",
-  "id": "1234567"
-}
-
-Rules:
-- Find the player's IGN (usually displayed prominently)
-- Find the Player ID (numbers, may have # prefix)
-- Remove # from ID if present
-- If IGN not found, set to null
-- If ID not found, set to null
-"""
-        
-        # Try multiple Gemini models
-        models = [
-            ("v1beta", "gemini-2.0-flash-exp"),
-            ("v1beta", "gemini-exp-1206"),
-            ("v1beta", "gemini-1.5-pro"),
-        ]
-        
-        for version, model in models:
-            try:
-                url = f"https://generativelanguage.googleapis.com/{version}/models/{model}:generateContent"
-                
-                payload = {
-                    "contents": [{
-                        "parts": [
-                            {"text": prompt},
-                            {
-                                "inline_data": {
-                                    "mime_type": "image/png",
-                                    "data": img_b64
-                                }
-                            }
-                        ]
-                    }]
-                }
-                
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(
-                        url,
-                        params={"key": self.gemini_api_key},
-                        json=payload,
-                        headers={"Content-Type": "application/json"}
-                    ) as resp:
-                        if resp.status != 200:
-                            continue
-                        
-                        data = await resp.json()
-                        text_response = data['candidates'][0]['content']['parts'][0]['text']
-                        
-                        # Parse JSON response
-                        import re
-                        json_match = re.search(r'\{.*\}', text_response, re.DOTALL)
-                        if json_match:
-                            result = json.loads(json_match.group())
-                            ign = result.get('ign')
-                            player_id = result.get('id')
-                            
-                            # Clean up ID (remove # if present)
-                            if player_id:
-                                player_id = str(player_id).replace('#', '').strip()
-                            
-                            return ign, player_id
-            
-            except Exception as e:
-                print(f"OCR error with {model}: {e}")
-                continue
-        
-        return None, None
+        result = await ocr_service.extract_profile(img, notify)
+        if not result:
+            return None, None
+        return result['ign'], result['id']
     
     async def register_player_ocr(self, discord_id: int, ign: str, player_id: str, region: str) -> tuple[bool, str]:
         """Register a player with OCR-extracted data using PostgreSQL"""
@@ -533,6 +401,7 @@ Rules:
             # Remove from pending registrations
             if discord_id in self.pending_registrations:
                 del self.pending_registrations[discord_id]
+            router.unwatch_dm(f"ocr_registration:{discord_id}")
             
             return True, "Registration successful!"
             
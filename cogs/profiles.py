@@ -6,34 +6,14 @@ from PIL import Image, ImageDraw, ImageFont
 from pathlib import Path
 import os
 import json
-import aiohttp
 import asyncio
 from io import BytesIO
 from datetime import datetime
 from services import db
-
-# Helper to get config values
-_CONFIG_JSON = None
-def _load_config_json():
-    global _CONFIG_JSON
-    if _CONFIG_JSON is not None:
-        return _CONFIG_JSON
-    try:
-        path = Path(__file__).parent.parent / 'config.json'
-        if path.exists():
-            with open(path, 'r', encoding='utf-8') as f:
-                _CONFIG_JSON = json.load(f)
-                return _CONFIG_JSON
-    except Exception:
-        _CONFIG_JSON = {}
-    _CONFIG_JSON = {}
-    return _CONFIG_JSON
-
-def cfg(key, default=None):
-    val = os.environ.get(key)
-    if val is not None:
-        return val
-    return _load_config_json().get(key, default)
+from services.config import cfg
+from services.avatar_cache import avatar_cache
+from services.team_search import team_search
+from services.tracing import traced
 
 # View for region selection via DM
 class RegionSelectView(View):
@@ -453,6 +433,7 @@ class Profiles(commands.Cog):
         
         return kill_points + death_penalty + win_points + mvp_points + participation
 
+    @traced('render.profile_card')
     async def create_profile_image(self, member: discord.Member, player_data: dict, stats: dict):
         """Create and save profile image"""
         # Load template and font
@@ -470,30 +451,13 @@ class Profiles(commands.Cog):
         
         # Add Discord avatar
         try:
-            # Get avatar URL - fallback to default if none set
-            avatar_url = member.avatar.url if member.avatar else member.default_avatar.url
-            async with aiohttp.ClientSession() as session:
-                async with session.get(str(avatar_url)) as response:
-                    avatar_data = await response.read()
-                    avatar = Image.open(BytesIO(avatar_data))
-                    
-                    # Resize avatar to desired size
-                    avatar_size = (250, 250)  # Same size as in test
-                    avatar = avatar.resize(avatar_size)
-                    
-                    # Create circular mask
-                    mask = Image.new('L', avatar_size, 0)
-                    mask_draw = ImageDraw.Draw(mask)
-                    mask_draw.ellipse((0, 0, avatar_size[0], avatar_size[1]), fill=255)
-                    
-                    # Apply circular mask
-                    output = Image.new('RGBA', avatar_size, (0, 0, 0, 0))
-                    output.paste(avatar, (0, 0))
-                    output.putalpha(mask)
-                    
-                    # Paste avatar onto profile image
-                    avatar_pos = (819, 232)  # Same position as in test
-                    img.paste(output, avatar_pos, output)
+            # Cached, already-masked tile keyed on the avatar hash
+            avatar = member.display_avatar
+            tile = await avatar_cache.get_tile(avatar.key, avatar.replace(size=256, format='png').url)
+            
+            # Paste avatar onto profile image
+            avatar_pos = (819, 232)  # Same position as in test
+            img.paste(tile, avatar_pos, tile)
         except Exception as e:
             print(f"Error adding avatar: {e}")
             # Continue without avatar if there's an error
@@ -920,25 +884,20 @@ class Profiles(commands.Cog):
                     )
                     return
             else:
-                # Try to get team by name first
-                target_team = await db.get_team_by_name(name)
+                # Exact name or tag only; close names are offered by autocomplete, never guessed
+                match = await team_search.find(name)
                 
-                # If not found by name, try searching all teams by tag
-                if not target_team:
-                    all_teams = await db.get_all_teams()
-                    team_id_match = None
-                    for team in all_teams:
-                        if team.get('tag', '').lower() == name.lower():
-                            team_id_match = team['id']
-                            break
-                    
-                    # If found by tag, get the full team data with members
-                    if team_id_match:
-                        target_team = await db.get_team_by_id(team_id_match)
+                # Get the full team data with members
+                if match:
+                    target_team = await db.get_team_by_id(match['id'])
             
             if not target_team:
                 if name:
-                    await interaction.followup.send(f"❌ Team `{name}` not found. Try using the full team name or tag.", ephemeral=True)
+                    closest = await team_search.search(name, limit=3)
+                    names = ", ".join(f"`{team['name']}`" for team in closest)
+                    hint = f"\nDid you mean: {names}?" if closest else ""
+                    await interaction.followup.send(
+                        f"❌ Team `{name}` not found. Try using the full team name or tag.{hint}", ephemeral=True)
                 else:
                     await interaction.followup.send("❌ Could not find team.", ephemeral=True)
                 return
@@ -952,8 +911,6 @@ class Profiles(commands.Cog):
 
             # Extract member data
             members_data = target_team.get('members', [])
-            if isinstance(members_data, str):
-                members_data = json.loads(members_data)
             
             # Build roster list with player stats
             roster_lines = []
@@ -1086,6 +1043,15 @@ class Profiles(commands.Cog):
             import traceback
             traceback.print_exc()
 
+    @team_profile.autocomplete('name')
+    async def team_profile_name_autocomplete(self, interaction: discord.Interaction, current: str):
+        """Suggest team names ranked by similarity to what has been typed"""
+        teams = await team_search.search(current, limit=25)
+        return [
+            app_commands.Choice(name=f"{team['name']} [{team['tag']}]"[:100], value=team['name'][:100])
+            for team in teams
+        ]
+
 class TeamManagementView(discord.ui.View):
     """Interactive team management view with all controls."""
     
@@ -1198,8 +1164,8 @@ class TeamManagementView(discord.ui.View):
                     return
                 
                 # Check if tag is already taken
-                all_teams = await db.get_all_teams()
-                tag_taken = any(t.get('tag', '').upper() == new_tag and t['id'] != self.team_data['id'] for t in all_teams)
+                existing = await team_search.get_by_tag(new_tag)
+                tag_taken = existing is not None and existing['id'] != self.team_data['id']
                 
                 if tag_taken:
                     await interaction.followup.send(f"❌ Team tag `{new_tag}` is already taken!", ephemeral=True)
@@ -1434,8 +1400,6 @@ class TeamManagementView(discord.ui.View):
         """Remove a player from the team."""
         # Get current members
         members_data = self.team_data.get('members', [])
-        if isinstance(members_data, str):
-            members_data = json.loads(members_data)
         
         if not members_data:
             await interaction.response.send_message("❌ No players in the team to remove.", ephemeral=True)
@@ -1544,8 +1508,6 @@ class TeamManagementView(discord.ui.View):
         """Transfer captainship to another team member."""
         # Get current members (excluding captain)
         members_data = self.team_data.get('members', [])
-        if isinstance(members_data, str):
-            members_data = json.loads(members_data)
         
         eligible_members = [m for m in members_data if isinstance(m, dict) and m.get('discord_id') != self.team_data['captain_id']]
         
@@ -1858,9 +1820,6 @@ class TeamProfileEditView(discord.ui.View):
         
         # Show current roster
         members_data = self.team_data.get('members', [])
-        if isinstance(members_data, str):
-            import json
-            members_data = json.loads(members_data)
         
         roster_text = ""
         if members_data:
@@ -1949,9 +1908,6 @@ class TeamProfileEditView(discord.ui.View):
         
         # Get current members (excluding captain)
         members_data = self.team_data.get('members', [])
-        if isinstance(members_data, str):
-            import json
-            members_data = json.loads(members_data)
         
         # Filter out current captain
         eligible_members = [m for m in members_data if isinstance(m, dict) and m.get('discord_id') != self.team_data['captain_id']]
@@ -2431,9 +2387,6 @@ class PlayerManagementView(discord.ui.View):
         """Remove a player from the team."""
         # Get current members
         members_data = self.team_data.get('members', [])
-        if isinstance(members_data, str):
-            import json
-            members_data = json.loads(members_data)
         
         # Filter out captain from removable players
         removable_players = [m for m in members_data if isinstance(m, dict) and m.get('discord_id') != self.team_data['captain_id']]
@@ -6,29 +6,9 @@ import json
 import asyncio
 from pathlib import Path
 from services import db
-
-# Helper to get config values (env preferred, fallback to config.json if present)
-_CONFIG_JSON = None
-def _load_config_json():
-    global _CONFIG_JSON
-    if _CONFIG_JSON is not None:
-        return _CONFIG_JSON
-    try:
-        path = Path(__file__).parent.parent / 'config.json'
-        if path.exists():
-            with open(path, 'r', encoding='utf-8') as f:
-                _CONFIG_JSON = json.load(f)
-                return _CONFIG_JSON
-    except Exception:
-        _CONFIG_JSON = {}
-    _CONFIG_JSON = {}
-    return _CONFIG_JSON
-
-def cfg(key, default=None):
-    val = os.environ.get(key)
-    if val is not None:
-        return val
-    return _load_config_json().get(key, default)
+from services.config import cfg
+from services.panels import reconcile_panel
+from services.scheduler import schedule_thread_deletion
 
 async def wait_for_message_with_timeout(bot, check, thread, user, timeout_duration=300):
     """
@@ -219,11 +199,11 @@ class RegistrationView(discord.ui.View):
             
             # Process OCR
             from services.ocr_service import ocr_service
-            success, ign, player_id = await ocr_service.process_screenshot(message.attachments[0])
+            success, ign, player_id = await ocr_service.process_screenshot(message.attachments[0], notify=thread.send)
             
             if not success:
                 await thread.send(f"❌ OCR Failed: {ign}\nPlease try again with a clearer screenshot.")
-                asyncio.create_task(self.delete_thread_after_delay(thread, 12))
+                await schedule_thread_deletion(thread, 12)
                 return
             
             # Show OCR results and ask for confirmation
@@ -348,7 +328,7 @@ class RegistrationView(discord.ui.View):
                                     
                                 except Exception as e:
                                     await thread.send(f"❌ Registration failed: {str(e)}")
-                                    asyncio.create_task(cog.delete_thread_after_delay(thread, 12))
+                                    await schedule_thread_deletion(thread, 12)
                             
                             async def india_no_callback(india_i: discord.Interaction):
                                 if india_i.user.id != message.author.id:
@@ -413,7 +393,7 @@ class RegistrationView(discord.ui.View):
                                     
                                 except Exception as e:
                                     await thread.send(f"❌ Registration failed: {str(e)}")
-                                    asyncio.create_task(cog.delete_thread_after_delay(thread, 12))
+                                    await schedule_thread_deletion(thread, 12)
                             
                             yes_button.callback = india_yes_callback
                             no_button.callback = india_no_callback
@@ -489,7 +469,7 @@ class RegistrationView(discord.ui.View):
 
                         except Exception as e:
                             await thread.send(f"❌ Registration failed: {str(e)}")
-                            asyncio.create_task(self.delete_thread_after_delay(thread, 12))
+                            await schedule_thread_deletion(thread, 12)
                     
                     button.callback = region_callback
                     region_view.add_item(button)
@@ -507,7 +487,7 @@ class RegistrationView(discord.ui.View):
                     
                 await interaction.response.defer()
                 await thread.send("Registration cancelled. Please try again with a new screenshot.")
-                asyncio.create_task(self.delete_thread_after_delay(thread, 12))
+                await schedule_thread_deletion(thread, 12)
             
             confirm_button = discord.ui.Button(
                 label="Confirm",
@@ -857,7 +837,7 @@ class RegistrationView(discord.ui.View):
 
             except Exception as e:
                 await thread.send(f"❌ Registration failed: {str(e)}")
-                asyncio.create_task(self.delete_thread_after_delay(thread, 12))
+                await schedule_thread_deletion(thread, 12)
         
         except Exception as e:
             print(f"Error in manual registration: {e}")
@@ -868,14 +848,6 @@ class RegistrationView(discord.ui.View):
             except:
                 pass
 
-    async def delete_thread_after_delay(self, thread, hours):
-        """Delete thread after specified hours"""
-        await asyncio.sleep(hours * 3600)  # Convert hours to seconds
-        try:
-            await thread.delete()
-        except:
-            pass
-
 class Registration(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -938,11 +910,6 @@ class Registration(commands.Cog):
                 print(f"💡 Tip: Make sure the channel exists and the bot has access to it.")
                 return
             
-            # Purge all messages in the channel first
-            print(f"🧹 Purging all messages in {channel.name}...")
-            deleted = await channel.purge(limit=100)  # Purge up to 100 messages
-            print(f"🗑️ Deleted {len(deleted)} messages from {channel.name}")
-            
             # Create registration UI embed
             embed = discord.Embed(
                 title="Player Registration",
@@ -974,12 +941,10 @@ class Registration(commands.Cog):
                 inline=False
             )
             
-            # Add persistent view
-            view = RegistrationView()
-            await channel.send(embed=embed, view=view)
+            # Edit the existing panel in place (or post it once); the view is registered in bot.py
+            await reconcile_panel('player_registration', channel, self.bot.user.id, embed, RegistrationView())
             
             self._instructions_sent = True
-            print(f"✅ Registration UI posted in {channel.name}")
             
         except Exception as e:
             print(f"❌ Error sending registration UI: {e}")
@@ -6,31 +6,11 @@ import json
 import asyncio
 from pathlib import Path
 from services import db
+from services.config import cfg
+from services.panels import reconcile_panel
+from services.scheduler import schedule_ghost_pings, schedule_thread_deletion
 from services.ocr_service import ocr_service
 
-# Helper to get config values
-_CONFIG_JSON = None
-def _load_config_json():
-    global _CONFIG_JSON
-    if _CONFIG_JSON is not None:
-        return _CONFIG_JSON
-    try:
-        path = Path(__file__).parent.parent / 'config.json'
-        if path.exists():
-            with open(path, 'r', encoding='utf-8') as f:
-                _CONFIG_JSON = json.load(f)
-                return _CONFIG_JSON
-    except Exception:
-        _CONFIG_JSON = {}
-    _CONFIG_JSON = {}
-    return _CONFIG_JSON
-
-def cfg(key, default=None):
-    val = os.environ.get(key)
-    if val is not None:
-        return val
-    return _load_config_json().get(key, default)
-
 class HelpdeskView(discord.ui.View):
     def __init__(self):
         super().__init__(timeout=None)
@@ -195,37 +175,11 @@ class HelpdeskView(discord.ui.View):
             return
         
         # Start ghost ping reminder task (every 10 minutes)
-        asyncio.create_task(self.ghost_ping_task(thread, role_mentions, interaction.user))
+        await schedule_ghost_pings(thread, role_mentions)
         
         # Schedule thread deletion after 12 hours
-        asyncio.create_task(self.delete_thread_after_delay(thread, 12))
+        await schedule_thread_deletion(thread, 12)
     
-    async def ghost_ping_task(self, thread, role_mentions, user):
-        """Ghost ping staff every 10 minutes"""
-        if not role_mentions:
-            return
-        
-        # Ghost ping every 10 minutes for 12 hours (72 times)
-        for i in range(72):
-            await asyncio.sleep(600)  # Wait 10 minutes
-            
-            # Check if thread still exists
-            try:
-                # Try to send a message to check if thread exists
-                ping_msg = await thread.send(" ".join(role_mentions))
-                await ping_msg.delete()
-            except:
-                # Thread was deleted or we don't have permission
-                return
-    
-    async def delete_thread_after_delay(self, thread, hours):
-        """Delete thread after specified hours"""
-        await asyncio.sleep(hours * 3600)
-        try:
-            await thread.delete()
-        except:
-            pass
-
 class StaffActionView(discord.ui.View):
     def __init__(self, user_id, thread, staff_members, role_mentions):
         super().__init__(timeout=43200)  # 12 hours
@@ -300,7 +254,7 @@ class StaffActionView(discord.ui.View):
             message = await interaction.client.wait_for('message', timeout=3600, check=check)
             
             # Process OCR
-            success, ign, player_id = await ocr_service.process_screenshot(message.attachments[0])
+            success, ign, player_id = await ocr_service.process_screenshot(message.attachments[0], notify=self.thread.send)
             
             if not success:
                 await self.thread.send(f"❌ OCR Failed: {ign}\nPlease try again with a clearer screenshot.")
@@ -645,11 +599,6 @@ class RegistrationHelpdesk(commands.Cog):
                 print(f"❌ Helpdesk channel not found with ID: {self.helpdesk_channel_id}")
                 return
             
-            # Purge all messages in the channel
-            print(f"🧹 Purging all messages in {channel.name}...")
-            deleted = await channel.purge(limit=100)
-            print(f"🗑️ Deleted {len(deleted)} messages from {channel.name}")
-            
             # Create helpdesk UI embed
             embed = discord.Embed(
                 title="Registration Helpdesk",
@@ -678,12 +627,10 @@ class RegistrationHelpdesk(commands.Cog):
                 inline=False
             )
             
-            # Add persistent view
-            view = HelpdeskView()
-            await channel.send(embed=embed, view=view)
+            # Edit the existing panel in place (or post it once); the view is registered in bot.py
+            await reconcile_panel('player_helpdesk', channel, self.bot.user.id, embed, HelpdeskView())
             
             self._instructions_sent = True
-            print(f"✅ Helpdesk UI posted in {channel.name}")
             
         except Exception as e:
             print(f"❌ Error sending helpdesk UI: {e}")
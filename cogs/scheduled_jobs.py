@@ -0,0 +1,68 @@
+import discord
+from discord.ext import commands
+from services import db
+from services.scheduler import scheduler, GHOST_PING_INTERVAL
+
+
+class ScheduledJobs(commands.Cog):
+    """Runs the persistent job scheduler and the handlers for bot-level jobs"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        scheduler.register('delete_thread', self.delete_thread)
+        scheduler.register('ghost_ping', self.ghost_ping)
+        scheduler.register('expire_scrim_requests', self.expire_scrim_requests)
+
+    async def cog_load(self):
+        self.bot.loop.create_task(self._start_when_ready())
+
+    async def cog_unload(self):
+        await scheduler.stop()
+
+    async def _start_when_ready(self):
+        # Handlers fetch channels, so wait for the gateway connection
+        await self.bot.wait_until_ready()
+        scheduler.start()
+
+    async def _fetch_thread(self, thread_id: int):
+        """Thread from cache or API; None if it no longer exists"""
+        thread = self.bot.get_channel(thread_id)
+        if thread is not None:
+            return thread
+        try:
+            return await self.bot.fetch_channel(thread_id)
+        except (discord.NotFound, discord.Forbidden):
+            return None
+
+    async def delete_thread(self, payload: dict):
+        await scheduler.cancel(f"ghost_ping:{payload['thread_id']}")
+        thread = await self._fetch_thread(payload['thread_id'])
+        if thread is None:
+            return None
+        try:
+            await thread.delete()
+        except discord.NotFound:
+            pass
+        return None
+
+    async def ghost_ping(self, payload: dict):
+        thread = await self._fetch_thread(payload['thread_id'])
+        if thread is None or getattr(thread, 'archived', False):
+            return None
+        try:
+            ping_msg = await thread.send(payload['mentions'])
+            await ping_msg.delete()
+        except (discord.NotFound, discord.Forbidden):
+            # Thread was deleted or we lost permission
+            return None
+
+        payload['remaining'] -= 1
+        return GHOST_PING_INTERVAL if payload['remaining'] > 0 else None
+
+    async def expire_scrim_requests(self, payload: dict):
+        await db.expire_old_scrim_requests()
+        return None
+
+
+async def setup(bot):
+    await bot.add_cog(ScheduledJobs(bot))
@@ -6,81 +6,48 @@ import re
 import os
 import json
 import io
+import asyncio
+import logging
 from datetime import datetime, timedelta
-from zoneinfo import ZoneInfo
 from services import db
+from services import tracing
+from services import lfs_parser
+from services.lfs_parser import TIMEZONE_MAP, parse_lfs, zone
+from services.message_router import router
+from services.panels import reconcile_panel
+from services.payload import payloads
+from services.rate_limiter import GEMINI, limiter
+from services.vision import TASKS, vision
+from services.scheduler import schedule_scrim_request_expiry
 
+logger = logging.getLogger(__name__)
 
-# Timezone mappings
-TIMEZONE_MAP = {
-    'IST': 'Asia/Kolkata',
-    'CET': 'Europe/Paris',
-    'CEST': 'Europe/Paris',  # Central European Summer Time
-    'EST': 'America/New_York',
-    'EDT': 'America/New_York',  # Eastern Daylight Time
-    'CST': 'America/Chicago',
-    'CDT': 'America/Chicago',  # Central Daylight Time
-    'MST': 'America/Denver',
-    'MDT': 'America/Denver',  # Mountain Daylight Time
-    'PST': 'America/Los_Angeles',
-    'PDT': 'America/Los_Angeles',  # Pacific Daylight Time
-    'GMT': 'Europe/London',
-    'BST': 'Europe/London',  # British Summer Time
-    'JST': 'Asia/Tokyo',
-    'KST': 'Asia/Seoul',
-    'AEST': 'Australia/Sydney',
-    'AEDT': 'Australia/Sydney',  # Australian Eastern Daylight Time
-    'NZST': 'Pacific/Auckland',
-    'NZDT': 'Pacific/Auckland',  # New Zealand Daylight Time
-    'SGT': 'Asia/Singapore',
-    'HKT': 'Asia/Hong_Kong',
-    'PHT': 'Asia/Manila',
-    'WIB': 'Asia/Jakarta',
-    'PKT': 'Asia/Karachi',
-    'GST': 'Asia/Dubai',  # Gulf Standard Time
-    'MSK': 'Europe/Moscow',
-    'EET': 'Europe/Athens',
-    'EEST': 'Europe/Athens',  # Eastern European Summer Time
-    'BRT': 'America/Sao_Paulo',
-    'ART': 'America/Argentina/Buenos_Aires',
-    'VET': 'America/Caracas',
+LFS_FORMAT_HELP = (
+    "Invalid format! Please use either:\n"
+    "**Format 1 (2 lines):**\n"
+    "```\nLFS BO1/BO3/BO5\n"
+    "TIME, REGION\n```"
+    "**Format 2 (1 line):**\n"
+    "```LFS FORMAT TIME REGION```\n"
+    "Examples: `LFS BO3 7PM IST APAC` or `LFS BO5 9PM CET EMEA`", 15)
+# LFS parse error kind -> (message, seconds before it is deleted)
+LFS_ERRORS = {
+    lfs_parser.NOT_LFS: LFS_FORMAT_HELP,
+    lfs_parser.INVALID_FORMAT: LFS_FORMAT_HELP,
+    lfs_parser.INVALID_FORMAT_LINE: (
+        "Invalid format! First line should be: `LFS BO1`, `LFS BO3`, or `LFS BO5`", 10),
+    lfs_parser.INVALID_TIME_LINE: (
+        "Invalid format! Second line should be: `TIME, REGION`\n"
+        "Example: `7PM IST, APAC`", 10),
+    lfs_parser.INVALID_REGION: (
+        f"Invalid region! Must be one of: {', '.join(lfs_parser.REGIONS)}", 10),
+    lfs_parser.INVALID_TIME: (
+        "Invalid time format! Please use format like:\n"
+        "`7PM IST, APAC` or `9:30PM CET, EMEA`\n\n"
+        f"**Supported timezones:** {', '.join(sorted(TIMEZONE_MAP.keys()))}", 20),
 }
 
 
-def parse_time_with_timezone(time_str: str):
-    """
-    Parse time string like '7PM IST' or '9:30PM CET' and return hour, minute, timezone
-    Returns: (hour_24, minute, timezone_abbr) or None if invalid
-    """
-    # Match patterns like: 7PM IST, 9:30PM CET, 10:45 PM EST, etc.
-    pattern = r'(\d{1,2})(?::(\d{2}))?\s*(AM|PM)\s+([A-Z]{3,4})'
-    match = re.search(pattern, time_str.upper())
-    
-    if not match:
-        return None
-    
-    hour = int(match.group(1))
-    minute = int(match.group(2)) if match.group(2) else 0
-    period = match.group(3)
-    timezone = match.group(4)
-    
-    # Validate timezone
-    if timezone not in TIMEZONE_MAP:
-        return None
-    
-    # Convert to 24-hour format
-    if period == 'PM' and hour != 12:
-        hour += 12
-    elif period == 'AM' and hour == 12:
-        hour = 0
-    
-    # Validate hour and minute
-    if hour < 0 or hour > 23 or minute < 0 or minute > 59:
-        return None
-    
-    return (hour, minute, timezone)
-
-
 def convert_time_to_timezone(hour: int, minute: int, from_tz: str, to_tz: str) -> tuple:
     """
     Convert time from one timezone to another
@@ -89,8 +56,8 @@ def convert_time_to_timezone(hour: int, minute: int, from_tz: str, to_tz: str) -
     try:
         # Create a datetime object for today with the given time
         today = datetime.now()
-        source_tz = ZoneInfo(TIMEZONE_MAP[from_tz])
-        target_tz = ZoneInfo(TIMEZONE_MAP[to_tz])
+        source_tz = zone(from_tz)
+        target_tz = zone(to_tz)
         
         # Create time in source timezone
         dt_source = datetime(today.year, today.month, today.day, hour, minute, tzinfo=source_tz)
@@ -149,7 +116,7 @@ class ScrimRequestView(View):
             # Check if request is in_progress (another captain is scheduling with them)
             if request['status'] == 'in_progress':
                 # Get the teams involved
-                request_team = await db.get_team_by_id(request['team_id'])
+                request_team = await db.get_team_summary(request['team_id'])
                 request_team_name = f"{request_team['name']} [{request_team['tag']}]" if request_team else "Unknown"
                 
                 # Find who they're scheduling with
@@ -158,9 +125,7 @@ class ScrimRequestView(View):
                 if matches:
                     match = matches[0]
                     other_captain_id = match['captain_2_discord_id'] if match['captain_1_discord_id'] == request['captain_discord_id'] else match['captain_1_discord_id']
-                    other_team = await db.get_team_by_captain(other_captain_id)
-                    if not other_team:
-                        other_team = await db.get_player_team(other_captain_id)
+                    other_team = await db.get_player_team_summary(other_captain_id)
                     other_team_name = f"{other_team['name']} [{other_team['tag']}]" if other_team else "another team"
                 
                 await interaction.followup.send(
@@ -279,6 +244,9 @@ class ScrimApprovalView(View):
             if match['captain_1_approved'] and match['captain_2_approved']:
                 # Both approved - start chat relay and ask for format selection
                 await db.update_scrim_match_status(self.match_id, 'chat_active')
+                scrim_cog = interaction.client.get_cog('Scrim')
+                if scrim_cog:
+                    scrim_cog.route_match_dms(match)
                 await db.update_scrim_request_status(match['request_id_1'], 'matched')
                 await db.update_scrim_request_status(match['request_id_2'], 'matched')
                 
@@ -359,6 +327,9 @@ class ScrimApprovalView(View):
         try:
             # Update match status to declined (request cancelled)
             await db.update_scrim_match_status(self.match_id, 'declined')
+            scrim_cog = interaction.client.get_cog('Scrim')
+            if scrim_cog:
+                scrim_cog.unroute_match_dms(self.match_id)
             
             # Get match details
             match = await db.get_scrim_match_by_id(self.match_id)
@@ -978,7 +949,7 @@ class ScrimCancelReasonModal(discord.ui.Modal, title="Cancel Scrim"):
                 
                 await other_captain.send(embed=embed, view=view)
             except Exception as e:
-                print(f"Error sending cancel request to other captain: {e}")
+                logger.error("Error sending cancel request to other captain: %s", e)
             
             await interaction.followup.send(
                 "✅ Your cancellation reason has been submitted. Waiting for the other captain to respond...",
@@ -1067,6 +1038,32 @@ class Scrim(commands.Cog):
         self.lfs_channel_id = int(os.getenv('LFS_CHANNEL_ID', 0)) if os.getenv('LFS_CHANNEL_ID') else None
         self._instructions_sent = False  # Flag to send message only once
     
+    async def cog_load(self):
+        # LFS posts by channel id, or by name when LFS_CHANNEL_ID is not set
+        if self.lfs_channel_id:
+            router.add_channel(self.lfs_channel_id, self.handle_lfs_message)
+        router.add_channel_name(self.lfs_channel_name, self.handle_lfs_message)
+        
+        # Captains already chatting before a restart keep their relay
+        try:
+            for match in await db.get_chat_active_scrim_matches():
+                self.route_match_dms(match)
+        except Exception as e:
+            logger.warning("⚠️ Could not restore scrim chat routes: %s", e)
+    
+    def cog_unload(self):
+        router.remove(self.handle_lfs_message)
+        router.remove(self.handle_captain_dm)
+    
+    def route_match_dms(self, match: dict):
+        """Send both captains' DMs to handle_captain_dm (chat relay, screenshots)"""
+        key = f"scrim_match:{match['id']}"
+        router.watch_dm(match['captain_1_discord_id'], key, self.handle_captain_dm)
+        router.watch_dm(match['captain_2_discord_id'], key, self.handle_captain_dm)
+    
+    def unroute_match_dms(self, match_id: int):
+        router.unwatch_dm(f"scrim_match:{match_id}")
+    
     @commands.Cog.listener()
     async def on_ready(self):
         """Send instructions message when bot starts"""
@@ -1075,22 +1072,17 @@ class Scrim(commands.Cog):
             return
         
         if not self.lfs_channel_id:
-            print("⚠️  LFS_CHANNEL_ID not set in .env file. Skipping LFS instructions message.")
-            print("💡 Tip: Add LFS_CHANNEL_ID to your .env file to enable auto-instructions.")
+            logger.warning("⚠️  LFS_CHANNEL_ID not set in .env file. Skipping LFS instructions message.")
+            logger.warning("💡 Tip: Add LFS_CHANNEL_ID to your .env file to enable auto-instructions.")
             return
         
         try:
             channel = self.bot.get_channel(self.lfs_channel_id)
             if not channel:
-                print(f"❌ LFS channel not found with ID: {self.lfs_channel_id}")
-                print(f"💡 Tip: Make sure the channel exists and the bot has access to it.")
+                logger.error("❌ LFS channel not found with ID: %s", self.lfs_channel_id)
+                logger.warning("💡 Tip: Make sure the channel exists and the bot has access to it.")
                 return
             
-            # Purge all messages in the channel first
-            print(f"🧹 Purging all messages in {channel.name}...")
-            deleted = await channel.purge(limit=100)  # Purge up to 100 messages
-            print(f"🗑️ Deleted {len(deleted)} messages from {channel.name}")
-            
             # Create a comprehensive Discord embed UI
             embed = discord.Embed(
                 title="🎮 Looking for Scrim",
@@ -1161,158 +1153,32 @@ class Scrim(commands.Cog):
             # Footer
             embed.set_footer(text="⚠️ Important: DMs must be enabled to receive match notifications!")
             
-            # Send only the embed (no text)
-            await channel.send(embed=embed)
+            # Edit the existing panel in place (or post it once); no text, no view
+            await reconcile_panel('lfs_instructions', channel, self.bot.user.id, embed)
             
             self._instructions_sent = True  # Mark as sent
-            print(f"✅ LFS instructions sent to channel: {channel.name}")
             
         except Exception as e:
-            print(f"❌ Error sending LFS instructions: {e}")
-            import traceback
-            traceback.print_exc()
-    
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message):
-        """Listen for LFS messages in the looking-for-scrim channel AND relay DMs between captains"""
-        
-        # Ignore bot messages
-        if message.author.bot:
-            return
-        
-        # Check if it's a DM
-        if isinstance(message.channel, discord.DMChannel):
-            await self.handle_captain_dm(message)
-            return
-        
-        # Check if it's in the LFS channel (by ID or name)
-        is_lfs_channel = False
-        if self.lfs_channel_id and message.channel.id == self.lfs_channel_id:
-            is_lfs_channel = True
-        elif message.channel.name == self.lfs_channel_name:
-            is_lfs_channel = True
-        
-        if not is_lfs_channel:
-            return
-        
-        # Parse the message format
-        # Supported formats:
-        # Format 1 (2-line):
-        #   LFS BO1/BO3/BO5
-        #   TIME, REGION (e.g., 7PM IST, APAC)
-        # Format 2 (1-line):
-        #   LFS FORMAT TIME REGION (e.g., LFS BO3 7PM IST APAC)
-        
-        content = message.content.strip()
-        lines = content.split('\n')
-        
-        # Try to parse single-line format first: LFS FORMAT TIME REGION
-        if len(lines) == 1:
-            first_line = lines[0].strip().upper()
-            # Match pattern: LFS BO1/BO3/BO5 TIME REGION
-            single_line_match = re.search(r'LFS\s+(BO[135])\s+(.+?)\s+(APAC|EMEA|AMERICAS|INDIA)$', first_line)
-            
-            if single_line_match:
-                match_type = single_line_match.group(1).lower()
-                time_part = single_line_match.group(2).strip()
-                region_input = single_line_match.group(3).strip().upper()
-            else:
-                # Invalid single-line format
-                error_msg = await message.channel.send(
-                    f"❌ {message.author.mention} Invalid format! Please use either:\n"
-                    "**Format 1 (2 lines):**\n"
-                    "```\nLFS BO1/BO3/BO5\n"
-                    "TIME, REGION\n```"
-                    "**Format 2 (1 line):**\n"
-                    "```LFS FORMAT TIME REGION```\n"
-                    "Examples: `LFS BO3 7PM IST APAC` or `LFS BO5 9PM CET EMEA`"
-                )
-                await message.delete()
-                await error_msg.delete(delay=15)
-                return
-        
-        # Try to parse 2-line format
-        elif len(lines) >= 2:
-            # Parse first line: LFS BO1/BO3/BO5
-            first_line = lines[0].strip().upper()
-            match_type_match = re.search(r'LFS\s+(BO[135])', first_line)
-            
-            if not match_type_match:
-                error_msg = await message.channel.send(
-                    f"❌ {message.author.mention} Invalid format! First line should be: `LFS BO1`, `LFS BO3`, or `LFS BO5`"
-                )
-                await message.delete()
-                await error_msg.delete(delay=10)
-                return
-            
-            match_type = match_type_match.group(1).lower()
-            
-            # Parse second line: TIME, REGION
-            second_line = lines[1].strip()
-            parts = [p.strip() for p in second_line.split(',')]
-            
-            if len(parts) < 2:
-                error_msg = await message.channel.send(
-                    f"❌ {message.author.mention} Invalid format! Second line should be: `TIME, REGION`\n"
-                    "Example: `7PM IST, APAC`"
-                )
-                await message.delete()
-                await error_msg.delete(delay=10)
-                return
-            
-            time_part = parts[0].strip()
-            region_input = parts[1].strip().upper()
-        
-        else:
-            # No lines or invalid
-            error_msg = await message.channel.send(
-                f"❌ {message.author.mention} Invalid format! Please use either:\n"
-                "**Format 1 (2 lines):**\n"
-                "```\nLFS BO1/BO3/BO5\n"
-                "TIME, REGION\n```"
-                "**Format 2 (1 line):**\n"
-                "```LFS FORMAT TIME REGION```"
-            )
-            await message.delete()
-            await error_msg.delete(delay=10)
-            return
-        
-        # Validate region
-        valid_regions = ['APAC', 'EMEA', 'AMERICAS', 'INDIA']
-        if region_input not in valid_regions:
-            error_msg = await message.channel.send(
-                f"❌ {message.author.mention} Invalid region! Must be one of: {', '.join(valid_regions)}"
-            )
-            await message.delete()
-            await error_msg.delete(delay=10)
-            return
-        
-        region = region_input.lower()
-        
-        # Parse the time with timezone
-        parsed_time = parse_time_with_timezone(time_part)
-        if not parsed_time:
-            supported_tz = ', '.join(sorted(TIMEZONE_MAP.keys()))
-            error_msg = await message.channel.send(
-                f"❌ {message.author.mention} Invalid time format! Please use format like:\n"
-                f"`7PM IST, APAC` or `9:30PM CET, EMEA`\n\n"
-                f"**Supported timezones:** {supported_tz}"
-            )
+            logger.exception("❌ Error sending LFS instructions: %s", e)
+    
+    @tracing.traced('scrim.lfs_post')
+    async def handle_lfs_message(self, message: discord.Message):
+        """Parse an LFS post, store the scrim request and broadcast it"""
+        # Formats (see services/lfs_parser.py):
+        #   LFS BO1/BO3/BO5 + newline + TIME, REGION   (e.g. 7PM IST, APAC)
+        #   LFS FORMAT TIME REGION                     (e.g. LFS BO3 7PM IST APAC)
+        post, error = parse_lfs(message.content)
+        if error:
+            text, delay = LFS_ERRORS.get(error, LFS_FORMAT_HELP)
+            error_msg = await message.channel.send(f"❌ {message.author.mention} {text}")
             await message.delete()
-            await error_msg.delete(delay=20)
+            await error_msg.delete(delay=delay)
             return
         
-        hour, minute, timezone = parsed_time
-        
-        # Convert to datetime object with timezone
-        # Use today's date + the parsed time in the specified timezone
-        tz = ZoneInfo(TIMEZONE_MAP[timezone])
-        now = datetime.now(tz)
-        time_slot = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-        
-        # If the time has already passed today, set it for tomorrow
-        if time_slot < now:
-            time_slot = time_slot + timedelta(days=1)
+        match_type = post.match_type
+        region = post.region
+        timezone = post.timezone
+        time_slot = lfs_parser.next_time_slot(post)
         
         # Delete the user's message immediately (valid format)
         await message.delete()
@@ -1322,10 +1188,7 @@ class Scrim(commands.Cog):
             captain_id = message.author.id
             
             # Check if user is part of ANY team (captain or member)
-            team = await db.get_team_by_captain(captain_id)
-            if not team:
-                # Check if they're a member of a team
-                team = await db.get_player_team(captain_id)
+            team = await db.get_player_team_summary(captain_id)
             
             if not team:
                 error_msg = await message.channel.send(
@@ -1372,6 +1235,7 @@ class Scrim(commands.Cog):
                 timezone=timezone,
                 expires_at=expires_at
             )
+            await schedule_scrim_request_expiry(request['id'], expires_at)
             
             # Send confirmation message (will be deleted after 15 seconds)
             # Format time_slot for display
@@ -1448,9 +1312,7 @@ class Scrim(commands.Cog):
                 req_status = await db.get_scrim_request_status(req['id'])
                 
                 # Get team info
-                team = await db.get_team_by_captain(req['captain_discord_id'])
-                if not team:
-                    team = await db.get_player_team(req['captain_discord_id'])
+                team = await db.get_player_team_summary(req['captain_discord_id'])
                 team_name = f"{team['name']} [{team['tag']}]" if team else "Unknown Team"
                 
                 # Handle time_slot (now a datetime object)
@@ -1463,7 +1325,7 @@ class Scrim(commands.Cog):
                     
                     # Convert to requester's timezone if different
                     if requester_tz and req_tz != requester_tz:
-                        requester_tz_obj = ZoneInfo(TIMEZONE_MAP.get(requester_tz, 'UTC'))
+                        requester_tz_obj = zone(requester_tz)
                         converted_time = req_time.astimezone(requester_tz_obj)
                         your_time_display = converted_time.strftime("%I:%M %p %Z")
                         time_display = f"**Your Time:** {your_time_display}\n**Their Time:** {their_time_display}"
@@ -1532,9 +1394,7 @@ class Scrim(commands.Cog):
                     pass
             
         except Exception as e:
-            print(f"Error in send_all_scrim_requests: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in send_all_scrim_requests: %s", e)
     
     async def notify_other_captains(self, new_request: dict, new_captain: discord.Member):
         """Notify all OTHER pending captains about this NEW scrim request"""
@@ -1548,9 +1408,7 @@ class Scrim(commands.Cog):
                 return
             
             # Get team info for new request
-            team = await db.get_team_by_captain(new_request['captain_discord_id'])
-            if not team:
-                team = await db.get_player_team(new_request['captain_discord_id'])
+            team = await db.get_player_team_summary(new_request['captain_discord_id'])
             team_name = f"{team['name']} [{team['tag']}]" if team else "Unknown Team"
             
             new_req_tz = new_request.get('timezone', 'IST')
@@ -1579,7 +1437,7 @@ class Scrim(commands.Cog):
                         
                         # Convert to other captain's timezone if different
                         if new_req_tz != other_tz:
-                            other_tz_obj = ZoneInfo(TIMEZONE_MAP.get(other_tz, 'UTC'))
+                            other_tz_obj = zone(other_tz)
                             converted_time = new_time.astimezone(other_tz_obj)
                             your_time_display = converted_time.strftime("%I:%M %p %Z")
                             time_display = f"**Your Time:** {your_time_display}\n**Their Time:** {their_time_display}"
@@ -1633,9 +1491,7 @@ class Scrim(commands.Cog):
                     pass
         
         except Exception as e:
-            print(f"Error in notify_other_captains: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in notify_other_captains: %s", e)
     
     async def create_scrim_match_from_requests(self, request_1: dict, request_2: dict, acceptor: discord.User):
         """Create a scrim match from two requests when one captain accepts another's request"""
@@ -1658,8 +1514,8 @@ class Scrim(commands.Cog):
             )
             
             # Get team info
-            team_1 = await db.get_team_by_id(request_1['team_id'])
-            team_2 = await db.get_team_by_id(request_2['team_id'])
+            team_1 = await db.get_team_summary(request_1['team_id'])
+            team_2 = await db.get_team_summary(request_2['team_id'])
             team_1_name = f"{team_1['name']} [{team_1['tag']}]" if team_1 else "Unknown"
             team_2_name = f"{team_2['name']} [{team_2['tag']}]" if team_2 else "Unknown"
             
@@ -1710,9 +1566,7 @@ class Scrim(commands.Cog):
             await self.notify_waitlist(request_2['id'], team_2_name, team_1_name)
             
         except Exception as e:
-            print(f"Error in create_scrim_match_from_requests: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in create_scrim_match_from_requests: %s", e)
     
     async def send_format_selection(self, match: dict, captain_1: discord.User, captain_2: discord.User, format_1: str, format_2: str):
         """Send format selection buttons to both captains"""
@@ -1767,17 +1621,15 @@ class Scrim(commands.Cog):
             try:
                 await captain_1.send(embed=embed, view=view_1)
             except Exception as e:
-                print(f"Error sending format selection to captain 1: {e}")
+                logger.error("Error sending format selection to captain 1: %s", e)
             
             try:
                 await captain_2.send(embed=embed, view=view_2)
             except Exception as e:
-                print(f"Error sending format selection to captain 2: {e}")
+                logger.error("Error sending format selection to captain 2: %s", e)
             
         except Exception as e:
-            print(f"Error in send_format_selection: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in send_format_selection: %s", e)
     
     async def handle_format_selection(self, match_id: int, captain_num: int, selected_format: str, user: discord.User):
         """Handle format selection from a captain"""
@@ -1876,9 +1728,7 @@ class Scrim(commands.Cog):
                     pass
         
         except Exception as e:
-            print(f"Error in handle_format_selection: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in handle_format_selection: %s", e)
     
     async def notify_waitlist(self, request_id: int, team_1_name: str, team_2_name: str):
         """Notify captains on waitlist that a scrim is in progress"""
@@ -1896,14 +1746,14 @@ class Scrim(commands.Cog):
                 except:
                     pass
         except Exception as e:
-            print(f"Error in notify_waitlist: {e}")
+            logger.error("Error in notify_waitlist: %s", e)
     
     async def notify_waitlist_available(self, request_1: dict, request_2: dict):
         """Notify waitlisted captains that scrims are available again (match was declined)"""
         try:
             # Get team info for both requests
-            team_1 = await db.get_team_by_id(request_1['team_id'])
-            team_2 = await db.get_team_by_id(request_2['team_id'])
+            team_1 = await db.get_team_summary(request_1['team_id'])
+            team_2 = await db.get_team_summary(request_2['team_id'])
             team_1_name = f"{team_1['name']} [{team_1['tag']}]" if team_1 else "Unknown"
             team_2_name = f"{team_2['name']} [{team_2['tag']}]" if team_2 else "Unknown"
             
@@ -1941,7 +1791,7 @@ class Scrim(commands.Cog):
                     await captain.send(embed=embed, view=view)
                     
                 except Exception as e:
-                    print(f"Error notifying captain {captain_id}: {e}")
+                    logger.error("Error notifying captain %s: %s", captain_id, e)
             
             # Notify waitlist for request 2
             waitlist_2 = await db.get_scrim_waitlist(request_2['id'])
@@ -1977,12 +1827,10 @@ class Scrim(commands.Cog):
                     await captain.send(embed=embed, view=view)
                     
                 except Exception as e:
-                    print(f"Error notifying captain {captain_id}: {e}")
+                    logger.error("Error notifying captain %s: %s", captain_id, e)
                     
         except Exception as e:
-            print(f"Error in notify_waitlist_available: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in notify_waitlist_available: %s", e)
     
     async def find_and_match_scrim(self, new_request: dict, captain: discord.Member):
         """DEPRECATED: Kept for compatibility. New flow uses send_all_scrim_requests"""
@@ -2031,36 +1879,36 @@ class Scrim(commands.Cog):
             
             # Check if captain has an active chat match
             pending_matches = await db.get_captain_pending_matches(captain_id)
-            print(f"📨 DM from {message.author.display_name} (ID: {captain_id})")
-            print(f"Found {len(pending_matches)} matches for this captain")
+            logger.debug("📨 DM from %s (ID: %s)", message.author.display_name, captain_id)
+            logger.debug("Found %s matches for this captain", len(pending_matches))
             
             # Find a match with chat_active status
             active_match = None
             for match in pending_matches:
-                print(f"  Match ID {match['id']}: status = {match.get('status')}")
+                logger.debug("  Match ID %s: status = %s", match['id'], match.get('status'))
                 if match.get('status') == 'chat_active':
                     active_match = match
                     break
             
             if not active_match:
                 # No active chat, ignore the DM
-                print(f"⚠️ No active chat found for captain {captain_id}")
+                logger.warning("⚠️ No active chat found for captain %s", captain_id)
                 return
             
-            print(f"✅ Active match found: ID {active_match['id']}")
+            logger.debug("✅ Active match found: ID %s", active_match['id'])
             
             # Check for commands
             content_lower = message.content.strip().lower()
             
             # !ban-map command - Request to start map banning
             if content_lower == '!ban-map':
-                print(f"🗺️ Map banning requested by captain {captain_id}")
+                logger.debug("🗺️ Map banning requested by captain %s", captain_id)
                 await self.request_map_banning(active_match, message.author)
                 return
             
             # !cancel-scrim command - Request to cancel scrim
             if content_lower == '!cancel-scrim':
-                print(f"❌ Scrim cancellation requested by captain {captain_id}")
+                logger.debug("❌ Scrim cancellation requested by captain %s", captain_id)
                 await self.request_scrim_cancellation(active_match, message.author)
                 return
             
@@ -2069,7 +1917,7 @@ class Scrim(commands.Cog):
                                if captain_id == active_match['captain_1_discord_id'] 
                                else active_match['captain_1_discord_id'])
             
-            print(f"📤 Relaying message to captain {other_captain_id}")
+            logger.debug("📤 Relaying message to captain %s", other_captain_id)
             
             try:
                 other_captain = await self.bot.fetch_user(other_captain_id)
@@ -2077,18 +1925,16 @@ class Scrim(commands.Cog):
                 
                 # Confirm to sender
                 await message.add_reaction("✅")
-                print(f"✅ Message relayed successfully")
+                logger.debug("✅ Message relayed successfully")
             except discord.Forbidden:
                 await message.channel.send("❌ Couldn't send message to the other captain. They may have DMs disabled.")
-                print(f"❌ Forbidden: Can't DM captain {other_captain_id}")
+                logger.error("❌ Forbidden: Can't DM captain %s", other_captain_id)
             except Exception as e:
                 await message.channel.send(f"❌ Error relaying message: {str(e)}")
-                print(f"❌ Error relaying: {e}")
+                logger.error("❌ Error relaying: %s", e)
                 
         except Exception as e:
-            print(f"Error in handle_captain_dm: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in handle_captain_dm: %s", e)
     
     async def request_map_banning(self, match: dict, requester: discord.User):
         """Request to start map banning (requires confirmation from other captain)"""
@@ -2116,7 +1962,7 @@ class Scrim(commands.Cog):
             )
             
         except Exception as e:
-            print(f"Error in request_map_banning: {e}")
+            logger.error("Error in request_map_banning: %s", e)
             await requester.send(f"❌ Error requesting map banning: {str(e)}")
     
     async def request_scrim_cancellation(self, match: dict, requester: discord.User):
@@ -2145,7 +1991,7 @@ class Scrim(commands.Cog):
             )
             
         except Exception as e:
-            print(f"Error in request_scrim_cancellation: {e}")
+            logger.error("Error in request_scrim_cancellation: %s", e)
             await requester.send(f"❌ Error requesting cancellation: {str(e)}")
     
     async def cancel_scrim_match(self, match: dict, confirmer: discord.User):
@@ -2156,6 +2002,7 @@ class Scrim(commands.Cog):
             
             # Update match status to declined
             await db.update_scrim_match_status(match['id'], 'declined')
+            self.unroute_match_dms(match['id'])
             
             # Put both requests back to pending status
             await db.update_scrim_request_status(match['request_id_1'], 'pending')
@@ -2188,7 +2035,7 @@ class Scrim(commands.Cog):
                 pass
                 
         except Exception as e:
-            print(f"Error in cancel_scrim_match: {e}")
+            logger.error("Error in cancel_scrim_match: %s", e)
     
     async def start_map_banning(self, match: dict, initiator: discord.User):
         """Start the map banning phase with coin toss"""
@@ -2225,9 +2072,7 @@ class Scrim(commands.Cog):
             )
                 
         except Exception as e:
-            print(f"Error in start_map_banning: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error in start_map_banning: %s", e)
     
     async def start_banning_maps(self, match: dict, winner: discord.User, loser: discord.User):
         """Start the VCT-style map veto process"""
@@ -2256,8 +2101,8 @@ class Scrim(commands.Cog):
         self.match_data[match['id']]['available_maps'] = all_maps.copy()
         
         # Get team names for display
-        team_1 = await db.get_team_by_captain(match['captain_1_discord_id'])
-        team_2 = await db.get_team_by_captain(match['captain_2_discord_id'])
+        team_1 = await db.get_team_summary_by_captain(match['captain_1_discord_id'])
+        team_2 = await db.get_team_summary_by_captain(match['captain_2_discord_id'])
         team_a_name = f"{team_1['name']}" if team_1 else f"Team {winner.display_name}"
         team_b_name = f"{team_2['name']}" if team_2 else f"Team {loser.display_name}"
         
@@ -2365,6 +2210,7 @@ class Scrim(commands.Cog):
                 f"⏳ **{team_name}** ({acting_captain.display_name}) is picking a map..."
             )
     
+    @tracing.traced('scrim.veto_action')
     async def handle_veto_action(self, match: dict, captain: discord.User, map_name: str, action: str):
         """Handle a ban or pick action"""
         match_data = self.match_data[match['id']]
@@ -2403,6 +2249,7 @@ class Scrim(commands.Cog):
             other = captain_2 if captain == captain_1 else captain_1
             await other.send(f"✅ **{captain.display_name}** picked **{map_name}** (choosing side...)")
     
+    @tracing.traced('scrim.veto_side')
     async def handle_side_selection(self, match: dict, captain: discord.User, map_name: str, side: str):
         """Handle side selection for a picked map"""
         match_data = self.match_data[match['id']]
@@ -2448,6 +2295,7 @@ class Scrim(commands.Cog):
             f"⏳ **{toss_winner.display_name}** is choosing the starting side..."
         )
     
+    @tracing.traced('scrim.veto_decider_side')
     async def handle_decider_side_selection(self, match: dict, captain: discord.User, map_name: str, side: str):
         """Handle side selection for decider map after coin toss"""
         match_data = self.match_data[match['id']]
@@ -2595,6 +2443,7 @@ class Scrim(commands.Cog):
             f"Ban {ban_count + 1}/{total_bans}"
         )
     
+    @tracing.traced('scrim.map_ban')
     async def handle_map_ban(self, match: dict, banner: discord.User, banned_map: str, available_maps: list, ban_count: int):
         """Handle a map ban"""
         match_data = self.match_data[match['id']]
@@ -2657,6 +2506,7 @@ class Scrim(commands.Cog):
             view=view
         )
     
+    @tracing.traced('scrim.side_pick')
     async def handle_side_pick(self, match: dict, picker: discord.User, map_name: str, side: str, map_index: int, total_maps: int):
         """Handle a side pick"""
         match_data = self.match_data[match['id']]
@@ -2694,8 +2544,8 @@ class Scrim(commands.Cog):
         sides = match_data['sides']
         
         # Get team info
-        team_1 = await db.get_team_by_captain(captain_1.id)
-        team_2 = await db.get_team_by_captain(captain_2.id)
+        team_1 = await db.get_team_summary_by_captain(captain_1.id)
+        team_2 = await db.get_team_summary_by_captain(captain_2.id)
         
         team_1_name = f"{team_1['name']} [{team_1['tag']}]" if team_1 else captain_1.display_name
         team_2_name = f"{team_2['name']} [{team_2['tag']}]" if team_2 else captain_2.display_name
@@ -2746,8 +2596,9 @@ class Scrim(commands.Cog):
         
         # Update match status to in_progress (they're playing now)
         await db.update_scrim_match_status(match['id'], 'in_progress')
+        self.unroute_match_dms(match['id'])
         
-        print(f"✅ Scrim match {match['id']} setup completed, now in progress")
+        logger.info("✅ Scrim match %s setup completed, now in progress", match['id'])
         
         # Log scheduled scrim to bot logs
         logs_channel_id = os.getenv('LOGS_CHANNEL_ID')
@@ -2780,7 +2631,7 @@ class Scrim(commands.Cog):
                     
                     await logs_channel.send(embed=log_embed)
             except Exception as e:
-                print(f"Error logging scheduled scrim: {e}")
+                logger.error("Error logging scheduled scrim: %s", e)
         
         # Send completion check buttons after match details
         await self.send_completion_check(match, captain_1, captain_2)
@@ -2848,6 +2699,7 @@ class Scrim(commands.Cog):
             'captain_2': captain_2.id,
             'received': set()
         }
+        self.route_match_dms(match)
     
     async def process_scrim_cancellation(self, match_id: int, reasons: dict):
         """Process scrim cancellation with reasons from both captains"""
@@ -2859,14 +2711,15 @@ class Scrim(commands.Cog):
         captain_1 = await self.bot.fetch_user(match['captain_1_discord_id'])
         captain_2 = await self.bot.fetch_user(match['captain_2_discord_id'])
         
-        team_1 = await db.get_team_by_captain(captain_1.id)
-        team_2 = await db.get_team_by_captain(captain_2.id)
+        team_1 = await db.get_team_summary_by_captain(captain_1.id)
+        team_2 = await db.get_team_summary_by_captain(captain_2.id)
         
         team_1_name = f"{team_1['name']} [{team_1['tag']}]" if team_1 else captain_1.display_name
         team_2_name = f"{team_2['name']} [{team_2['tag']}]" if team_2 else captain_2.display_name
         
         # Update match status
         await db.update_scrim_match_status(match_id, 'cancelled')
+        self.unroute_match_dms(match_id)
         
         # Add both teams to avoid list for 6 hours
         try:
@@ -2881,7 +2734,7 @@ class Scrim(commands.Cog):
                 hours=6
             )
         except Exception as e:
-            print(f"Error adding to avoid list: {e}")
+            logger.error("Error adding to avoid list: %s", e)
         
         # Send cancellation confirmation to both captains
         cancel_embed = discord.Embed(
@@ -2980,160 +2833,119 @@ class Scrim(commands.Cog):
         if hasattr(self, 'scrim_cancel_reasons') and match_key in self.scrim_cancel_reasons:
             del self.scrim_cancel_reasons[match_key]
         
-        print(f"❌ Scrim match {match_id} cancelled by both captains")
+        logger.info("❌ Scrim match %s cancelled by both captains", match_id)
     
-    async def validate_scrim_screenshots(self, match_id: int, screenshot_1, screenshot_2):
-        """Validate screenshots and extract scores using Gemini OCR"""
-        import aiohttp
-        import base64
-        from io import BytesIO
-        from PIL import Image
+    async def _extract_scrim_score(self, screenshot, notify=None):
+        """Download, decode and read one scoreboard screenshot; returns the scrim_score result or None"""
+        from services.image_ingest import ingest_bytes
+        from services import score_reader
         
         try:
-            gemini_api_key = os.getenv('GEMINI_API_KEY')
-            if not gemini_api_key:
-                return {'valid': False, 'error': 'Gemini API key not configured'}
-            
-            # Download and process first screenshot
-            async with aiohttp.ClientSession() as session:
-                async with session.get(screenshot_1.url) as response:
-                    if response.status != 200:
-                        return {'valid': False, 'error': 'Failed to download screenshot'}
-                    
-                    image_data = await response.read()
-                    image = Image.open(BytesIO(image_data))
-                    
-                    # Resize if too large
-                    max_size = 1600
-                    if max(image.size) > max_size:
-                        ratio = max_size / max(image.size)
-                        new_size = tuple(int(dim * ratio) for dim in image.size)
-                        image = image.resize(new_size, Image.LANCZOS)
-                    
-                    # Convert to base64
-                    buffered = BytesIO()
-                    image.save(buffered, format="PNG")
-                    img_str = base64.b64encode(buffered.getvalue()).decode()
-                    
-                    # Gemini prompt for scoreboard extraction
-                    prompt = """You are analyzing a VALORANT Mobile end-game scoreboard screenshot.
-
-Your task: Extract the final match score and map name.
-
-Look for:
-- The large score numbers at the top (e.g., "10 获胜 3" or "13 : 11")
-- The first number is the WINNING team's score
-- The second number is the LOSING team's score  
-- Map name (e.g., Haven, Ascent, Bind, etc.)
-
-In the image, look for:
-- Large colored numbers at the top center showing the score
-- The winning team's score is usually on the LEFT and larger/highlighted
-- The losing team's score is on the RIGHT
-
-Return ONLY valid JSON (no markdown, no code blocks):
-{"winner_score": winning_team_number, "loser_score": losing_team_number, "map": "map_name"}
-
-Example: If you see "10 获胜 3" or "10 : 3", return: {"winner_score": 10, "loser_score": 3, "map": "Haven"}
-Example: If you see "13 获胜 11", return: {"winner_score": 13, "loser_score": 11, "map": "Bind"}
-
-CRITICAL: Return ONLY the JSON object, nothing else."""
-                    
-                    # Try Gemini API
-                    models = [
-                        ("v1", "gemini-2.0-flash-exp"),
-                        ("v1beta", "gemini-2.0-flash-exp"),
-                        ("v1", "gemini-1.5-flash"),
-                    ]
-                    
-                    for version, model in models:
-                        try:
-                            url = f"https://generativelanguage.googleapis.com/{version}/models/{model}:generateContent"
-                            
-                            payload = {
-                                "contents": [{
-                                    "parts": [
-                                        {"text": prompt},
-                                        {
-                                            "inline_data": {
-                                                "mime_type": "image/png",
-                                                "data": img_str
-                                            }
-                                        }
-                                    ]
-                                }]
-                            }
-                            
-                            async with session.post(
-                                url,
-                                params={"key": gemini_api_key},
-                                json=payload,
-                                headers={"Content-Type": "application/json"}
-                            ) as resp:
-                                if resp.status != 200:
-                                    error_text = await resp.text()
-                                    print(f"❌ Gemini API error ({model}): {resp.status} - {error_text}")
-                                    continue
-                                
-                                data = await resp.json()
-                                text_response = data['candidates'][0]['content']['parts'][0]['text']
-                                print(f"🔍 Gemini scoreboard response: {text_response}")
-                                
-                                # Parse JSON response
-                                import re
-                                import json
-                                
-                                # Try to find JSON in the response
-                                json_match = re.search(r'\{[^{}]*"winner_score"[^{}]*"loser_score"[^{}]*\}', text_response, re.DOTALL)
-                                if not json_match:
-                                    json_match = re.search(r'\{.*?\}', text_response, re.DOTALL)
-                                
-                                if json_match:
-                                    try:
-                                        result = json.loads(json_match.group())
-                                        winner_score = result.get('winner_score')
-                                        loser_score = result.get('loser_score')
-                                        map_name = result.get('map', 'Unknown')
-                                        
-                                        print(f"📊 Extracted - Winner: {winner_score}, Loser: {loser_score}, Map: {map_name}")
-                                        
-                                        # Validate scores are numeric and reasonable
-                                        if winner_score and loser_score:
-                                            try:
-                                                w_score = int(winner_score)
-                                                l_score = int(loser_score)
-                                                
-                                                # Valorant matches: winner must have 10+ (unrated) or 13+ (competitive)
-                                                # Loser must be less than winner
-                                                if w_score > l_score and w_score >= 10 and l_score >= 0:
-                                                    print(f"✅ Valid scores detected: {w_score}-{l_score}")
-                                                    return {
-                                                        'valid': True,
-                                                        'team_1_score': w_score,
-                                                        'team_2_score': l_score,
-                                                        'map': map_name
-                                                    }
-                                                else:
-                                                    print(f"⚠️ Invalid score range: {w_score}-{l_score}")
-                                                    continue
-                                            except ValueError:
-                                                print(f"⚠️ Scores not numeric: {winner_score}, {loser_score}")
-                                                continue
-                                    except json.JSONDecodeError as e:
-                                        print(f"⚠️ JSON parse error: {e}")
-                                        continue
-                        except Exception as e:
-                            print(f"❌ OCR error with {model}: {e}")
-                            continue
-                    
-                    return {'valid': False, 'error': 'Could not extract valid scores from screenshot'}
+            image_data = await screenshot.read()
+        except discord.HTTPException as e:
+            logger.warning("⚠️ Failed to download screenshot %s: %s", getattr(screenshot, 'filename', ''), e)
+            return None
+        try:
+            image = await ingest_bytes(image_data)
+        except Exception as e:
+            # A corrupt screenshot must not fail the other captain's reading
+            logger.warning("⚠️ Could not decode screenshot %s: %s", getattr(screenshot, 'filename', ''), e)
+            return None
+        
+        # Local digit reader first; Gemini only when it is unsure or the score is implausible
+        try:
+            local = await asyncio.to_thread(score_reader.score_reader.read, image.array)
+        except Exception as e:
+            logger.warning("⚠️ Local score read failed: %s", e)
+            local = None
+        if local and local.confidence >= score_reader.MIN_CONFIDENCE:
+            if local.left == local.right:
+                # Scrims cannot end in a draw: a misread, let the remote model look
+                logger.warning("⚠️ Local score read a tie (%s-%s), falling back", local.left, local.right)
+            else:
+                # Each captain's own team is on the left, so the loser's screenshot reads e.g. 5-10
+                result = TASKS['scrim_score'].validate({
+                    'winner_score': max(local.left, local.right),
+                    'loser_score': min(local.left, local.right),
+                    'map': local.map_name
+                })
+                if result:
+                    logger.info("🔢 Score read locally: %s-%s (%s, margin %.2f)",
+                                local.left, local.right, result['map'], local.confidence)
+                    return result
+        
+        if not vision.api_key:
+            return None
+        
+        notice = limiter.backpressure_notice(GEMINI, 'scrim_score')
+        if notice and notify:
+            await notify(notice)
+        
+        # Score + map banner crop at the tuned size/format (see services/payload.py), off the event loop
+        try:
+            payload = await asyncio.to_thread(payloads.encode, image, 'scrim_score')
+            with payloads.measure('scrim_score', payload.size):
+                return await vision.extract('scrim_score', payload.b64, payload.mime_type, hedge=True)
+        except Exception as e:
+            logger.warning("⚠️ Remote score read failed: %s", e)
+            return None
+    
+    @staticmethod
+    def reconcile_scrim_scores(result_1, result_2):
+        """
+        Compare the scores read from both captains' screenshots
+        
+        Both readings must agree on the score (and on the map when both maps were
+        read); if only one screenshot could be read, that reading is used and the
+        captains still confirm it by hand.
+        """
+        readings = [r for r in (result_1, result_2) if r]
+        if not readings:
+            return {'valid': False, 'error': 'Could not extract valid scores from screenshots'}
+        
+        if len(readings) == 2:
+            score_1 = (result_1['winner_score'], result_1['loser_score'])
+            score_2 = (result_2['winner_score'], result_2['loser_score'])
+            if score_1 != score_2:
+                return {'valid': False, 'error': f"Screenshots disagree on the score ({score_1[0]}-{score_1[1]} vs {score_2[0]}-{score_2[1]})"}
+            
+            maps = {r['map'].strip().lower() for r in readings if r['map'] and r['map'] != 'Unknown'}
+            if len(maps) > 1:
+                return {'valid': False, 'error': f"Screenshots disagree on the map ({result_1['map']} vs {result_2['map']})"}
+        
+        result = readings[0]
+        known_map = next((r['map'] for r in readings if r['map'] and r['map'] != 'Unknown'), result['map'])
+        return {
+            'valid': True,
+            'team_1_score': result['winner_score'],
+            'team_2_score': result['loser_score'],
+            'map': known_map,
+            'cross_checked': len(readings) == 2
+        }
+    
+    @tracing.traced('scrim.validate_screenshots')
+    async def validate_scrim_screenshots(self, match_id: int, screenshot_1, screenshot_2, notify=None):
+        """Extract scores from both screenshots concurrently, then cross-check them"""
+        try:
+            result_1, result_2 = await asyncio.gather(
+                self._extract_scrim_score(screenshot_1, notify),
+                self._extract_scrim_score(screenshot_2, notify)
+            )
+            
+            result = self.reconcile_scrim_scores(result_1, result_2)
+            if result['valid']:
+                logger.info("✅ Valid scores detected for match %s: %s-%s (%s)", match_id,
+                            result['team_1_score'], result['team_2_score'],
+                            "both screenshots agree" if result['cross_checked'] else "one screenshot readable")
+            else:
+                logger.warning("⚠️ Match %s screenshots rejected: %s", match_id, result['error'])
+            return result
                     
         except Exception as e:
-            print(f"❌ Screenshot validation error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("❌ Screenshot validation error: %s", e)
             return {'valid': False, 'error': str(e)}
     
+    @tracing.traced('scrim.process_screenshots')
     async def process_screenshots(self, match_id: int):
         """Process both screenshots after they're received"""
         try:
@@ -3141,8 +2953,10 @@ CRITICAL: Return ONLY the JSON object, nothing else."""
             if not match:
                 return
             
-            captain_1 = await self.bot.fetch_user(match['captain_1_discord_id'])
-            captain_2 = await self.bot.fetch_user(match['captain_2_discord_id'])
+            captain_1, captain_2 = await asyncio.gather(
+                self.bot.fetch_user(match['captain_1_discord_id']),
+                self.bot.fetch_user(match['captain_2_discord_id'])
+            )
             
             match_key = f"match_{match_id}"
             screenshots = self.scrim_screenshots.get(match_key, {})
@@ -3154,22 +2968,33 @@ CRITICAL: Return ONLY the JSON object, nothing else."""
             screenshot_1 = screenshots[captain_1.id]
             screenshot_2 = screenshots[captain_2.id]
             
-            # Notify both captains we're processing
-            await captain_1.send("⏳ Processing screenshots...")
-            await captain_2.send("⏳ Processing screenshots...")
+            # Both extractions may hit a deep vision queue; tell the captains once
+            notified = False
+            
+            async def notify_captains(text):
+                nonlocal notified
+                if not notified:
+                    notified = True
+                    await asyncio.gather(captain_1.send(text), captain_2.send(text))
             
-            # Validate and extract scores
-            result = await self.validate_scrim_screenshots(match_id, screenshot_1, screenshot_2)
+            # Notify both captains and start extraction at the same time
+            result, *_ = await asyncio.gather(
+                self.validate_scrim_screenshots(match_id, screenshot_1, screenshot_2, notify_captains),
+                captain_1.send("⏳ Processing screenshots..."),
+                captain_2.send("⏳ Processing screenshots...")
+            )
             
             if not result['valid']:
                 # Screenshots don't match or couldn't be validated
-                await captain_1.send("❌ Screenshots couldn't be validated. Please contact an admin.")
-                await captain_2.send("❌ Screenshots couldn't be validated. Please contact an admin.")
+                message = f"❌ Screenshots couldn't be validated: {result['error']}. Please contact an admin."
+                await asyncio.gather(captain_1.send(message), captain_2.send(message))
                 return
             
             # Scores extracted, ask for confirmation
-            team_1 = await db.get_team_by_captain(captain_1.id)
-            team_2 = await db.get_team_by_captain(captain_2.id)
+            team_1, team_2 = await asyncio.gather(
+                db.get_team_summary_by_captain(captain_1.id),
+                db.get_team_summary_by_captain(captain_2.id)
+            )
             
             team_1_name = f"{team_1['name']} [{team_1['tag']}]" if team_1 else captain_1.display_name
             team_2_name = f"{team_2['name']} [{team_2['tag']}]" if team_2 else captain_2.display_name
@@ -3191,19 +3016,18 @@ CRITICAL: Return ONLY the JSON object, nothing else."""
             
             # Send confirmation buttons to both captains
             view1 = ScoreConfirmationView(match_id, captain_1.id, result['team_1_score'], result['team_2_score'], self)
-            await captain_1.send(embed=score_embed, view=view1)
-            
             view2 = ScoreConfirmationView(match_id, captain_2.id, result['team_1_score'], result['team_2_score'], self)
-            await captain_2.send(embed=score_embed, view=view2)
+            await asyncio.gather(
+                captain_1.send(embed=score_embed, view=view1),
+                captain_2.send(embed=score_embed, view=view2)
+            )
             
             # Clean up screenshot tracking
             if match_id in self.awaiting_screenshots:
                 del self.awaiting_screenshots[match_id]
             
         except Exception as e:
-            print(f"Error processing screenshots for match {match_id}: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Error processing screenshots for match %s: %s", match_id, e)
     
     async def save_scrim_results(self, match_id: int, team_1_score: int, team_2_score: int):
         """Save scrim results to database"""
@@ -3213,6 +3037,7 @@ CRITICAL: Return ONLY the JSON object, nothing else."""
         
         # Update match status to completed with scores
         await db.update_scrim_match_status(match_id, 'completed')
+        self.unroute_match_dms(match_id)
         
         # TODO: Add function to store scores in database
         # This would require a new table or columns in scrim_matches
@@ -3231,8 +3056,8 @@ CRITICAL: Return ONLY the JSON object, nothing else."""
             try:
                 logs_channel = self.bot.get_channel(int(logs_channel_id))
                 if logs_channel:
-                    team_1 = await db.get_team_by_captain(captain_1.id)
-                    team_2 = await db.get_team_by_captain(captain_2.id)
+                    team_1 = await db.get_team_summary_by_captain(captain_1.id)
+                    team_2 = await db.get_team_summary_by_captain(captain_2.id)
                     
                     team_1_name = f"{team_1['name']} [{team_1['tag']}]" if team_1 else captain_1.display_name
                     team_2_name = f"{team_2['name']} [{team_2['tag']}]" if team_2 else captain_2.display_name
@@ -3283,16 +3108,16 @@ CRITICAL: Return ONLY the JSON object, nothing else."""
                                     files=screenshot_files
                                 )
                         except Exception as e:
-                            print(f"Error uploading screenshots: {e}")
+                            logger.error("Error uploading screenshots: %s", e)
             except Exception as e:
-                print(f"Error logging scrim completion: {e}")
+                logger.error("Error logging scrim completion: %s", e)
         
         # Clean up tracking
         match_key = f"match_{match_id}"
         if hasattr(self, 'score_confirmations') and match_key in self.score_confirmations:
             del self.score_confirmations[match_key]
         
-        print(f"✅ Scrim match {match_id} results saved: {team_1_score}-{team_2_score}")
+        logger.info("✅ Scrim match %s results saved: %s-%s", match_id, team_1_score, team_2_score)
     
     async def handle_score_dispute(self, match_id: int, disputer: discord.User):
         """Handle when a captain disputes the detected scores"""
@@ -3316,7 +3141,7 @@ CRITICAL: Return ONLY the JSON object, nothing else."""
             except:
                 pass
         
-        print(f"⚠️ Score dispute for match {match_id} by {disputer.display_name}")
+        logger.warning("⚠️ Score dispute for match %s by %s", match_id, disputer.display_name)
     
     @app_commands.command(name="cancel-scrim", description="Cancel your pending scrim request or match")
     async def cancel_scrim(self, interaction: discord.Interaction):
@@ -3356,6 +3181,7 @@ CRITICAL: Return ONLY the JSON object, nothing else."""
             # Cancel all pending matches
             for match in pending_matches:
                 await db.update_scrim_match_status(match['id'], 'declined')
+                self.unroute_match_dms(match['id'])
                 cancelled_count += 1
             
             await interaction.followup.send(
@@ -5,29 +5,10 @@ import json
 import asyncio
 from pathlib import Path
 from services import db
-
-# Helper to get config values
-_CONFIG_JSON = None
-def _load_config_json():
-    global _CONFIG_JSON
-    if _CONFIG_JSON is not None:
-        return _CONFIG_JSON
-    try:
-        path = Path(__file__).parent.parent / 'config.json'
-        if path.exists():
-            with open(path, 'r', encoding='utf-8') as f:
-                _CONFIG_JSON = json.load(f)
-                return _CONFIG_JSON
-    except Exception:
-        _CONFIG_JSON = {}
-    _CONFIG_JSON = {}
-    return _CONFIG_JSON
-
-def cfg(key, default=None):
-    val = os.environ.get(key)
-    if val is not None:
-        return val
-    return _load_config_json().get(key, default)
+from services.config import cfg
+from services.panels import reconcile_panel
+from services.team_search import team_search
+from services.scheduler import schedule_ghost_pings, schedule_thread_deletion
 
 class TeamHelpdeskView(discord.ui.View):
     def __init__(self):
@@ -44,12 +25,7 @@ class TeamHelpdeskView(discord.ui.View):
         # Check if user already has a team as captain
         try:
             # Check if user is a team captain
-            teams = await db.get_all_teams()
-            user_team = None
-            for team in teams:
-                if team.get('captain_id') == interaction.user.id:
-                    user_team = team
-                    break
+            user_team = await team_search.get_by_captain(interaction.user.id)
             
             if user_team:
                 await interaction.followup.send(
@@ -176,43 +152,11 @@ class TeamHelpdeskView(discord.ui.View):
             return
         
         # Start ghost ping reminder task (every 10 minutes)
-        asyncio.create_task(self.ghost_ping_task(thread, role_mentions, interaction.user))
+        await schedule_ghost_pings(thread, role_mentions)
         
         # Schedule thread deletion after 12 hours
-        asyncio.create_task(self.delete_thread_after_delay(thread, 12))
-    
-    async def ghost_ping_task(self, thread, role_mentions, user):
-        """Ghost ping staff every 10 minutes"""
-        if not role_mentions:
-            return
-        
-        # Wait 10 minutes before first ghost ping
-        await asyncio.sleep(600)
-        
-        # Keep pinging for up to 12 hours
-        for _ in range(72):  # 72 * 10 minutes = 12 hours
-            try:
-                # Check if thread still exists
-                if thread.archived or not thread:
-                    break
-                
-                # Send and delete ghost ping
-                ping_msg = await thread.send(" ".join(role_mentions))
-                await ping_msg.delete()
-                
-                # Wait 10 minutes
-                await asyncio.sleep(600)
-            except:
-                break
+        await schedule_thread_deletion(thread, 12)
     
-    async def delete_thread_after_delay(self, thread, hours):
-        """Delete thread after specified hours"""
-        await asyncio.sleep(hours * 3600)
-        try:
-            await thread.delete()
-        except:
-            pass
-
 class TeamStaffActionView(discord.ui.View):
     def __init__(self, user_id, thread, staff_members, role_mentions):
         super().__init__(timeout=43200)  # 12 hours
@@ -372,23 +316,21 @@ class TeamStaffActionView(discord.ui.View):
             
             # Check if team name or tag already exists
             try:
-                existing_teams = await db.get_all_teams()
-                for team in existing_teams:
-                    if team['name'].lower() == team_data['name'].lower():
-                        await self.thread.send(f"❌ A team with the name '{team_data['name']}' already exists!")
-                        self.processing = False
-                        for item in self.children:
-                            item.disabled = False
-                        await interaction.message.edit(view=self)
-                        return
-                    
-                    if team.get('tag', '').lower() == team_data['tag'].lower():
-                        await self.thread.send(f"❌ A team with the tag '{team_data['tag']}' already exists!")
-                        self.processing = False
-                        for item in self.children:
-                            item.disabled = False
-                        await interaction.message.edit(view=self)
-                        return
+                if await team_search.get_by_name(team_data['name']):
+                    await self.thread.send(f"❌ A team with the name '{team_data['name']}' already exists!")
+                    self.processing = False
+                    for item in self.children:
+                        item.disabled = False
+                    await interaction.message.edit(view=self)
+                    return
+                
+                if await team_search.get_by_tag(team_data['tag']):
+                    await self.thread.send(f"❌ A team with the tag '{team_data['tag']}' already exists!")
+                    self.processing = False
+                    for item in self.children:
+                        item.disabled = False
+                    await interaction.message.edit(view=self)
+                    return
             except Exception as e:
                 print(f"Error checking existing teams: {e}")
             
@@ -509,20 +451,7 @@ class TeamRegistrationHelpdesk(commands.Cog):
             print(f"❌ Could not find team helpdesk channel: {self.team_helpdesk_channel_id}")
             return
         
-        print(f"🧹 Purging all messages in {channel.name}...")
-        
-        # Purge all messages
-        deleted_count = 0
-        async for message in channel.history(limit=100):
-            try:
-                await message.delete()
-                deleted_count += 1
-            except:
-                pass
-        
-        print(f"🗑️ Deleted {deleted_count} messages from {channel.name}")
-        
-        # Post new helpdesk UI
+        # Helpdesk UI
         embed = discord.Embed(
             title="Team Registration Help",
             description="Need help registering a team? Click the button below and a staff member will assist you.",
@@ -539,9 +468,11 @@ class TeamRegistrationHelpdesk(commands.Cog):
             inline=False
         )
         
-        view = TeamHelpdeskView()
-        await channel.send(embed=embed, view=view)
-        print(f"✅ Team Helpdesk UI posted in {channel.name}")
+        # Edit the existing panel in place (or post it once); the view is registered in setup()
+        try:
+            await reconcile_panel('team_helpdesk', channel, self.bot.user.id, embed, TeamHelpdeskView())
+        except Exception as e:
+            print(f"❌ Error posting team helpdesk UI: {e}")
 
 async def setup(bot):
     # Register persistent view
@@ -5,29 +5,9 @@ import json
 import asyncio
 from pathlib import Path
 from services import db
-
-# Helper to get config values
-_CONFIG_JSON = None
-def _load_config_json():
-    global _CONFIG_JSON
-    if _CONFIG_JSON is not None:
-        return _CONFIG_JSON
-    try:
-        path = Path(__file__).parent.parent / 'config.json'
-        if path.exists():
-            with open(path, 'r', encoding='utf-8') as f:
-                _CONFIG_JSON = json.load(f)
-                return _CONFIG_JSON
-    except Exception:
-        _CONFIG_JSON = {}
-    _CONFIG_JSON = {}
-    return _CONFIG_JSON
-
-def cfg(key, default=None):
-    val = os.environ.get(key)
-    if val is not None:
-        return val
-    return _load_config_json().get(key, default)
+from services.config import cfg
+from services.panels import reconcile_panel
+from services.team_search import team_search
 
 async def wait_for_message_with_timeout(bot, check, thread, user, timeout_duration=300):
     """
@@ -116,12 +96,7 @@ class TeamRegistrationView(discord.ui.View):
         
         # Check if user already has a team as captain
         try:
-            teams = await db.get_all_teams()
-            user_team = None
-            for team in teams:
-                if team.get('captain_id') == interaction.user.id:
-                    user_team = team
-                    break
+            user_team = await team_search.get_by_captain(interaction.user.id)
             
             if user_team:
                 await interaction.followup.send(
@@ -292,19 +267,17 @@ class TeamRegistrationView(discord.ui.View):
             
             # Check if team name or tag already exists
             try:
-                existing_teams = await db.get_all_teams()
-                for team in existing_teams:
-                    if team['name'].lower() == team_data['name'].lower():
-                        await thread.send(f"A team with the name '{team_data['name']}' already exists!\nPlease choose a different name.")
-                        await asyncio.sleep(10)
-                        await thread.delete()
-                        return
-                    
-                    if team.get('tag', '').lower() == team_data['tag'].lower():
-                        await thread.send(f"A team with the tag '{team_data['tag']}' already exists!\nPlease choose a different tag.")
-                        await asyncio.sleep(10)
-                        await thread.delete()
-                        return
+                if await team_search.get_by_name(team_data['name']):
+                    await thread.send(f"A team with the name '{team_data['name']}' already exists!\nPlease choose a different name.")
+                    await asyncio.sleep(10)
+                    await thread.delete()
+                    return
+                
+                if await team_search.get_by_tag(team_data['tag']):
+                    await thread.send(f"A team with the tag '{team_data['tag']}' already exists!\nPlease choose a different tag.")
+                    await asyncio.sleep(10)
+                    await thread.delete()
+                    return
             except Exception as e:
                 print(f"Error checking existing teams: {e}")
             
@@ -412,20 +385,7 @@ class TeamRegistrationUI(commands.Cog):
             print(f"❌ Could not find team registration channel: {self.team_reg_channel_id}")
             return
         
-        print(f"🧹 Purging all messages in {channel.name}...")
-        
-        # Purge all messages
-        deleted_count = 0
-        async for message in channel.history(limit=100):
-            try:
-                await message.delete()
-                deleted_count += 1
-            except:
-                pass
-        
-        print(f"🗑️ Deleted {deleted_count} messages from {channel.name}")
-        
-        # Post new team registration UI
+        # Team registration UI
         embed = discord.Embed(
             title="Team Registration",
             description="Register your team for the Valorant Mobile tournament.",
@@ -442,9 +402,11 @@ class TeamRegistrationUI(commands.Cog):
             inline=False
         )
         
-        view = TeamRegistrationView()
-        await channel.send(embed=embed, view=view)
-        print(f"✅ Team Registration UI posted in {channel.name}")
+        # Edit the existing panel in place (or post it once); the view is registered in setup()
+        try:
+            await reconcile_panel('team_registration', channel, self.bot.user.id, embed, TeamRegistrationView())
+        except Exception as e:
+            print(f"❌ Error posting team registration UI: {e}")
 
 async def setup(bot):
     # Register persistent view
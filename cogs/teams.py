@@ -5,29 +5,8 @@ import os
 import json
 from pathlib import Path
 from services import db
-
-# Helper to get config values
-_CONFIG_JSON = None
-def _load_config_json():
-    global _CONFIG_JSON
-    if _CONFIG_JSON is not None:
-        return _CONFIG_JSON
-    try:
-        path = Path(__file__).parent.parent / 'config.json'
-        if path.exists():
-            with open(path, 'r', encoding='utf-8') as f:
-                _CONFIG_JSON = json.load(f)
-                return _CONFIG_JSON
-    except Exception:
-        _CONFIG_JSON = {}
-    _CONFIG_JSON = {}
-    return _CONFIG_JSON
-
-def cfg(key, default=None):
-    val = os.environ.get(key)
-    if val is not None:
-        return val
-    return _load_config_json().get(key, default)
+from services.config import cfg
+from services.team_search import team_search
 
 # --- Views for Interactions ---
 class TeamInviteView(discord.ui.View):
@@ -76,9 +55,6 @@ class TeamInviteView(discord.ui.View):
                 if log_channel:
                     # Extract member count
                     members_data = self.team.get('members', [])
-                    if isinstance(members_data, str):
-                        import json
-                        members_data = json.loads(members_data)
                     member_count = len(members_data) if isinstance(members_data, list) else 0
                     
                     log_embed = discord.Embed(
@@ -163,13 +139,11 @@ class Teams(commands.Cog):
             await interaction.followup.send(f"A team with the name `{name}` already exists.", ephemeral=True)
             return
 
-        # Check if tag already exists (manual check since we don't have get_team_by_tag)
+        # Check if tag already exists
         try:
-            all_teams = await db.get_all_teams()
-            for team in all_teams:
-                if team['tag'].lower() == tag.lower():
-                    await interaction.followup.send(f"A team with the tag `{tag}` already exists.", ephemeral=True)
-                    return
+            if await team_search.get_by_tag(tag):
+                await interaction.followup.send(f"A team with the tag `{tag}` already exists.", ephemeral=True)
+                return
         except Exception as e:
             print(f"Error checking existing tags: {e}")
 
@@ -394,9 +368,6 @@ class Teams(commands.Cog):
 
         # Extract member IDs from member objects
         members_data = captain_team.get('members', [])
-        if isinstance(members_data, str):
-            import json
-            members_data = json.loads(members_data)
         
         team_member_ids = [member['discord_id'] for member in members_data if isinstance(member, dict)]
         
@@ -440,9 +411,6 @@ class Teams(commands.Cog):
         
         # Extract member IDs from member objects
         members_data = captain_team.get('members', [])
-        if isinstance(members_data, str):
-            import json
-            members_data = json.loads(members_data)
         
         team_member_ids = [member['discord_id'] for member in members_data if isinstance(member, dict)]
         
@@ -0,0 +1,52 @@
+"""
+Migration: Covering indexes for the tiered team reads
+- Summary lookups by id / captain are answered from the index alone
+- Player -> team membership lookups never touch the team_members heap
+(the roster tier's index is created by normalize_team_members.py)
+"""
+
+import asyncio
+import asyncpg
+import os
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load .env
+env_path = Path(__file__).parent.parent / '.env'
+if env_path.exists():
+    load_dotenv(dotenv_path=env_path)
+
+DATABASE_URL = os.getenv('DATABASE_URL')
+
+INDEXES = {
+    'idx_teams_id_summary':
+        "CREATE INDEX IF NOT EXISTS idx_teams_id_summary ON teams(id) INCLUDE (name, tag, region, captain_id, logo_url)",
+    'idx_teams_captain_summary':
+        "CREATE INDEX IF NOT EXISTS idx_teams_captain_summary ON teams(captain_id) INCLUDE (id, name, tag, region, logo_url)",
+    'idx_team_members_player_team':
+        "CREATE INDEX IF NOT EXISTS idx_team_members_player_team ON team_members(player_id) INCLUDE (team_id)",
+}
+
+async def add_team_read_indexes():
+    """Create covering indexes for team summary/membership lookups"""
+    conn = await asyncpg.connect(DATABASE_URL)
+    
+    try:
+        for name, sql in INDEXES.items():
+            await conn.execute(sql)
+            print(f"✅ Created {name}")
+        
+        await conn.execute("ANALYZE teams")
+        await conn.execute("ANALYZE team_members")
+        print("✅ Refreshed planner statistics")
+        
+        print("\n🎉 Team read indexes added successfully!")
+        
+    except Exception as e:
+        print(f"❌ Error adding team read indexes: {e}")
+        raise
+    finally:
+        await conn.close()
+
+if __name__ == "__main__":
+    asyncio.run(add_team_read_indexes())
@@ -0,0 +1,43 @@
+"""
+Create bot_state table
+Small key/value store for state the bot keeps between restarts
+(slash-command sync fingerprints, managed panel message ids)
+"""
+
+import asyncio
+import asyncpg
+import os
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load .env
+env_path = Path(__file__).parent.parent / '.env'
+if env_path.exists():
+    load_dotenv(dotenv_path=env_path)
+
+DATABASE_URL = os.getenv('DATABASE_URL')
+
+async def create_bot_state_table():
+    """Create bot_state table"""
+    conn = await asyncpg.connect(DATABASE_URL)
+    
+    try:
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS bot_state (
+                key VARCHAR(150) PRIMARY KEY,
+                value JSONB NOT NULL DEFAULT '{}'::jsonb,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        print("✅ Created bot_state table")
+        
+        print("\n🎉 Bot state table created successfully!")
+        
+    except Exception as e:
+        print(f"❌ Error creating bot_state table: {e}")
+        raise
+    finally:
+        await conn.close()
+
+if __name__ == "__main__":
+    asyncio.run(create_bot_state_table())
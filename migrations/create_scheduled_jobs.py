@@ -0,0 +1,54 @@
+"""
+Create scheduled_jobs table for the persistent job scheduler
+Delayed work (thread deletion, staff ghost pings, scrim request expiry) is stored
+here so it survives restarts and redeploys
+"""
+
+import asyncio
+import asyncpg
+import os
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load .env
+env_path = Path(__file__).parent.parent / '.env'
+if env_path.exists():
+    load_dotenv(dotenv_path=env_path)
+
+DATABASE_URL = os.getenv('DATABASE_URL')
+
+async def create_scheduled_jobs_table():
+    """Create scheduled_jobs table"""
+    conn = await asyncpg.connect(DATABASE_URL)
+    
+    try:
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS scheduled_jobs (
+                id BIGSERIAL PRIMARY KEY,
+                kind VARCHAR(50) NOT NULL,
+                run_at TIMESTAMP NOT NULL,
+                payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                dedupe_key VARCHAR(100) UNIQUE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        print("✅ Created scheduled_jobs table")
+        
+        # The scheduler only ever asks "what is due next?"
+        await conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_run_at 
+            ON scheduled_jobs(run_at)
+        """)
+        print("✅ Created run_at index")
+        
+        print("\n🎉 Scheduled jobs table created successfully!")
+        
+    except Exception as e:
+        print(f"❌ Error creating scheduled_jobs table: {e}")
+        raise
+    finally:
+        await conn.close()
+
+if __name__ == "__main__":
+    asyncio.run(create_scheduled_jobs_table())
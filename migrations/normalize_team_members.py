@@ -0,0 +1,125 @@
+"""
+Migration: Normalize team rosters
+- Backfills team_members from the legacy teams.members JSON column, then drops it
+- Creates match_players if this database predates it
+- Creates the team_roster view (members + match_players totals)
+- Adds the covering index the view's per-member aggregation reads from
+"""
+
+import asyncio
+import asyncpg
+import json
+import os
+from dotenv import load_dotenv
+from pathlib import Path
+
+# Load .env
+env_path = Path(__file__).parent.parent / '.env'
+if env_path.exists():
+    load_dotenv(dotenv_path=env_path)
+
+DATABASE_URL = os.getenv('DATABASE_URL')
+
+async def normalize_team_members():
+    """Move rosters to team_members and create the team_roster view"""
+    conn = await asyncpg.connect(DATABASE_URL)
+    
+    try:
+        async with conn.transaction():
+            has_members_column = await conn.fetchval("""
+                SELECT EXISTS (
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_name = 'teams' AND column_name = 'members'
+                )
+            """)
+            
+            if has_members_column:
+                teams = await conn.fetch("SELECT id, members FROM teams WHERE members IS NOT NULL")
+                backfilled = 0
+                for team in teams:
+                    members = team['members']
+                    if isinstance(members, str):
+                        members = json.loads(members)
+                    for member in members or []:
+                        if not isinstance(member, dict) or not member.get('discord_id'):
+                            continue
+                        result = await conn.execute("""
+                            INSERT INTO team_members (team_id, player_id, discord_id)
+                            SELECT $1, $2, $2
+                            WHERE EXISTS (SELECT 1 FROM players WHERE discord_id = $2)
+                            ON CONFLICT (team_id, player_id) DO NOTHING
+                        """, team['id'], int(member['discord_id']))
+                        backfilled += int(result.split()[-1])
+                print(f"✅ Backfilled {backfilled} roster entries from teams.members")
+                
+                await conn.execute("ALTER TABLE teams DROP COLUMN members")
+                print("✅ Dropped teams.members")
+            else:
+                print("✓ teams.members already removed")
+            
+            # The view aggregates match_players, which older databases never created
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS match_players (
+                    id BIGSERIAL PRIMARY KEY,
+                    match_id BIGINT NOT NULL REFERENCES matches(id) ON DELETE CASCADE,
+                    player_id BIGINT NOT NULL REFERENCES players(discord_id) ON DELETE CASCADE,
+                    agent TEXT,
+                    kills INTEGER DEFAULT 0,
+                    deaths INTEGER DEFAULT 0,
+                    assists INTEGER DEFAULT 0,
+                    score INTEGER DEFAULT 0,
+                    mvp BOOLEAN DEFAULT FALSE,
+                    team INTEGER,
+                    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            await conn.execute("CREATE INDEX IF NOT EXISTS idx_match_players_match ON match_players(match_id)")
+            await conn.execute("CREATE INDEX IF NOT EXISTS idx_match_players_player ON match_players(player_id)")
+            print("✅ match_players table ready")
+            
+            # Per-member totals are read with an index-only scan on (player_id)
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_match_players_player_totals
+                ON match_players(player_id) INCLUDE (kills, deaths, assists)
+            """)
+            print("✅ Created match_players covering index")
+            
+            await conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_team_members_team_joined
+                ON team_members(team_id, joined_at) INCLUDE (player_id)
+            """)
+            print("✅ Created team_members roster index")
+            
+            await conn.execute("""
+                CREATE OR REPLACE VIEW team_roster AS
+                SELECT tm.team_id,
+                       tm.player_id AS discord_id,
+                       p.ign,
+                       tm.joined_at,
+                       COALESCE(s.kills, 0) AS kills,
+                       COALESCE(s.deaths, 0) AS deaths,
+                       COALESCE(s.assists, 0) AS assists,
+                       COALESCE(s.matches_played, 0) AS matches_played
+                FROM team_members tm
+                LEFT JOIN players p ON p.discord_id = tm.player_id
+                LEFT JOIN LATERAL (
+                    SELECT SUM(mp.kills) AS kills,
+                           SUM(mp.deaths) AS deaths,
+                           SUM(mp.assists) AS assists,
+                           COUNT(*) AS matches_played
+                    FROM match_players mp
+                    WHERE mp.player_id = tm.player_id
+                ) s ON TRUE
+            """)
+            print("✅ Created team_roster view")
+        
+        print("\n🎉 Team rosters normalized successfully!")
+        
+    except Exception as e:
+        print(f"❌ Error normalizing team rosters: {e}")
+        raise
+    finally:
+        await conn.close()
+
+if __name__ == "__main__":
+    asyncio.run(normalize_team_members())
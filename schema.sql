@@ -73,6 +73,10 @@ CREATE INDEX idx_teams_name_lower ON teams (LOWER(name));
 CREATE INDEX idx_teams_tag_lower ON teams (LOWER(tag));
 CREATE INDEX idx_teams_captain ON teams (captain_id);
 
+-- Covering indexes for team summary reads (by id / captain)
+CREATE INDEX idx_teams_id_summary ON teams (id) INCLUDE (name, tag, region, captain_id, logo_url);
+CREATE INDEX idx_teams_captain_summary ON teams (captain_id) INCLUDE (id, name, tag, region, logo_url);
+
 -- Team members junction table (many-to-many)
 CREATE TABLE team_members (
     id SERIAL PRIMARY KEY,
@@ -85,9 +89,67 @@ CREATE TABLE team_members (
 -- Create index for faster member lookups
 CREATE INDEX idx_team_members_player ON team_members (player_id);
 CREATE INDEX idx_team_members_team ON team_members (team_id);
+CREATE INDEX idx_team_members_team_joined ON team_members (team_id, joined_at) INCLUDE (player_id);
+CREATE INDEX idx_team_members_player_team ON team_members (player_id) INCLUDE (team_id);
 
 -- Add triggers for teams table
 CREATE TRIGGER update_teams_updated_at
     BEFORE UPDATE ON teams
     FOR EACH ROW
-    EXECUTE FUNCTION update_updated_at_column();
\ No newline at end of file
+    EXECUTE FUNCTION update_updated_at_column();
+
+-- Matches table (for storing match results)
+CREATE TABLE matches (
+    id BIGSERIAL PRIMARY KEY,
+    match_type TEXT NOT NULL DEFAULT 'scrim',
+    team_a_id INTEGER REFERENCES teams(id) ON DELETE SET NULL,
+    team_b_id INTEGER REFERENCES teams(id) ON DELETE SET NULL,
+    team1_score INTEGER NOT NULL,
+    team2_score INTEGER NOT NULL,
+    map_name TEXT NOT NULL,
+    players JSONB NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_matches_created ON matches (created_at DESC);
+
+-- Per-player match stats (one row per player per match)
+CREATE TABLE match_players (
+    id BIGSERIAL PRIMARY KEY,
+    match_id BIGINT NOT NULL REFERENCES matches(id) ON DELETE CASCADE,
+    player_id BIGINT NOT NULL REFERENCES players(discord_id) ON DELETE CASCADE,
+    agent TEXT,
+    kills INTEGER DEFAULT 0,
+    deaths INTEGER DEFAULT 0,
+    assists INTEGER DEFAULT 0,
+    score INTEGER DEFAULT 0,
+    mvp BOOLEAN DEFAULT FALSE,
+    team INTEGER,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create indexes for match player queries
+CREATE INDEX idx_match_players_match ON match_players (match_id);
+CREATE INDEX idx_match_players_player ON match_players (player_id);
+CREATE INDEX idx_match_players_player_totals ON match_players (player_id) INCLUDE (kills, deaths, assists);
+
+-- Team roster view (members + match_players totals), read by every team lookup
+CREATE VIEW team_roster AS
+SELECT tm.team_id,
+       tm.player_id AS discord_id,
+       p.ign,
+       tm.joined_at,
+       COALESCE(s.kills, 0) AS kills,
+       COALESCE(s.deaths, 0) AS deaths,
+       COALESCE(s.assists, 0) AS assists,
+       COALESCE(s.matches_played, 0) AS matches_played
+FROM team_members tm
+LEFT JOIN players p ON p.discord_id = tm.player_id
+LEFT JOIN LATERAL (
+    SELECT SUM(mp.kills) AS kills,
+           SUM(mp.deaths) AS deaths,
+           SUM(mp.assists) AS assists,
+           COUNT(*) AS matches_played
+    FROM match_players mp
+    WHERE mp.player_id = tm.player_id
+) s ON TRUE;
\ No newline at end of file
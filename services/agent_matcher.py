@@ -11,6 +11,8 @@ from pathlib import Path
 from typing import Optional, Tuple, List
 import logging
 
+from services.image_ingest import load_image
+
 logger = logging.getLogger(__name__)
 
 class AgentMatcher:
@@ -148,15 +150,16 @@ class AgentMatcher:
         Extract agent portraits from a Valorant scoreboard screenshot
         
         Args:
-            screenshot_path: Path to the scoreboard screenshot
+            screenshot_path: Path to the scoreboard screenshot, or an already decoded image
             
         Returns:
             List of tuples (portrait_image, metadata) for each player
         """
         try:
-            # Load screenshot
-            img = cv2.imread(screenshot_path)
-            if img is None:
+            # Load screenshot (no-op for in-memory arrays)
+            try:
+                img = load_image(screenshot_path)
+            except ValueError:
                 logger.error(f"Failed to load screenshot: {screenshot_path}")
                 return []
             
@@ -207,7 +210,7 @@ class AgentMatcher:
         Full pipeline: Extract portraits and match agents
         
         Args:
-            screenshot_path: Path to scoreboard screenshot
+            screenshot_path: Path to scoreboard screenshot, or an already decoded image
             threshold: Minimum confidence for agent matching
             
         Returns:
@@ -0,0 +1,150 @@
+"""
+Avatar Cache Service
+Circular avatar tiles for profile cards, keyed on the Discord avatar hash
+
+- A changed avatar gets a new hash, so entries never need invalidating
+- Tiles are stored already resized and masked (RGBA), ready to paste
+- Bounded in-memory LRU; optional on-disk copy survives restarts
+- One shared HTTP session and one precomputed circular mask
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from io import BytesIO
+from pathlib import Path
+from typing import Optional, Tuple
+
+import aiohttp
+from PIL import Image, ImageDraw
+
+from services import tracing
+
+logger = logging.getLogger(__name__)
+
+AVATAR_SIZE = (250, 250)
+DEFAULT_MAX_ENTRIES = 128          # ~250 KB per tile in memory
+DEFAULT_MAX_DISK_FILES = 2000
+DISK_CACHE_DIR = Path(__file__).parent.parent / "data" / "avatar_cache"
+
+
+def _circle_mask(size: Tuple[int, int]) -> Image.Image:
+    mask = Image.new('L', size, 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, size[0], size[1]), fill=255)
+    return mask
+
+
+class AvatarCache:
+    def __init__(self, size: Tuple[int, int] = AVATAR_SIZE, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 disk_dir: Optional[Path] = DISK_CACHE_DIR, max_disk_files: int = DEFAULT_MAX_DISK_FILES):
+        self.size = size
+        self.max_entries = max_entries
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.max_disk_files = max_disk_files
+        self.mask = _circle_mask(size)
+        self._tiles: "OrderedDict[str, Image.Image]" = OrderedDict()
+        self._pending = {}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10),
+                                                  trace_configs=[tracing.http_trace_config()])
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def get_tile(self, key: str, url: str) -> Image.Image:
+        """
+        Masked RGBA avatar tile for an avatar hash
+
+        Args:
+            key: Discord avatar hash (Asset.key) - changes whenever the avatar changes
+            url: Where to download it on a miss
+        """
+        tile = self._tiles.get(key)
+        if tile is not None:
+            self._tiles.move_to_end(key)
+            self.hits += 1
+            return tile
+
+        # Concurrent renders for the same avatar share one download
+        if key in self._pending:
+            return await asyncio.shield(self._pending[key])
+
+        task = asyncio.ensure_future(self._load(key, url))
+        self._pending[key] = task
+        try:
+            tile = await task
+        finally:
+            self._pending.pop(key, None)
+        self._remember(key, tile)
+        return tile
+
+    def _remember(self, key: str, tile: Image.Image):
+        self._tiles[key] = tile
+        self._tiles.move_to_end(key)
+        while len(self._tiles) > self.max_entries:
+            self._tiles.popitem(last=False)
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        if not self.disk_dir:
+            return None
+        safe_key = "".join(c for c in key if c.isalnum() or c in "_-")
+        return self.disk_dir / f"{safe_key}_{self.size[0]}.png"
+
+    async def _load(self, key: str, url: str) -> Image.Image:
+        path = self._disk_path(key)
+        if path is not None and path.exists():
+            try:
+                tile = await asyncio.to_thread(self._read_tile, path)
+                self.disk_hits += 1
+                return tile
+            except Exception as e:
+                logger.warning("⚠️ Ignoring unreadable cached avatar %s: %s", path.name, e)
+
+        self.misses += 1
+        async with self._get_session().get(str(url)) as response:
+            response.raise_for_status()
+            data = await response.read()
+        tile = await asyncio.to_thread(self._build_tile, data)
+        if path is not None:
+            asyncio.create_task(asyncio.to_thread(self._write_tile, path, tile))
+        return tile
+
+    def _build_tile(self, data: bytes) -> Image.Image:
+        avatar = Image.open(BytesIO(data))
+        # Animated avatars: first frame only
+        avatar.seek(0)
+        avatar = avatar.convert('RGBA').resize(self.size, Image.LANCZOS)
+        tile = Image.new('RGBA', self.size, (0, 0, 0, 0))
+        tile.paste(avatar, (0, 0))
+        tile.putalpha(self.mask)
+        return tile
+
+    @staticmethod
+    def _read_tile(path: Path) -> Image.Image:
+        with Image.open(path) as tile:
+            return tile.convert('RGBA')
+
+    def _write_tile(self, path: Path, tile: Image.Image):
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tile.save(path, format='PNG')
+            files = list(path.parent.glob(f"*_{self.size[0]}.png"))
+            if len(files) > self.max_disk_files:
+                files.sort(key=lambda f: f.stat().st_mtime)
+                for old in files[:len(files) - self.max_disk_files]:
+                    old.unlink(missing_ok=True)
+        except Exception as e:
+            logger.warning("⚠️ Could not write avatar cache file: %s", e)
+
+
+# Global avatar cache instance
+avatar_cache = AvatarCache()
@@ -0,0 +1,57 @@
+"""
+Command Sync Fingerprints
+Syncing the slash-command tree uploads every command definition through a
+rate-limited endpoint, so it only runs when the local schema changed
+
+- fingerprint() is a stable hash over the command payloads of one scope
+- Fingerprints are stored per application and scope (global or a guild id) in
+  bot_state, and remembered in memory so gateway reconnects skip the database too
+"""
+
+import hashlib
+import json
+import logging
+from typing import Dict, List, Optional
+
+from services import db
+
+logger = logging.getLogger(__name__)
+
+_synced: Dict[str, str] = {}
+
+
+def fingerprint(payloads: List[dict]) -> str:
+    """Order-independent hash of command payloads (CommandTree command.to_dict output)"""
+    ordered = sorted(payloads, key=lambda p: (p.get('type', 1), p['name']))
+    canonical = json.dumps(ordered, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _key(application_id: int, guild_id: Optional[int]) -> str:
+    return f"command_sync:{application_id}:{guild_id or 'global'}"
+
+
+async def needs_sync(application_id: int, guild_id: Optional[int], digest: str) -> bool:
+    """True unless this exact schema was already synced for the scope"""
+    key = _key(application_id, guild_id)
+    if _synced.get(key) == digest:
+        return False
+    try:
+        stored = await db.get_bot_state(key)
+    except Exception as e:
+        logger.warning("⚠️ Could not read command sync fingerprint, syncing anyway: %s", e)
+        return True
+    if stored and stored.get('hash') == digest:
+        _synced[key] = digest
+        return False
+    return True
+
+
+async def mark_synced(application_id: int, guild_id: Optional[int], digest: str, count: int):
+    """Remember a successful sync"""
+    key = _key(application_id, guild_id)
+    _synced[key] = digest
+    try:
+        await db.set_bot_state(key, {'hash': digest, 'commands': count})
+    except Exception as e:
+        logger.warning("⚠️ Could not store command sync fingerprint: %s", e)
@@ -0,0 +1,57 @@
+"""
+Shared configuration
+.env and config.json are read once per process; every cog and service uses cfg() from here
+
+Lookup order for cfg(key):
+    1. environment variable `key` (then `KEY` upper-cased)
+    2. config.json entry `key`
+    3. default
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+ROOT = Path(__file__).parent.parent
+
+_CONFIG_JSON: Optional[dict] = None
+
+
+def _load_env():
+    # python-dotenv is optional; without it only real environment variables are used
+    try:
+        from dotenv import load_dotenv
+        env_path = ROOT / '.env'
+        if env_path.exists():
+            load_dotenv(dotenv_path=env_path)
+    except Exception:
+        pass
+
+
+def _load_config_json() -> dict:
+    global _CONFIG_JSON
+    if _CONFIG_JSON is not None:
+        return _CONFIG_JSON
+    _CONFIG_JSON = {}
+    try:
+        path = ROOT / 'config.json'
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                _CONFIG_JSON = json.load(f)
+    except Exception as e:
+        print(f"⚠️ Could not read config.json: {e}")
+    return _CONFIG_JSON
+
+
+def cfg(key: str, default: Any = None) -> Any:
+    """Get a config value (environment first, then config.json)"""
+    val = os.environ.get(key)
+    if val is None and key.upper() != key:
+        val = os.environ.get(key.upper())
+    if val is not None:
+        return val
+    return _load_config_json().get(key, default)
+
+
+_load_env()
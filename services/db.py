@@ -1,10 +1,16 @@
 import os
+import json
+import logging
 import asyncpg
 from typing import Optional, Dict, Any
 from pathlib import Path
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 
+from services import tracing
+
+logger = logging.getLogger(__name__)
+
 # Load .env from root directory
 env_path = Path(__file__).parent.parent / '.env'
 if env_path.exists():
@@ -22,10 +28,15 @@ async def get_pool() -> asyncpg.Pool:
         _pool = await asyncpg.create_pool(
             DATABASE_URL,
             min_size=1,
-            max_size=10
+            max_size=10,
+            init=_init_connection
         )
     return _pool
 
+async def _init_connection(conn: asyncpg.Connection):
+    # Every query becomes a db.<verb> span under the interaction that ran it
+    conn.add_query_logger(tracing.query_logger)
+
 async def close_pool():
     global _pool
     if _pool:
@@ -470,6 +481,21 @@ async def get_team_matches(team_id: int, limit: int = 5) -> list:
 # Team Management Functions
 # ============================================================================
 
+# Callbacks run after a team's name/tag/captain/region/logo changes or the team
+# is created/deleted (e.g. services.team_search keeps its in-memory index fresh)
+_team_write_listeners = []
+
+def on_team_write(callback) -> None:
+    """Register callback(team_id) to be called after a team row is written."""
+    _team_write_listeners.append(callback)
+
+def _team_written(team_id: int) -> None:
+    for callback in _team_write_listeners:
+        try:
+            callback(team_id)
+        except Exception as e:
+            logger.warning("⚠️ Team write listener failed: %s", e)
+
 async def create_team(name: str, tag: str, captain_id: int, region: str, logo_url: str = None) -> Dict[str, Any]:
     """Create a new team with the captain as the first member."""
     pool = await get_pool()
@@ -494,104 +520,167 @@ async def create_team(name: str, tag: str, captain_id: int, region: str, logo_ur
                 VALUES ($1, 0, 0, 0, 0.0, '[]'::jsonb)
             """, team['id'])
             
-            return dict(team)
+        _team_written(team['id'])
+        return dict(team)
+
+# Roster for one team, read from the team_roster view (team_members + per-member
+# match_players totals). Used as a correlated subquery so each team is one indexed lookup.
+TEAM_MEMBERS_JSON = """
+    COALESCE((
+        SELECT json_agg(
+                   json_build_object(
+                       'discord_id', r.discord_id,
+                       'ign', r.ign,
+                       'joined_at', r.joined_at,
+                       'kills', r.kills,
+                       'deaths', r.deaths,
+                       'assists', r.assists,
+                       'matches_played', r.matches_played
+                   ) ORDER BY r.joined_at
+               )
+        FROM team_roster r
+        WHERE r.team_id = t.id
+    ), '[]'::json) as members
+"""
+
+def _team_with_members(team) -> Optional[Dict[str, Any]]:
+    """Record -> dict with `members` decoded to a list."""
+    if not team:
+        return None
+    team = dict(team)
+    if isinstance(team.get('members'), str):
+        team['members'] = json.loads(team['members'])
+    return team
+
+# ---- Tiered team reads ----
+# summary: id/name/tag/region/captain (index-only on the covering indexes)
+# roster:  members with match totals (team_roster view)
+# full:    team row + roster + staff
+# Display-only paths (scrim DMs, logs) should use the summary tier.
+
+TEAM_SUMMARY_COLUMNS = "t.id, t.name, t.tag, t.region, t.captain_id, t.logo_url"
+
+async def get_team_summary(team_id: int) -> Optional[Dict[str, Any]]:
+    """Get id/name/tag/region/captain for a team."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        team = await conn.fetchrow(f"""
+            SELECT {TEAM_SUMMARY_COLUMNS}
+            FROM teams t
+            WHERE t.id = $1
+        """, team_id)
+        return dict(team) if team else None
+
+async def get_team_summary_by_captain(captain_id: int) -> Optional[Dict[str, Any]]:
+    """Get the summary of the team a player captains."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        team = await conn.fetchrow(f"""
+            SELECT {TEAM_SUMMARY_COLUMNS}
+            FROM teams t
+            WHERE t.captain_id = $1
+        """, captain_id)
+        return dict(team) if team else None
+
+async def get_player_team_summary(discord_id: int) -> Optional[Dict[str, Any]]:
+    """Get the summary of a player's team: the team they captain, else the team they play for."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        team = await conn.fetchrow(f"""
+            SELECT * FROM (
+                SELECT {TEAM_SUMMARY_COLUMNS}, 0 AS priority
+                FROM teams t
+                WHERE t.captain_id = $1
+                UNION ALL
+                SELECT {TEAM_SUMMARY_COLUMNS}, 1 AS priority
+                FROM team_members tm
+                JOIN teams t ON t.id = tm.team_id
+                WHERE tm.player_id = $1
+            ) teams_for_player
+            ORDER BY priority
+            LIMIT 1
+        """, discord_id)
+        if not team:
+            return None
+        team = dict(team)
+        team.pop('priority')
+        return team
+
+async def get_all_team_summaries() -> list:
+    """Get the summary of every team (used to build the team search index)."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        teams = await conn.fetch(f"""
+            SELECT {TEAM_SUMMARY_COLUMNS}
+            FROM teams t
+            ORDER BY t.created_at DESC
+        """)
+        return [dict(team) for team in teams]
+
+async def get_team_roster(team_id: int) -> list:
+    """Get a team's members with their match totals, in join order."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        members = await conn.fetch("""
+            SELECT discord_id, ign, joined_at, kills, deaths, assists, matches_played
+            FROM team_roster
+            WHERE team_id = $1
+            ORDER BY joined_at
+        """, team_id)
+        return [dict(member) for member in members]
+
+async def get_team_full(team_id: int) -> Optional[Dict[str, Any]]:
+    """Get a team with its roster and staff (coach/managers)."""
+    team = await get_team_by_id(team_id)
+    if team:
+        team['staff'] = await get_team_staff(team_id)
+    return team
 
 async def get_team_by_id(team_id: int) -> Optional[Dict[str, Any]]:
     """Get team by ID with member list."""
     pool = await get_pool()
     async with pool.acquire() as conn:
-        team = await conn.fetchrow("""
-            SELECT t.*, 
-                   COALESCE(
-                       json_agg(
-                           json_build_object(
-                               'discord_id', tm.player_id,
-                               'ign', p.ign,
-                               'joined_at', tm.joined_at
-                           ) ORDER BY tm.joined_at
-                       ) FILTER (WHERE tm.player_id IS NOT NULL),
-                       '[]'::json
-                   ) as members
+        team = await conn.fetchrow(f"""
+            SELECT t.*, {TEAM_MEMBERS_JSON}
             FROM teams t
-            LEFT JOIN team_members tm ON t.id = tm.team_id
-            LEFT JOIN players p ON tm.player_id = p.discord_id
             WHERE t.id = $1
-            GROUP BY t.id
         """, team_id)
-        return dict(team) if team else None
+        return _team_with_members(team)
 
 async def get_team_by_name(name: str) -> Optional[Dict[str, Any]]:
     """Get team by name (case-insensitive)."""
     pool = await get_pool()
     async with pool.acquire() as conn:
-        team = await conn.fetchrow("""
-            SELECT t.*, 
-                   COALESCE(
-                       json_agg(
-                           json_build_object(
-                               'discord_id', tm.player_id,
-                               'ign', p.ign,
-                               'joined_at', tm.joined_at
-                           ) ORDER BY tm.joined_at
-                       ) FILTER (WHERE tm.player_id IS NOT NULL),
-                       '[]'::json
-                   ) as members
+        team = await conn.fetchrow(f"""
+            SELECT t.*, {TEAM_MEMBERS_JSON}
             FROM teams t
-            LEFT JOIN team_members tm ON t.id = tm.team_id
-            LEFT JOIN players p ON tm.player_id = p.discord_id
             WHERE LOWER(t.name) = LOWER($1)
-            GROUP BY t.id
         """, name)
-        return dict(team) if team else None
+        return _team_with_members(team)
 
 async def get_team_by_captain(captain_id: int) -> Optional[Dict[str, Any]]:
     """Get team by captain's discord ID."""
     pool = await get_pool()
     async with pool.acquire() as conn:
-        team = await conn.fetchrow("""
-            SELECT t.*, 
-                   COALESCE(
-                       json_agg(
-                           json_build_object(
-                               'discord_id', tm.player_id,
-                               'ign', p.ign,
-                               'joined_at', tm.joined_at
-                           ) ORDER BY tm.joined_at
-                       ) FILTER (WHERE tm.player_id IS NOT NULL),
-                       '[]'::json
-                   ) as members
+        team = await conn.fetchrow(f"""
+            SELECT t.*, {TEAM_MEMBERS_JSON}
             FROM teams t
-            LEFT JOIN team_members tm ON t.id = tm.team_id
-            LEFT JOIN players p ON tm.player_id = p.discord_id
             WHERE t.captain_id = $1
-            GROUP BY t.id
         """, captain_id)
-        return dict(team) if team else None
+        return _team_with_members(team)
 
 async def get_player_team(player_id: int) -> Optional[Dict[str, Any]]:
     """Get the team a player belongs to."""
     pool = await get_pool()
     async with pool.acquire() as conn:
-        team = await conn.fetchrow("""
-            SELECT t.*, 
-                   COALESCE(
-                       json_agg(
-                           json_build_object(
-                               'discord_id', tm.player_id,
-                               'ign', p.ign,
-                               'joined_at', tm.joined_at
-                           ) ORDER BY tm.joined_at
-                       ) FILTER (WHERE tm.player_id IS NOT NULL),
-                       '[]'::json
-                   ) as members
+        team = await conn.fetchrow(f"""
+            SELECT t.*, {TEAM_MEMBERS_JSON}
             FROM teams t
             JOIN team_members tm ON t.id = tm.team_id
-            LEFT JOIN team_members tm2 ON t.id = tm2.team_id
-            LEFT JOIN players p ON tm2.player_id = p.discord_id
             WHERE tm.player_id = $1
-            GROUP BY t.id
+            LIMIT 1
         """, player_id)
-        return dict(team) if team else None
+        return _team_with_members(team)
 
 async def add_team_member(team_id: int, player_id: int) -> None:
     """Add a player to a team."""
@@ -638,6 +727,7 @@ async def update_team_logo(team_id: int, logo_url: str) -> None:
             SET logo_url = $1
             WHERE id = $2
         """, logo_url, team_id)
+    _team_written(team_id)
 
 async def update_team_name(team_id: int, name: str) -> None:
     """Update team's name."""
@@ -648,6 +738,7 @@ async def update_team_name(team_id: int, name: str) -> None:
             SET name = $1, updated_at = CURRENT_TIMESTAMP
             WHERE id = $2
         """, name, team_id)
+    _team_written(team_id)
 
 async def update_team_tag(team_id: int, tag: str) -> None:
     """Update team's tag."""
@@ -658,6 +749,7 @@ async def update_team_tag(team_id: int, tag: str) -> None:
             SET tag = $1, updated_at = CURRENT_TIMESTAMP
             WHERE id = $2
         """, tag, team_id)
+    _team_written(team_id)
 
 
 
@@ -668,6 +760,7 @@ async def delete_team(team_id: int) -> None:
         await conn.execute("""
             DELETE FROM teams WHERE id = $1
         """, team_id)
+    _team_written(team_id)
 
 async def get_all_teams(region: str = None) -> list:
     """Get all teams, optionally filtered by region."""
@@ -1192,6 +1285,18 @@ async def get_captain_pending_matches(captain_discord_id: int) -> list:
         return [dict(m) for m in matches]
 
 
+async def get_chat_active_scrim_matches() -> list:
+    """Get scrim matches whose captains are currently chatting through the bot."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        matches = await conn.fetch("""
+            SELECT id, captain_1_discord_id, captain_2_discord_id
+            FROM scrim_matches
+            WHERE status = 'chat_active'
+        """)
+        return [dict(m) for m in matches]
+
+
 async def expire_old_scrim_requests():
     """Mark old scrim requests as expired."""
     pool = await get_pool()
@@ -1323,17 +1428,6 @@ async def clear_scrim_waitlist(request_id: int):
 
 # ============= ADMIN TEAM REGISTRATION FUNCTIONS =============
 
-async def get_team_by_name(team_name: str):
-    """Get team by name"""
-    pool = await get_pool()
-    async with pool.acquire() as conn:
-        team = await conn.fetchrow(
-            "SELECT * FROM teams WHERE LOWER(name) = LOWER($1)",
-            team_name
-        )
-        return dict(team) if team else None
-
-
 async def get_player_by_discord_id(discord_id: int):
     """Get player by Discord ID"""
     pool = await get_pool()
@@ -1383,30 +1477,11 @@ async def add_player_to_team(team_id: int, discord_id: int, ign: str):
                 WHERE discord_id = $2
             """, team_id, discord_id)
             
-            # Get current team members
-            team = await conn.fetchrow("SELECT members FROM teams WHERE id = $1", team_id)
-            members = team['members'] if team else []
-            
-            if isinstance(members, str):
-                import json
-                members = json.loads(members)
-            
-            # Add new member
-            new_member = {
-                'discord_id': discord_id,
-                'ign': ign,
-                'kills': 0,
-                'deaths': 0,
-                'assists': 0
-            }
-            members.append(new_member)
-            
-            # Update team members
             await conn.execute("""
-                UPDATE teams
-                SET members = $1, updated_at = CURRENT_TIMESTAMP
-                WHERE id = $2
-            """, json.dumps(members), team_id)
+                INSERT INTO team_members (team_id, player_id, discord_id)
+                VALUES ($1, $2, $2)
+                ON CONFLICT (team_id, player_id) DO NOTHING
+            """, team_id, discord_id)
 
 
 async def remove_player_from_team(team_id: int, discord_id: int):
@@ -1421,23 +1496,10 @@ async def remove_player_from_team(team_id: int, discord_id: int):
                 WHERE discord_id = $1
             """, discord_id)
             
-            # Get current team members
-            team = await conn.fetchrow("SELECT members FROM teams WHERE id = $1", team_id)
-            members = team['members'] if team else []
-            
-            if isinstance(members, str):
-                import json
-                members = json.loads(members)
-            
-            # Remove member
-            members = [m for m in members if isinstance(m, dict) and m.get('discord_id') != discord_id]
-            
-            # Update team members
             await conn.execute("""
-                UPDATE teams
-                SET members = $1, updated_at = CURRENT_TIMESTAMP
-                WHERE id = $2
-            """, json.dumps(members), team_id)
+                DELETE FROM team_members
+                WHERE team_id = $1 AND player_id = $2
+            """, team_id, discord_id)
 
 
 async def transfer_team_captainship(team_id: int, new_captain_id: int):
@@ -1449,6 +1511,7 @@ async def transfer_team_captainship(team_id: int, new_captain_id: int):
             SET captain_id = $1, updated_at = CURRENT_TIMESTAMP
             WHERE id = $2
         """, new_captain_id, team_id)
+    _team_written(team_id)
 
 
 async def add_team_coach(team_id: int, coach_id: int):
@@ -1602,3 +1665,117 @@ async def get_team_staff(team_id: int) -> Dict[str, Any]:
         
         return dict(staff)
 
+
+
+# ============= SCHEDULED JOBS =============
+
+async def create_scheduled_job(kind: str, run_at: datetime, payload: str = '{}',
+                               dedupe_key: Optional[str] = None, attempts: int = 0) -> int:
+    """
+    Persist a delayed job. payload is a JSON string.
+    A job with the same dedupe_key is moved to the new time instead of duplicated.
+    """
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        return await conn.fetchval("""
+            INSERT INTO scheduled_jobs (kind, run_at, payload, dedupe_key, attempts)
+            VALUES ($1, $2, $3::jsonb, $4, $5)
+            ON CONFLICT (dedupe_key) DO UPDATE
+            SET kind = EXCLUDED.kind, run_at = EXCLUDED.run_at,
+                payload = EXCLUDED.payload, attempts = EXCLUDED.attempts
+            RETURNING id
+        """, kind, run_at, payload, dedupe_key, attempts)
+
+
+async def claim_due_jobs(kinds: list, now: datetime, leased_until: datetime, limit: int = 50) -> list:
+    """
+    Atomically claim and return up to `limit` due jobs of the given kinds.
+    Claimed jobs stay in the table with run_at pushed to `leased_until`, so a job
+    whose handler never finished (crash, restart) runs again once the lease expires.
+    The returned run_at identifies the claim for complete/reschedule_scheduled_job.
+    SKIP LOCKED lets a second bot instance claim a different batch instead of blocking.
+    """
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        rows = await conn.fetch("""
+            UPDATE scheduled_jobs
+            SET run_at = $3
+            WHERE id IN (
+                SELECT id FROM scheduled_jobs
+                WHERE run_at <= $2 AND kind = ANY($1::varchar[])
+                ORDER BY run_at
+                LIMIT $4
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING *
+        """, kinds, now, leased_until, limit)
+        return [dict(row) for row in rows]
+
+
+async def complete_scheduled_job(job_id: int, claimed_run_at: datetime):
+    """
+    Delete a claimed job once its handler is done.
+    A job re-scheduled under the same dedupe key meanwhile has a new run_at and is kept.
+    """
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        await conn.execute("""
+            DELETE FROM scheduled_jobs
+            WHERE id = $1 AND run_at = $2
+        """, job_id, claimed_run_at)
+
+
+async def reschedule_scheduled_job(job_id: int, claimed_run_at: datetime, run_at: datetime,
+                                   payload: str, attempts: int):
+    """Move a claimed job to a new time (retry or repeat). payload is a JSON string."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        await conn.execute("""
+            UPDATE scheduled_jobs
+            SET run_at = $3, payload = $4::jsonb, attempts = $5
+            WHERE id = $1 AND run_at = $2
+        """, job_id, claimed_run_at, run_at, payload, attempts)
+
+
+async def get_next_job_run_at(kinds: list) -> Optional[datetime]:
+    """Earliest run_at among pending jobs of the given kinds."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        return await conn.fetchval("""
+            SELECT MIN(run_at) FROM scheduled_jobs
+            WHERE kind = ANY($1::varchar[])
+        """, kinds)
+
+
+async def delete_scheduled_job(dedupe_key: str):
+    """Cancel a pending job by its dedupe key."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        await conn.execute("""
+            DELETE FROM scheduled_jobs
+            WHERE dedupe_key = $1
+        """, dedupe_key)
+
+
+# ============= BOT STATE =============
+
+async def get_bot_state(key: str) -> Optional[Dict[str, Any]]:
+    """Stored value for a bot_state key, or None."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        value = await conn.fetchval("""
+            SELECT value FROM bot_state WHERE key = $1
+        """, key)
+        return json.loads(value) if value is not None else None
+
+
+async def set_bot_state(key: str, value: Dict[str, Any]):
+    """Insert or replace a bot_state value."""
+    pool = await get_pool()
+    async with pool.acquire() as conn:
+        await conn.execute("""
+            INSERT INTO bot_state (key, value, updated_at)
+            VALUES ($1, $2::jsonb, CURRENT_TIMESTAMP)
+            ON CONFLICT (key) DO UPDATE
+            SET value = EXCLUDED.value, updated_at = EXCLUDED.updated_at
+        """, key, json.dumps(value))
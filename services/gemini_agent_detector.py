@@ -5,11 +5,58 @@ Uses Google's Gemini Vision to identify Valorant agents from screenshots
 
 import google.generativeai as genai
 from pathlib import Path
+import asyncio
+import hashlib
 import json
+import logging
+import time
 from PIL import Image
 import os
-import re
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from services.map_index import MAP_NAMES, map_index
+from services.payload import payloads
+from services.rate_limiter import GEMINI, limiter
+
+logger = logging.getLogger(__name__)
+
+# Models tried in order (prioritize latest vision models)
+MODEL_CANDIDATES = [
+    'gemini-2.0-flash-exp',      # Latest experimental flash model
+    'gemini-2.0-flash',           # Stable 2.0 flash
+    'gemini-2.5-flash',           # 2.5 flash (may be text-only)
+    'gemini-1.5-flash-latest',    # 1.5 flash latest
+    'gemini-1.5-pro-latest',      # 1.5 pro latest
+    'gemini-pro-vision',          # Legacy vision model
+]
+
+# list_models() result is cached here so restarts don't re-probe the API
+MODEL_CACHE_PATH = Path(__file__).parent.parent / "data" / "gemini_model_cache.json"
+MODEL_CACHE_TTL = 24 * 60 * 60  # seconds
+
+MAP_DETECTION_PROMPT = """Analyze this VALORANT scoreboard screenshot and identify the map name.
+
+**AVAILABLE MAPS** (you may see Chinese or English names):
+
+Chinese Name → English Name:
+- 亚海悬城 → Ascent
+- 源工重镇 → Bind
+- 极寒冬港 → Icebox
+- 隐世修所 → Haven
+- 霓虹町 → Split
+- 微风岛屿 → Breeze
+- 裂变峡谷 → Fracture
+
+**TASK**: Look for the map name text on the scoreboard (usually at the top or near the score display).
+
+**OUTPUT**: Return ONLY the English map name from the list above, nothing else.
+
+Map name:"""
+
+# Models that don't support response_mime_type / response_schema
+LEGACY_MODELS = {'gemini-pro-vision'}
 
 class GeminiAgentDetector:
     """
@@ -21,6 +68,9 @@ class GeminiAgentDetector:
         """
         Initialize Gemini agent detector
         
+        The model is not resolved here - discovery happens lazily on first use
+        and is cached to disk (see MODEL_CACHE_PATH).
+        
         Args:
             api_key: Gemini API key (defaults to GEMINI_API_KEY env var)
         """
@@ -31,41 +81,11 @@ class GeminiAgentDetector:
         # Configure Gemini
         genai.configure(api_key=self.api_key)
         
-        # Try different model names (prioritize latest vision models)
-        model_candidates = [
-            'gemini-2.0-flash-exp',      # Latest experimental flash model
-            'gemini-2.0-flash',           # Stable 2.0 flash
-            'gemini-2.5-flash',           # 2.5 flash (may be text-only)
-            'gemini-1.5-flash-latest',    # 1.5 flash latest
-            'gemini-1.5-pro-latest',      # 1.5 pro latest
-            'gemini-pro-vision',          # Legacy vision model
-        ]
-        
-        self.model = None
-        self.model_name = None
-        for model_name in model_candidates:
-            try:
-                self.model = genai.GenerativeModel(model_name)
-                self.model_name = model_name
-                print(f"✅ Using Gemini model: {model_name}")
-                break
-            except Exception as e:
-                print(f"⚠️ Model {model_name} not available: {e}")
-                continue
-        
-        if not self.model:
-            raise ValueError("No Gemini vision model available. Please check your API key and model access.")
+        self._model = None
+        self._model_name = None
         
         # Map names (Chinese -> English)
-        self.map_names = {
-            '亚海悬城': 'Ascent',
-            '源工重镇': 'Bind',
-            '极寒冬港': 'Icebox',
-            '隐世修所': 'Haven',
-            '霓虹町': 'Split',
-            '微风岛屿': 'Breeze',
-            '裂变峡谷': 'Fracture',
-        }
+        self.map_names = MAP_NAMES
         
         # Reverse mapping for validation
         self.english_map_names = list(self.map_names.values())
@@ -78,129 +98,306 @@ class GeminiAgentDetector:
             'Reyna', 'Sage', 'Skye', 'Sova', 'Viper', 'Vyse', 'Yoru'
         ]
         
+        # Case-insensitive lookup used to validate every returned name in one pass
+        self._agent_lookup = {agent.lower(): agent for agent in self.agent_list}
+        self._agent_lookup.update({'kayo': 'KAY/O', 'kay-o': 'KAY/O', 'unknown': 'Unknown'})
+        
+        # JSON schema for structured responses (agents + map in a single call)
+        self._agent_response_schema = {
+            'type': 'object',
+            'properties': {
+                'agents': {
+                    'type': 'array',
+                    'items': {'type': 'string', 'enum': self.agent_list + ['Unknown']},
+                },
+                'map': {'type': 'string', 'enum': self.english_map_names + ['Unknown']},
+            },
+            'required': ['agents', 'map'],
+        }
+        
+        # Single-portrait prompt only depends on agent_list, so build it once
+        self._single_agent_prompt = f"""Identify this VALORANT agent from their portrait icon.
+
+**AVAILABLE AGENTS**:
+{', '.join(self.agent_list)}
+
+**INSTRUCTIONS**:
+Look at the portrait's distinctive features:
+- Hair color and style
+- Face features and expression
+- Color scheme (primary colors)
+- Unique visual elements or accessories
+- Character ethnicity/appearance
+
+**OUTPUT**: Return ONLY the agent name, nothing else. Choose from the list above.
+Agent name:"""
+        
+        # Several portraits in one request; each image part follows a "Portrait N:" label
+        self._multi_agent_prompt = f"""Identify the VALORANT agent in each of the portrait icons below.
+
+**AVAILABLE AGENTS**:
+{', '.join(self.agent_list)}
+
+**INSTRUCTIONS**:
+Each portrait is preceded by its label ("Portrait 1:", "Portrait 2:", ...).
+Judge every portrait on its own by hair, face, color scheme and accessories.
+The same agent may appear more than once.
+
+**OUTPUT**: Return ONLY a JSON array with one agent name per portrait, in label order.
+Use "Unknown" for any portrait you are not sure about."""
+        self._multi_agent_response_schema = {
+            'type': 'array',
+            'items': {'type': 'string', 'enum': self.agent_list + ['Unknown']},
+        }
+        
+        # Compiled prompts keyed on (descriptions version, model name)
+        self._prompt_cache: Dict[Tuple[str, str], str] = {}
+        
         print(f"✅ Gemini Agent Detector initialized with {len(self.agent_list)} agents")
     
-    def detect_agents_from_screenshot(self, image_path: str, agent_descriptions: dict = None) -> List[str]:
+    @property
+    def model_name(self) -> str:
+        """Name of the model in use (resolved on first access)"""
+        if self._model_name is None:
+            self._model_name = self._discover_model_name()
+            logger.info("✅ Using Gemini model: %s", self._model_name)
+        return self._model_name
+    
+    @property
+    def model(self):
+        """GenerativeModel instance (created on first access)"""
+        if self._model is None:
+            self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+    
+    def _discover_model_name(self) -> str:
+        """
+        Pick the first available model from MODEL_CANDIDATES
+        
+        Uses the on-disk cache when it is fresh and belongs to this API key,
+        otherwise calls list_models() once and rewrites the cache.
+        """
+        key_hash = hashlib.sha256(self.api_key.encode()).hexdigest()[:16]
+        
+        try:
+            if MODEL_CACHE_PATH.exists():
+                with open(MODEL_CACHE_PATH, 'r', encoding='utf-8') as f:
+                    cache = json.load(f)
+                if (cache.get('key') == key_hash
+                        and time.time() - cache.get('saved_at', 0) < MODEL_CACHE_TTL
+                        and cache.get('model') in MODEL_CANDIDATES):
+                    return cache['model']
+        except Exception as e:
+            logger.warning("⚠️ Ignoring Gemini model cache: %s", e)
+        
+        try:
+            available = {
+                m.name.replace('models/', '')
+                for m in genai.list_models()
+                if 'generateContent' in m.supported_generation_methods
+            }
+        except Exception as e:
+            logger.warning("⚠️ Could not list Gemini models, using default: %s", e)
+            return MODEL_CANDIDATES[0]
+        
+        model_name = next((m for m in MODEL_CANDIDATES if m in available), None)
+        if model_name is None:
+            raise ValueError("No Gemini vision model available. Please check your API key and model access.")
+        
+        try:
+            MODEL_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            with open(MODEL_CACHE_PATH, 'w', encoding='utf-8') as f:
+                json.dump({'key': key_hash, 'model': model_name, 'saved_at': time.time()}, f)
+        except Exception as e:
+            logger.warning("⚠️ Could not write Gemini model cache: %s", e)
+        
+        return model_name
+    
+    def _note_rate_limit(self, error: Exception):
+        """A 429 (the SDK raises ResourceExhausted) holds every Gemini caller, not just this one"""
+        if type(error).__name__ == 'ResourceExhausted' or '429' in str(error):
+            limiter.throttle(GEMINI)
+    
+    async def _ensure_model_async(self):
+        """Resolve the model off the event loop (list_models() is a blocking HTTP call)"""
+        if self._model_name is None:
+            await asyncio.to_thread(lambda: self.model_name)
+        return self.model
+    
+    def _get_agent_prompt(self, agent_descriptions: dict = None) -> str:
+        """Return the compiled detection prompt, building it once per (descriptions version, model)"""
+        version = ''
+        if agent_descriptions:
+            version = hashlib.sha1(
+                json.dumps(agent_descriptions, sort_keys=True, ensure_ascii=False).encode('utf-8')
+            ).hexdigest()[:12]
+        key = (version, self.model_name)
+        prompt = self._prompt_cache.get(key)
+        if prompt is None:
+            prompt = self._create_agent_detection_prompt(agent_descriptions)
+            self._prompt_cache[key] = prompt
+            logger.debug("📝 Compiled agent prompt (%s characters) for %s", len(prompt), key)
+        return prompt
+    
+    def _agent_generation_config(self) -> dict:
+        """Generation settings for full-scoreboard detection"""
+        config = {
+            'temperature': 0.0,  # Zero temperature for deterministic, accurate results
+            'top_p': 0.9,        # Balanced for consistency
+            'top_k': 40,         # Standard value for balance
+        }
+        if self.model_name not in LEGACY_MODELS:
+            config['response_mime_type'] = 'application/json'
+            config['response_schema'] = self._agent_response_schema
+        return config
+    
+    def _load_image(self, image_path, task: str = 'agents') -> dict:
+        """
+        Turn a screenshot into an inline image part for Gemini
+        
+        Accepts a path, bytes, decoded array / IngestedImage or PIL Image. The image is
+        cropped, scaled and encoded once with the payload profile of `task` (see services/payload.py).
+        """
+        if isinstance(image_path, dict):
+            return image_path  # already an encoded part
+        if isinstance(image_path, Image.Image):
+            image_path = np.asarray(image_path.convert('RGB'))[..., ::-1]
+        payload = payloads.encode(image_path, task)
+        return {'mime_type': payload.mime_type, 'data': payload.data}
+    
+    def detect_agents_from_screenshot(self, image_path, agent_descriptions: dict = None) -> Dict[str, object]:
         """
         Detect agents from a Valorant scoreboard screenshot
         
         Args:
-            image_path: Path to the scoreboard screenshot
+            image_path: Path to the scoreboard screenshot, or an already decoded image (see image_ingest)
             agent_descriptions: Optional dict of agent descriptions from JSON file
             
         Returns:
-            List of 10 agent names in order from top to bottom
+            Dict with 'agents' (10 names, top to bottom) and 'map'
         """
         try:
-            # Load image
-            img = Image.open(image_path)
-            
-            # Resize if too large (Gemini has size limits)
-            max_size = 2048
-            if max(img.size) > max_size:
-                ratio = max_size / max(img.size)
-                new_size = tuple(int(dim * ratio) for dim in img.size)
-                img = img.resize(new_size, Image.Resampling.LANCZOS)
-                print(f"📐 Resized image to {new_size} for Gemini API")
-            
-            print(f"📏 Image size: {img.size}, Mode: {img.mode}")
-            
-            # Create highly specific prompt for agent detection (with optional extra descriptions)
-            prompt = self._create_agent_detection_prompt(agent_descriptions)
-            print(f"📝 Prompt length: {len(prompt)} characters")
-            print(f"🤖 Using model: {self.model._model_name if hasattr(self.model, '_model_name') else 'unknown'}")
+            img = self._load_image(image_path)
+            prompt = self._get_agent_prompt(agent_descriptions)
             
             # Generate content with image (with retry)
             max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    response = self.model.generate_content(
-                        [prompt, img],
-                        generation_config={
-                            'temperature': 0.0,  # Zero temperature for deterministic, accurate results
-                            'top_p': 0.9,        # Balanced for consistency
-                            'top_k': 40,         # Standard value for balance
-                        }
-                    )
-                    break
-                except Exception as e:
-                    if attempt < max_retries - 1:
-                        print(f"⚠️ Attempt {attempt + 1} failed, retrying... ({e})")
-                        import time
-                        time.sleep(1)
-                    else:
-                        raise
+            with payloads.measure('agents', len(img['data'])):
+                for attempt in range(max_retries):
+                    try:
+                        limiter.acquire_sync(GEMINI, 'agents')
+                        response = self.model.generate_content(
+                            [prompt, img],
+                            generation_config=self._agent_generation_config()
+                        )
+                        break
+                    except Exception as e:
+                        self._note_rate_limit(e)
+                        if attempt < max_retries - 1:
+                            logger.warning("⚠️ Attempt %s failed, retrying... (%s)", attempt + 1, e)
+                            time.sleep(1)
+                        else:
+                            raise
             
-            print(f"📤 Raw Gemini response length: {len(response.text)} characters")
-            print(f"📤 Raw response (first 500 chars):\n{response.text[:500]}\n")
+            return self._finish_agent_detection(response.text, img)
             
-            # Parse response
-            agents = self._parse_agent_response(response.text)
+        except Exception as e:
+            logger.exception("❌ Error detecting agents with Gemini Vision: %s", e)
+            return {'agents': ['Unknown'] * 10, 'map': 'Unknown'}
+    
+    async def detect_agents_from_screenshot_async(self, image_path, agent_descriptions: dict = None) -> Dict[str, object]:
+        """
+        Async version of detect_agents_from_screenshot using generate_content_async
+        
+        Args:
+            image_path: Path to the scoreboard screenshot, or an already decoded image (see image_ingest)
+            agent_descriptions: Optional dict of agent descriptions from JSON file
             
-            # Validate and normalize agent names
-            agents = self._validate_agents(agents)
+        Returns:
+            Dict with 'agents' (10 names, top to bottom) and 'map'
+        """
+        try:
+            model = await self._ensure_model_async()
+            img = await asyncio.to_thread(self._load_image, image_path)
+            prompt = self._get_agent_prompt(agent_descriptions)
             
-            # Detect map name from the same screenshot
-            map_name = self.detect_map_name(image_path)
+            max_retries = 3
+            with payloads.measure('agents', len(img['data'])):
+                for attempt in range(max_retries):
+                    try:
+                        await limiter.acquire(GEMINI, 'agents')
+                        response = await model.generate_content_async(
+                            [prompt, img],
+                            generation_config=self._agent_generation_config()
+                        )
+                        break
+                    except Exception as e:
+                        self._note_rate_limit(e)
+                        if attempt < max_retries - 1:
+                            logger.warning("⚠️ Attempt %s failed, retrying... (%s)", attempt + 1, e)
+                            await asyncio.sleep(1)
+                        else:
+                            raise
             
-            print(f"🎯 Detected agents: {agents}")
-            print(f"🗺️ Detected map: {map_name}")
-            return {'agents': agents, 'map': map_name}
+            # Off the loop: a missing map falls back to a blocking detect_map_name call
+            return await asyncio.to_thread(self._finish_agent_detection, response.text, img)
             
         except Exception as e:
-            print(f"❌ Error detecting agents with Gemini Vision: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error("❌ Error detecting agents with Gemini Vision: %s", e)
             return {'agents': ['Unknown'] * 10, 'map': 'Unknown'}
     
-    def detect_map_name(self, image_path: str) -> str:
+    def _finish_agent_detection(self, response_text: str, image_path) -> Dict[str, object]:
+        """Parse a detection response; only falls back to a separate map call if the map is missing"""
+        logger.debug("📤 Raw Gemini response length: %s characters", len(response_text))
+        
+        agents, map_name = self._parse_structured_response(response_text)
+        if map_name == 'Unknown':
+            map_name = self.detect_map_name(image_path)
+        
+        logger.info("🎯 Detected agents: %s", agents)
+        logger.info("🗺️ Detected map: %s", map_name)
+        return {'agents': agents, 'map': map_name}
+    
+    def detect_map_name(self, image_path, use_index: bool = True) -> str:
         """
         Detect the map name from the scoreboard screenshot
         
+        The local map index is tried first; Gemini is only asked when it has no clear match.
+        
         Args:
-            image_path: Path to the scoreboard screenshot
+            image_path: Path to the scoreboard screenshot, or an already decoded image / encoded part
+            use_index: False when the caller already tried map_index
             
         Returns:
             Map name in English (e.g., 'Ascent', 'Bind', etc.)
         """
+        if use_index:
+            try:
+                source = image_path
+                if isinstance(source, dict):
+                    source = source['data']  # encoded part: JPEG bytes
+                elif isinstance(source, Image.Image):
+                    source = np.asarray(source.convert('RGB'))[..., ::-1]
+                match = map_index.detect(source)
+                if match.name:
+                    logger.info("🗺️ Map from local index (%s): %s", match.method, match.name)
+                    return match.name
+            except Exception as e:
+                logger.warning("⚠️ Local map index failed: %s", e)
+        
         try:
-            img = Image.open(image_path)
-            
-            # Resize if needed
-            max_size = 2048
-            if max(img.size) > max_size:
-                ratio = max_size / max(img.size)
-                new_size = tuple(int(dim * ratio) for dim in img.size)
-                img = img.resize(new_size, Image.Resampling.LANCZOS)
-            
-            # Create prompt for map detection
-            prompt = f"""Analyze this VALORANT scoreboard screenshot and identify the map name.
-
-**AVAILABLE MAPS** (you may see Chinese or English names):
-
-Chinese Name → English Name:
-- 亚海悬城 → Ascent
-- 源工重镇 → Bind
-- 极寒冬港 → Icebox
-- 隐世修所 → Haven
-- 霓虹町 → Split
-- 微风岛屿 → Breeze
-- 裂变峡谷 → Fracture
-
-**TASK**: Look for the map name text on the scoreboard (usually at the top or near the score display).
-
-**OUTPUT**: Return ONLY the English map name from the list above, nothing else.
-
-Map name:"""
-            
-            response = self.model.generate_content(
-                [prompt, img],
-                generation_config={
-                    'temperature': 0.1,
-                    'top_p': 0.7,
-                    'top_k': 20,
-                }
-            )
+            img = self._load_image(image_path, task='map')
+            
+            with payloads.measure('map', len(img['data'])):
+                limiter.acquire_sync(GEMINI, 'map')
+                response = self.model.generate_content(
+                    [MAP_DETECTION_PROMPT, img],
+                    generation_config={
+                        'temperature': 0.1,
+                        'top_p': 0.7,
+                        'top_k': 20,
+                    }
+                )
             
             map_text = response.text.strip()
             print(f"🗺️ Raw map response: {map_text}")
@@ -221,6 +418,7 @@ Map name:"""
             return 'Unknown'
             
         except Exception as e:
+            self._note_rate_limit(e)
             print(f"❌ Error detecting map name: {e}")
             return 'Unknown'
     
@@ -234,52 +432,81 @@ Map name:"""
             return result['agents']
         return result
     
-    def detect_single_agent(self, image_path: str) -> Dict[str, any]:
+    def detect_single_agent(self, image_path) -> Dict[str, any]:
         """
         Detect a single agent from a cropped portrait image
-        Useful for manual correction or verification
+        Used by the hybrid cascade for slots the local detectors could not settle
         
         Args:
-            image_path: Path to cropped agent portrait
+            image_path: Path to cropped agent portrait, or an already cropped image (array or PIL)
             
         Returns:
             Dict with 'agent' name and 'confidence' score
         """
         try:
-            img = Image.open(image_path)
-            
-            prompt = f"""Identify this VALORANT agent from their portrait icon.
-
-**AVAILABLE AGENTS**:
-{', '.join(self.agent_list)}
-
-**INSTRUCTIONS**:
-Look at the portrait's distinctive features:
-- Hair color and style
-- Face features and expression
-- Color scheme (primary colors)
-- Unique visual elements or accessories
-- Character ethnicity/appearance
-
-**OUTPUT**: Return ONLY the agent name, nothing else. Choose from the list above.
-Agent name:"""
+            img = self._load_image(image_path, task='agent_icon')
             
-            response = self.model.generate_content([prompt, img])
-            agent = response.text.strip()
+            with payloads.measure('agent_icon', len(img['data'])):
+                limiter.acquire_sync(GEMINI, 'agent_icon')
+                response = self.model.generate_content([self._single_agent_prompt, img])
+            raw_agent = response.text.strip()
             
             # Validate agent name
-            agent = self._normalize_agent_name(agent)
+            agent = self._normalize_agent_name(raw_agent)
             
             if agent in self.agent_list:
                 return {'agent': agent, 'confidence': 0.95}
             else:
-                print(f"⚠️ Unknown agent detected: {agent}")
+                logger.warning("⚠️ Unknown agent detected: %s", raw_agent)
                 return {'agent': 'Unknown', 'confidence': 0.0}
                 
         except Exception as e:
+            self._note_rate_limit(e)
             print(f"❌ Error detecting single agent: {e}")
             return {'agent': 'Unknown', 'confidence': 0.0}
     
+    def detect_agents_in_crops(self, crops: list) -> List[str]:
+        """
+        Identify the agent in each of several cropped portraits with a single request
+        Used by the hybrid cascade for the slots the local detectors could not settle
+        
+        Args:
+            crops: Cropped agent portraits (arrays, PIL images or paths), in slot order
+            
+        Returns:
+            One agent name per crop ('Unknown' where it could not be identified)
+        """
+        if not crops:
+            return []
+        try:
+            images = [self._load_image(crop, task='agent_icon') for crop in crops]
+            parts = [self._multi_agent_prompt]
+            for number, img in enumerate(images, 1):
+                parts += [f"Portrait {number}:", img]
+            
+            config = {'temperature': 0.0}
+            if self.model_name not in LEGACY_MODELS:
+                config['response_mime_type'] = 'application/json'
+                config['response_schema'] = self._multi_agent_response_schema
+            
+            with payloads.measure('agent_icon', sum(len(img['data']) for img in images)):
+                limiter.acquire_sync(GEMINI, 'agent_icon')
+                response = self.model.generate_content(parts, generation_config=config)
+            
+            text = response.text.strip().strip('`').strip()
+            if text.startswith('json'):
+                text = text[4:]
+            data = json.loads(text)
+            if isinstance(data, dict):
+                data = data.get('agents') or []
+        except Exception as e:
+            self._note_rate_limit(e)
+            logger.warning("❌ Error detecting agents in %s portraits: %s", len(crops), e)
+            return ['Unknown'] * len(crops)
+        
+        names = [self._normalize_agent_name(str(name)) for name in data[:len(crops)]]
+        return names + ['Unknown'] * (len(crops) - len(names))
+    
     def _create_agent_detection_prompt(self, agent_descriptions: dict = None) -> str:
         """Create the detailed prompt for agent detection with comprehensive visual descriptions"""
         
@@ -538,9 +765,11 @@ Go through each agent you identified and verify:
 
 **If ANY verification fails, change your answer to "Unknown" for that player!**
 
-**OUTPUT FORMAT** - Return ONLY a JSON array:
+**MAP**: Also read the map name shown on the scoreboard (Chinese names: {', '.join(f'{cn} = {en}' for cn, en in self.map_names.items())}).
+
+**OUTPUT FORMAT** - Return ONLY a JSON object:
 ```json
-["Agent1", "Agent2", "Agent3", "Agent4", "Agent5", "Agent6", "Agent7", "Agent8", "Agent9", "Agent10"]
+{{"agents": ["Agent1", "Agent2", "Agent3", "Agent4", "Agent5", "Agent6", "Agent7", "Agent8", "Agent9", "Agent10"], "map": "Ascent"}}
 ```
 
 **STRICT RULES**:
@@ -548,6 +777,7 @@ Go through each agent you identified and verify:
 - Use exact agent names (case-sensitive)
 - If portrait unclear → "Unknown"
 - If doesn't match descriptions → "Unknown"
+- Map must be one of: {', '.join(self.english_map_names)} or "Unknown"
 - If uncertain between two agents → "Unknown"
 - DO NOT guess or make assumptions
 - Better "Unknown" than wrong
@@ -559,123 +789,58 @@ Go through each agent you identified and verify:
 
 Begin detection now:"""
     
-    def _parse_agent_response(self, response_text: str) -> List[str]:
-        """Parse Gemini's response to extract agent list"""
+    def _parse_structured_response(self, response_text: str) -> Tuple[List[str], str]:
+        """
+        Parse a JSON detection response into (agents, map)
+        
+        Accepts the schema object ({"agents": [...], "map": "..."}) or, from legacy
+        models, a bare array optionally wrapped in a markdown code block.
+        """
+        text = response_text.strip()
+        if text.startswith('```'):
+            text = text.strip('`').strip()
+            if text.startswith('json'):
+                text = text[4:]
+        
         try:
-            text = response_text.strip()
-            
-            # Remove markdown code blocks
-            if '```json' in text:
-                text = text.split('```json')[1].split('```')[0].strip()
-            elif '```' in text:
-                text = text.split('```')[1].split('```')[0].strip()
-            
-            # Try to find JSON array
-            # Look for pattern: ["Agent1", "Agent2", ...]
-            json_match = re.search(r'\[.*?\]', text, re.DOTALL)
-            if json_match:
-                text = json_match.group(0)
-            
-            # Parse JSON
-            agents = json.loads(text)
-            
-            if not isinstance(agents, list):
-                print(f"⚠️ Response is not a list: {agents}")
-                return ['Unknown'] * 10
-            
-            return agents
-            
+            data = json.loads(text)
         except json.JSONDecodeError as e:
             print(f"❌ Failed to parse JSON response: {e}")
             print(f"Raw response: {response_text[:200]}")
-            
-            # Fallback: try to extract agent names manually
-            agents = []
-            for agent in self.agent_list:
-                if agent in response_text:
-                    agents.append(agent)
-            
-            if len(agents) >= 10:
-                return agents[:10]
-            
-            return ['Unknown'] * 10
-        except Exception as e:
-            print(f"❌ Error parsing response: {e}")
-            return ['Unknown'] * 10
+            return ['Unknown'] * 10, 'Unknown'
+        
+        if isinstance(data, dict):
+            agents = data.get('agents') or []
+            map_name = data.get('map') or 'Unknown'
+        elif isinstance(data, list):
+            agents, map_name = data, 'Unknown'
+        else:
+            logger.warning("⚠️ Unexpected response type: %s", type(data).__name__)
+            return ['Unknown'] * 10, 'Unknown'
+        
+        map_name = self.map_names.get(map_name, map_name)
+        if map_name not in self.english_map_names:
+            map_name = 'Unknown'
+        
+        return self._validate_agents(agents), map_name
     
     def _validate_agents(self, agents: List[str]) -> List[str]:
         """Validate and normalize agent names - allow duplicates (they can happen in real games)"""
-        validated = []
-        agent_counts = {}
-        
-        for i, agent in enumerate(agents):
-            normalized = self._normalize_agent_name(agent)
-            
-            # Exact match required - no fuzzy matching to avoid false positives
-            if normalized in self.agent_list:
-                # Track duplicates but don't reject them (duplicates are possible)
-                if normalized in agent_counts:
-                    agent_counts[normalized] += 1
-                    validated.append(normalized)
-                    print(f"   ✅ Player {i+1}: {normalized} (duplicate #{agent_counts[normalized]} - acceptable)")
-                else:
-                    agent_counts[normalized] = 1
-                    validated.append(normalized)
-                    print(f"   ✅ Player {i+1}: {normalized}")
-                    
-            elif normalized.lower() == 'unknown':
-                # Explicitly marked as unknown
-                validated.append('Unknown')
-                print(f"   ❓ Player {i+1}: Unknown (AI uncertain)")
-            else:
-                # Strict: Only allow exact matches from agent list
-                # Try case-insensitive match ONE time only
-                found = False
-                for valid_agent in self.agent_list:
-                    if normalized.lower() == valid_agent.lower():
-                        # Track duplicates for case-corrected agents too
-                        if valid_agent in agent_counts:
-                            agent_counts[valid_agent] += 1
-                            validated.append(valid_agent)
-                            print(f"   ⚠️ Player {i+1}: {valid_agent} (case corrected, duplicate #{agent_counts[valid_agent]} - acceptable)")
-                        else:
-                            agent_counts[valid_agent] = 1
-                            validated.append(valid_agent)
-                            print(f"   ⚠️ Player {i+1}: {valid_agent} (case corrected)")
-                        found = True
-                        break
-                
-                if not found:
-                    validated.append('Unknown')
-                    print(f"   ❌ Player {i+1}: '{agent}' is invalid -> Unknown")
-        
-        # Ensure we have exactly 10 agents
-        while len(validated) < 10:
-            validated.append('Unknown')
+        validated = [
+            self._agent_lookup.get(str(agent).strip().strip('"').strip("'").lower(), 'Unknown')
+            for agent in agents[:10]
+        ]
+        validated += ['Unknown'] * (10 - len(validated))
         
-        # Final sanity check: log duplicate summary
-        duplicate_agents = {agent: count for agent, count in agent_counts.items() if count >= 2}
-        if duplicate_agents:
-            print(f"   📊 Duplicate summary: {duplicate_agents}")
+        invalid = [agent for agent, valid in zip(agents, validated) if valid == 'Unknown' and str(agent).lower() != 'unknown']
+        if invalid:
+            logger.warning("   ❌ Invalid agent names -> Unknown: %s", invalid)
         
-        return validated[:10]
+        return validated
     
     def _normalize_agent_name(self, agent: str) -> str:
-        """Normalize agent name (trim, handle special cases)"""
-        agent = agent.strip().strip('"').strip("'")
-        
-        # Handle common variations
-        variations = {
-            'kay/o': 'KAY/O',
-            'kayo': 'KAY/O',
-            'kay-o': 'KAY/O',
-        }
-        
-        agent_lower = agent.lower()
-        if agent_lower in variations:
-            return variations[agent_lower]
-        
-        return agent
+        """Normalize agent name to its exact spelling ('Unknown' if not an agent)"""
+        return self._agent_lookup.get(agent.strip().strip('"').strip("'").lower(), 'Unknown')
     
     def get_supported_agents(self) -> List[str]:
         """Get list of all supported agents"""
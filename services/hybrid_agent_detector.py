@@ -1,23 +1,56 @@
 """
-Hybrid Agent Detector - Combines YOLO + JSON Descriptions for 100% Accuracy
-Uses YOLO for initial detection, then validates with detailed agent descriptions
+Hybrid Agent Detector - Combines Template Matching + YOLO + Gemini for 100% Accuracy
+Runs a per-slot cascade: cheap local stages first, remote model only for the hard slots
 """
 
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 import json
+import logging
+import time
+
+from services import tracing
+from services.map_index import map_index
+
+logger = logging.getLogger(__name__)
 
 # ============================================================================
-# CONFIGURATION: YOLO Detection Confidence
+# CONFIGURATION: Cascade Confidence
 # ============================================================================
 # Adjust this value to control YOLO detection sensitivity:
 #   - 0.15-0.20: Very sensitive, more detections (may include false positives)
 #   - 0.25-0.30: Balanced (recommended for most cases)
 #   - 0.35-0.50: Conservative, only high-confidence detections
 YOLO_CONFIDENCE_THRESHOLD = 0.40  # Higher threshold to reduce fake detections
-FORCE_GEMINI_VALIDATION = True  # Always validate with Gemini for 100% accuracy
+# Template matching score a slot needs before it is accepted without escalation
+TEMPLATE_CONFIDENCE_THRESHOLD = 0.80
+# When True every slot is sent to Gemini, even if a local stage was confident
+FORCE_GEMINI_VALIDATION = False
+# Unresolved icon crops go to Gemini in one request; past this many, one
+# full-screenshot call is made instead (it also reads the map)
+GEMINI_MAX_CROPS = 6
 # ============================================================================
 
+CASCADE_STAGES = ('template', 'yolo', 'gemini')
+
+# Canonical agent spelling (matches GeminiAgentDetector.agent_list)
+AGENT_NAMES = [
+    'Astra', 'Breach', 'Brimstone', 'Chamber', 'Clove', 'Cypher',
+    'Deadlock', 'Fade', 'Gekko', 'Harbor', 'Iso', 'Jett',
+    'KAY/O', 'Killjoy', 'Neon', 'Omen', 'Phoenix', 'Raze',
+    'Reyna', 'Sage', 'Skye', 'Sova', 'Viper', 'Vyse', 'Yoru'
+]
+_AGENT_LOOKUP = {''.join(c for c in name.lower() if c.isalnum()): name for name in AGENT_NAMES}
+_AGENT_LOOKUP['harbour'] = 'Harbor'
+_AGENT_LOOKUP['pheonix'] = 'Phoenix'
+
+try:
+    from services.image_ingest import load_image
+    from services.template_agent_detector import TemplateAgentDetector
+    TEMPLATE_AVAILABLE = True
+except ImportError:
+    TEMPLATE_AVAILABLE = False
+
 try:
     from services.yolo_agent_detector import YOLOAgentDetector
     YOLO_AVAILABLE = True
@@ -31,199 +64,348 @@ except ImportError:
     GEMINI_AVAILABLE = False
 
 
+def canonical_agent_name(name: Optional[str]) -> str:
+    """Map detector-specific spellings ('kayo', 'harbour', ...) to the canonical agent name"""
+    if not name:
+        return 'Unknown'
+    key = ''.join(c for c in str(name).lower() if c.isalnum())
+    return _AGENT_LOOKUP.get(key, 'Unknown')
+
+
 class HybridAgentDetector:
-    """Combines YOLO detection with JSON description validation for maximum accuracy"""
-    
-    def __init__(self, yolo_detector=None, gemini_detector=None, json_path: str = None):
+    """Cascades template matching -> YOLO -> Gemini per slot for maximum accuracy at minimum cost"""
+
+    def __init__(self, yolo_detector=None, gemini_detector=None, json_path: str = None,
+                 template_detector=None):
         """
         Initialize hybrid detector
-        
+
         Args:
             yolo_detector: YOLOAgentDetector instance (optional)
             gemini_detector: GeminiAgentDetector instance (optional)
             json_path: Path to agent_descriptions.json
+            template_detector: TemplateAgentDetector instance (optional)
         """
         self.yolo_detector = yolo_detector
         self.gemini_detector = gemini_detector
-        
+        self.template_detector = template_detector
+
         # Load agent descriptions
         if json_path is None:
             json_path = Path(__file__).parent.parent / "data" / "agent_descriptions.json"
-        
+
         self.agent_descriptions = self._load_descriptions(str(json_path))
-        print(f"✅ Loaded {len(self.agent_descriptions)} agent descriptions")
-    
+        logger.info("✅ Loaded %s agent descriptions", len(self.agent_descriptions))
+
+        self.stage_stats = {}
+        self.reset_stage_stats()
+
     def _load_descriptions(self, json_path: str) -> Dict[str, str]:
         """Load agent descriptions from JSON file"""
         try:
             with open(json_path, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except Exception as e:
-            print(f"⚠️ Failed to load agent descriptions: {e}")
+            logger.warning("⚠️ Failed to load agent descriptions: %s", e)
             return {}
-    
-    def detect_agents_from_screenshot(self, image_path: str, yolo_confidence: float = None) -> Dict[str, Any]:
+
+    def reset_stage_stats(self):
+        """Clear the per-stage latency / hit-rate counters"""
+        self.stage_stats = {
+            stage: {'runs': 0, 'slots_in': 0, 'hits': 0, 'total_ms': 0.0}
+            for stage in CASCADE_STAGES
+        }
+        self.stage_stats['screenshots'] = {'total': 0, 'local_only': 0, 'total_ms': 0.0}
+
+    def get_stage_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Summarize cascade performance since the last reset
+
+        Returns:
+            Dict per stage with runs, slots sent in, hits, hit_rate and avg_ms,
+            plus a 'screenshots' entry with the share resolved without a remote call
+        """
+        summary = {}
+        for stage in CASCADE_STAGES:
+            s = self.stage_stats[stage]
+            summary[stage] = {
+                'runs': s['runs'],
+                'slots_in': s['slots_in'],
+                'hits': s['hits'],
+                'hit_rate': s['hits'] / s['slots_in'] if s['slots_in'] else 0.0,
+                'avg_ms': s['total_ms'] / s['runs'] if s['runs'] else 0.0,
+            }
+        shots = self.stage_stats['screenshots']
+        summary['screenshots'] = {
+            'total': shots['total'],
+            'local_only': shots['local_only'],
+            'local_rate': shots['local_only'] / shots['total'] if shots['total'] else 0.0,
+            'avg_ms': shots['total_ms'] / shots['total'] if shots['total'] else 0.0,
+        }
+        return summary
+
+    def _record_stage(self, stage: str, slots_in: int, hits: int, started: float):
+        """Add one stage run to the counters"""
+        tracing.record(f"detector.{stage}", time.perf_counter() - started)
+        s = self.stage_stats[stage]
+        s['runs'] += 1
+        s['slots_in'] += slots_in
+        s['hits'] += hits
+        s['total_ms'] += (time.perf_counter() - started) * 1000
+
+    def detect_agents_from_screenshot(self, image_path, yolo_confidence: float = None) -> Dict[str, Any]:
         """
-        Detect agents using hybrid approach:
-        1. YOLO for initial detection (fast, accurate positions)
-        2. Gemini with descriptions for validation (high accuracy)
-        3. Combine results for best of both
-        
+        Detect agents using a per-slot confidence cascade:
+        1. Template matching on each icon crop (local, a few ms)
+        2. YOLO only if some slots are still below threshold (local)
+        3. Gemini on the cropped icons of the slots still unresolved, in one request (remote)
+        The map comes from map_index; Gemini is only asked when it has no clear match.
+
         Args:
-            image_path: Path to screenshot
-            yolo_confidence: YOLO confidence threshold (0.0-1.0). 
-                            If None, uses YOLO_CONFIDENCE_THRESHOLD constant (default: 0.25)
+            image_path: Path to screenshot, or an already decoded image (see image_ingest)
+            yolo_confidence: YOLO confidence threshold (0.0-1.0).
+                            If None, uses YOLO_CONFIDENCE_THRESHOLD constant (default: 0.40)
                             - Lower (0.15-0.25): More detections, may include false positives
                             - Higher (0.3-0.5): Fewer but more confident detections
-        
+
         Returns:
-            Dictionary with 'agents' list and 'map' name
+            Dictionary with 'agents' list, 'map' name, per-slot 'confidences' and 'sources',
+            and per-stage 'stage_ms' timings for this screenshot
         """
         # Use global constant if not specified
         if yolo_confidence is None:
             yolo_confidence = YOLO_CONFIDENCE_THRESHOLD
-        
-        detected_agents = ['Unknown'] * 10
+
+        started = time.perf_counter()
+        agents = ['Unknown'] * 10
+        confidences = [0.0] * 10
+        sources = [None] * 10
+        stage_ms = {}
         detected_map = 'Unknown'
-        yolo_results = None
-        gemini_results = None
-        
-        # Step 1: Try YOLO detection (lower confidence for more detections)
-        if self.yolo_detector:
+        map_checked = False  # map_index already run (YOLO runs it too)
+        map_remote = False
+        yolo_agents = None
+        gemini_agents = None
+
+        # Decode the screenshot once; every stage works on it or on zero-copy crops of it
+        image = image_path
+        regions = None
+        if TEMPLATE_AVAILABLE:
+            try:
+                image = load_image(image_path)
+            except ValueError as e:
+                logger.warning("⚠️ Failed to load image for cascade: %s", e)
+                image = image_path
+            else:
+                if self.template_detector:
+                    height, width = image.shape[:2]
+                    regions = self.template_detector.get_agent_icon_regions(height, width)
+
+        def pending() -> List[int]:
+            if FORCE_GEMINI_VALIDATION:
+                return [i for i in range(10) if sources[i] != 'gemini']
+            return [i for i in range(10) if agents[i] == 'Unknown']
+
+        # Stage 1: Template matching per slot
+        if regions is not None:
+            stage_start = time.perf_counter()
+            hits = 0
+            for region in regions:
+                slot = region['slot']
+                x, y, w, h = region['x'], region['y'], region['width'], region['height']
+                match = self.template_detector.match_template(image[y:y+h, x:x+w], threshold=0.0)
+                if not match:
+                    continue
+                name, score = match
+                name = canonical_agent_name(name)
+                if name != 'Unknown' and score >= TEMPLATE_CONFIDENCE_THRESHOLD:
+                    agents[slot] = name
+                    confidences[slot] = float(score)
+                    sources[slot] = 'template'
+                    hits += 1
+            self._record_stage('template', 10, hits, stage_start)
+            stage_ms['template'] = (time.perf_counter() - stage_start) * 1000
+            logger.debug("🧩 Template stage resolved %s/10 slots in %.0fms", hits, stage_ms['template'])
+
+        # Stage 2: YOLO for the slots still below threshold
+        todo = [i for i in range(10) if agents[i] == 'Unknown']
+        if todo and self.yolo_detector:
+            stage_start = time.perf_counter()
+            hits = 0
             try:
-                print(f"🎯 Running YOLO detection (confidence: {yolo_confidence})...")
+                logger.debug("🎯 Running YOLO for %s slot(s) (confidence: %s)...", len(todo), yolo_confidence)
                 yolo_results = self.yolo_detector.detect_agents_from_screenshot(
-                    image_path, 
+                    image,
                     confidence_threshold=yolo_confidence
                 )
-                yolo_agents = yolo_results.get('agents', ['Unknown'] * 10)
-                yolo_map = yolo_results.get('map', 'Unknown')
-                print(f"   YOLO detected: {yolo_agents}")
-                
-                # Check if YOLO detection is confident enough AND force validation is disabled
-                unknown_count = yolo_agents.count('Unknown')
-                if unknown_count == 0 and not FORCE_GEMINI_VALIDATION:
-                    print("✅ YOLO detection complete with high confidence - skipping Gemini for speed")
-                    detected_agents = yolo_agents
-                    detected_map = yolo_map
-                    return {
-                        'agents': detected_agents,
-                        'map': detected_map,
-                        'yolo_detections': yolo_agents,
-                        'gemini_detections': [],
-                        'confidence': 0.90  # YOLO-only confidence
-                    }
-                elif FORCE_GEMINI_VALIDATION:
-                    print(f"🔍 YOLO found {10-unknown_count}/10 agents - running Gemini validation for maximum accuracy")
-                elif unknown_count <= 2:
-                    print(f"⚠️ YOLO found {unknown_count} unknowns - running Gemini only for validation")
+                yolo_agents = self._assign_yolo_slots(yolo_results, regions)
+                detected_map = yolo_results.get('map', 'Unknown')
+                map_checked = True
+                for i in todo:
+                    name, score = yolo_agents[i]
+                    if name != 'Unknown':
+                        agents[i] = name
+                        confidences[i] = score
+                        sources[i] = 'yolo'
+                        hits += 1
             except Exception as e:
-                print(f"⚠️ YOLO detection failed: {e}")
-                yolo_agents = ['Unknown'] * 10
-        else:
-            yolo_agents = ['Unknown'] * 10
-        
-        # Step 2: Run Gemini with detailed descriptions for validation
-        if self.gemini_detector:
+                logger.warning("⚠️ YOLO detection failed: %s", e)
+            self._record_stage('yolo', len(todo), hits, stage_start)
+            stage_ms['yolo'] = (time.perf_counter() - stage_start) * 1000
+            logger.debug("   YOLO resolved %s/%s remaining slots in %.0fms", hits, len(todo), stage_ms['yolo'])
+
+        # Stage 3: Gemini only for what the local stages could not settle
+        todo = pending()
+        if todo and self.gemini_detector:
+            stage_start = time.perf_counter()
+            hits = 0
             try:
-                print("🌟 Running Gemini detection with descriptions...")
-                
-                # Build prompt with agent descriptions
-                description_text = "\n".join([
-                    f"- {name}: {desc}" 
-                    for name, desc in self.agent_descriptions.items()
-                ])
-                
-                # Use Gemini with enhanced prompt
-                gemini_results = self.gemini_detector.detect_agents_from_screenshot(
-                    image_path,
-                    agent_descriptions=self.agent_descriptions
-                )
-                
-                if isinstance(gemini_results, dict):
-                    gemini_agents = gemini_results.get('agents', ['Unknown'] * 10)
-                    detected_map = gemini_results.get('map', 'Unknown')
+                if regions is not None and len(todo) <= GEMINI_MAX_CROPS:
+                    logger.debug("🌟 Running Gemini on %s cropped icon(s) in one request...", len(todo))
+                    crops = []
+                    for i in todo:
+                        region = regions[i]
+                        x, y, w, h = region['x'], region['y'], region['width'], region['height']
+                        crops.append(image[y:y+h, x:x+w])
+                    gemini_agents = dict(zip(todo, self.gemini_detector.detect_agents_in_crops(crops)))
+                    for i in todo:
+                        if gemini_agents[i] != 'Unknown':
+                            agents[i] = gemini_agents[i]
+                            confidences[i] = 0.95
+                            sources[i] = 'gemini'
+                            hits += 1
                 else:
-                    gemini_agents = gemini_results if isinstance(gemini_results, list) else ['Unknown'] * 10
-                
-                print(f"   Gemini detected: {gemini_agents}")
-                
-                # Quality check: Reject obviously bad Gemini results
-                gemini_quality_ok = self._check_detection_quality(gemini_agents, "Gemini")
-                if not gemini_quality_ok:
-                    print("⚠️ Gemini detection quality is poor, falling back to YOLO only")
-                    gemini_agents = ['Unknown'] * 10
-                    
+                    # No icon regions, or most slots unresolved - one full-screenshot call
+                    logger.debug("🌟 Running Gemini detection with descriptions...")
+                    gemini_results = self.gemini_detector.detect_agents_from_screenshot(
+                        image,
+                        agent_descriptions=self.agent_descriptions
+                    )
+                    full = gemini_results.get('agents', ['Unknown'] * 10)
+                    detected_map = gemini_results.get('map', 'Unknown')
+                    if not self._check_detection_quality(full, "Gemini"):
+                        logger.warning("⚠️ Gemini detection quality is poor, keeping local results only")
+                        full = ['Unknown'] * 10
+                    gemini_agents = {i: full[i] for i in todo}
+                    for i in todo:
+                        if full[i] != 'Unknown':
+                            agents[i] = full[i]
+                            confidences[i] = 0.90
+                            sources[i] = 'gemini'
+                            hits += 1
             except Exception as e:
-                print(f"⚠️ Gemini detection failed: {e}")
-                gemini_agents = ['Unknown'] * 10
-        else:
-            gemini_agents = ['Unknown'] * 10
-        
-        # Quality check YOLO results too
-        if yolo_agents:
-            yolo_quality_ok = self._check_detection_quality(yolo_agents, "YOLO")
-            if not yolo_quality_ok:
-                print("⚠️ YOLO detection quality is poor")
-                yolo_agents = ['Unknown'] * 10
-        
-        # Step 3: Combine results - prioritize Gemini (more accurate with descriptions)
-        # but use YOLO to fill gaps
-        for i in range(10):
-            if gemini_agents[i] != 'Unknown':
-                detected_agents[i] = gemini_agents[i]
-            elif yolo_agents[i] != 'Unknown':
-                detected_agents[i] = yolo_agents[i]
-            else:
-                detected_agents[i] = 'Unknown'
-        
-        print(f"✅ Final hybrid result: {detected_agents}")
-        
+                logger.warning("⚠️ Gemini detection failed: %s", e)
+            self._record_stage('gemini', len(todo), hits, stage_start)
+            stage_ms['gemini'] = (time.perf_counter() - stage_start) * 1000
+            logger.debug("   Gemini resolved %s/%s hard slots in %.0fms", hits, len(todo), stage_ms['gemini'])
+
+        # Map name: local index (banner text / map art), Gemini only if it has no clear match
+        if detected_map == 'Unknown' and not map_checked:
+            try:
+                detected_map = map_index.detect_name(image)
+            except Exception as e:
+                logger.warning("⚠️ Local map detection failed: %s", e)
+        if detected_map == 'Unknown' and self.gemini_detector:
+            try:
+                map_remote = True
+                detected_map = self.gemini_detector.detect_map_name(image, use_index=False)
+            except Exception as e:
+                logger.warning("⚠️ Map detection failed: %s", e)
+
+        total_ms = (time.perf_counter() - started) * 1000
+        shots = self.stage_stats['screenshots']
+        shots['total'] += 1
+        shots['total_ms'] += total_ms
+        if 'gemini' not in stage_ms and not map_remote:
+            shots['local_only'] += 1
+
+        self._check_detection_quality(agents, "Cascade")
+        logger.info("✅ Final hybrid result: %s (%.0fms, sources: %s)", agents, total_ms, sources)
+
+        known = [c for c in confidences if c > 0]
         return {
-            'agents': detected_agents,
+            'agents': agents,
             'map': detected_map,
-            'yolo_detections': yolo_agents if yolo_results else None,
-            'gemini_detections': gemini_agents if gemini_results else None
+            'confidences': confidences,
+            'sources': sources,
+            'stage_ms': stage_ms,
+            'yolo_detections': [name for name, _ in yolo_agents] if yolo_agents else None,
+            'gemini_detections': [gemini_agents.get(i, 'Unknown') for i in range(10)] if gemini_agents else None,
+            'confidence': min(known) if len(known) == 10 else 0.0
         }
-    
+
+    def _assign_yolo_slots(self, yolo_results: Dict[str, Any], regions: Optional[List[Dict]]) -> List[tuple]:
+        """
+        Map raw YOLO detections to scoreboard slots
+
+        Uses the icon regions (by box center Y) when known, otherwise top-to-bottom order.
+        Keeps the most confident detection per slot.
+
+        Returns:
+            List of 10 (agent_name, confidence) tuples
+        """
+        slots = [('Unknown', 0.0)] * 10
+        detections = yolo_results.get('detections') or []
+
+        if not detections:
+            # Older detector output without raw detections
+            return [(canonical_agent_name(a), 0.5 if a != 'Unknown' else 0.0)
+                    for a in (yolo_results.get('agents') or ['Unknown'] * 10)[:10]]
+
+        for order, det in enumerate(sorted(detections, key=lambda d: d['y_position'])):
+            if regions is not None:
+                center_y = det['y_position']
+                slot = next((r['slot'] for r in regions
+                             if r['y'] <= center_y <= r['y'] + r['height']), None)
+            else:
+                slot = order if order < 10 else None
+            if slot is None:
+                continue
+            name = canonical_agent_name(det['agent'])
+            if name != 'Unknown' and det['confidence'] > slots[slot][1]:
+                slots[slot] = (name, float(det['confidence']))
+
+        return slots
+
     def _check_detection_quality(self, agents: list, source: str) -> bool:
         """
         Check if detection results are reasonable quality
         Returns False if results are obviously wrong
         """
         if not agents or len(agents) != 10:
-            print(f"   ❌ {source}: Wrong number of agents ({len(agents) if agents else 0})")
+            logger.debug("   ❌ %s: Wrong number of agents (%s)", source, len(agents) if agents else 0)
             return False
-        
+
         # Count unknowns
         unknown_count = agents.count('Unknown')
         if unknown_count >= 8:
-            print(f"   ❌ {source}: Too many unknowns ({unknown_count}/10)")
+            logger.debug("   ❌ %s: Too many unknowns (%s/10)", source, unknown_count)
             return False
-        
+
         # Check for suspicious patterns (same agent repeated too many times)
         from collections import Counter
         agent_counts = Counter([a for a in agents if a != 'Unknown'])
-        
+
         if agent_counts:
             most_common_agent, count = agent_counts.most_common(1)[0]
             if count >= 5:
-                print(f"   ❌ {source}: Same agent '{most_common_agent}' appears {count} times (likely hallucination)")
+                logger.debug("   ❌ %s: Same agent '%s' appears %s times (likely hallucination)", source, most_common_agent, count)
                 return False
-        
-        print(f"   ✅ {source}: Quality check passed ({10-unknown_count}/10 detected)")
+
+        logger.debug("   ✅ %s: Quality check passed (%s/10 detected)", source, 10 - unknown_count)
         return True
 
 
-def get_hybrid_agent_detector(yolo_detector=None, gemini_detector=None) -> HybridAgentDetector:
+def get_hybrid_agent_detector(yolo_detector=None, gemini_detector=None, template_detector=None) -> HybridAgentDetector:
     """
     Factory function to create hybrid detector
-    
+
     Args:
         yolo_detector: YOLOAgentDetector instance (optional)
         gemini_detector: GeminiAgentDetector instance (optional)
-    
+        template_detector: TemplateAgentDetector instance (optional)
+
     Returns:
         HybridAgentDetector instance
     """
-    return HybridAgentDetector(yolo_detector, gemini_detector)
+    return HybridAgentDetector(yolo_detector, gemini_detector, template_detector=template_detector)
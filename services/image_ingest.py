@@ -0,0 +1,158 @@
+"""
+Image Ingest Service
+Decodes screenshots once into a NumPy array and shares that buffer with every consumer
+
+- Attachments are decoded straight from memory (no temp files)
+- Crops are zero-copy views into the same array
+- Remote APIs only get a downscaled JPEG/WebP, encoded once per size/format
+"""
+
+import asyncio
+import base64
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+# Defaults for remote vision payloads (JPEG keeps scoreboard text legible at this quality)
+DEFAULT_MAX_SIZE = 1600
+DEFAULT_FORMAT = 'jpeg'
+DEFAULT_QUALITY = 90
+
+_MIME_TYPES = {'jpeg': 'image/jpeg', 'webp': 'image/webp', 'png': 'image/png'}
+
+
+def decode_image(data: bytes) -> np.ndarray:
+    """Decode encoded image bytes into a BGR array (OpenCV channel order)"""
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Could not decode image data")
+    return image
+
+
+def downscale(image: np.ndarray, max_size: Optional[int]) -> np.ndarray:
+    """Shrink so the longest side is at most max_size; returns the same array if already small enough"""
+    height, width = image.shape[:2]
+    if not max_size or max(height, width) <= max_size:
+        return image
+    ratio = max_size / max(height, width)
+    # INTER_AREA is the right filter for downsampling and much cheaper than LANCZOS
+    return cv2.resize(image, (int(width * ratio), int(height * ratio)), interpolation=cv2.INTER_AREA)
+
+
+def encode_image(image: np.ndarray, fmt: str = DEFAULT_FORMAT, quality: int = DEFAULT_QUALITY,
+                 max_size: Optional[int] = None) -> Tuple[bytes, str]:
+    """
+    Encode a BGR array for upload
+
+    Returns:
+        (encoded_bytes, mime_type)
+    """
+    fmt = fmt.lower()
+    if fmt == 'jpg':
+        fmt = 'jpeg'
+    if fmt not in _MIME_TYPES:
+        raise ValueError(f"Unsupported image format: {fmt}")
+
+    params = []
+    if fmt == 'jpeg':
+        params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+    elif fmt == 'webp':
+        params = [cv2.IMWRITE_WEBP_QUALITY, quality]
+
+    ok, buffer = cv2.imencode(f'.{"jpg" if fmt == "jpeg" else fmt}', downscale(image, max_size), params)
+    if not ok:
+        raise ValueError(f"Could not encode image as {fmt}")
+    return buffer.tobytes(), _MIME_TYPES[fmt]
+
+
+class IngestedImage:
+    """A decoded screenshot shared by detectors, color sampling and remote API calls"""
+
+    def __init__(self, array: np.ndarray):
+        self.array = array
+        self._encoded: Dict[Tuple, Tuple[bytes, str]] = {}
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "IngestedImage":
+        return cls(decode_image(data))
+
+    @property
+    def height(self) -> int:
+        return self.array.shape[0]
+
+    @property
+    def width(self) -> int:
+        return self.array.shape[1]
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """(width, height), same order as PIL"""
+        return self.width, self.height
+
+    def rgb(self) -> np.ndarray:
+        """RGB view of the pixels (no copy)"""
+        return self.array[..., ::-1]
+
+    def crop(self, x: int, y: int, width: int, height: int) -> np.ndarray:
+        """Zero-copy view of a pixel region"""
+        return self.array[y:y + height, x:x + width]
+
+    def crop_relative(self, left: float, top: float, right: float, bottom: float) -> np.ndarray:
+        """Zero-copy view of a region given as fractions of the image size"""
+        return self.array[int(top * self.height):int(bottom * self.height),
+                          int(left * self.width):int(right * self.width)]
+
+    def encode(self, max_size: Optional[int] = DEFAULT_MAX_SIZE, fmt: str = DEFAULT_FORMAT,
+               quality: int = DEFAULT_QUALITY,
+               region: Optional[Tuple[float, float, float, float]] = None) -> Tuple[bytes, str]:
+        """
+        Downscaled, encoded copy for remote APIs; computed once per (size, format, quality, region)
+
+        region: optional (left, top, right, bottom) fractions to crop to before scaling
+        """
+        key = (max_size, fmt, quality, region)
+        if key not in self._encoded:
+            pixels = self.crop_relative(*region) if region else self.array
+            self._encoded[key] = encode_image(pixels, fmt, quality, max_size)
+        return self._encoded[key]
+
+    def encode_base64(self, max_size: Optional[int] = DEFAULT_MAX_SIZE, fmt: str = DEFAULT_FORMAT,
+                      quality: int = DEFAULT_QUALITY,
+                      region: Optional[Tuple[float, float, float, float]] = None) -> Tuple[str, str]:
+        """Like encode(), but base64 text for JSON payloads. Returns (data, mime_type)"""
+        data, mime_type = self.encode(max_size, fmt, quality, region)
+        return base64.b64encode(data).decode('ascii'), mime_type
+
+
+ImageSource = Union[IngestedImage, np.ndarray, bytes, str, Path]
+
+
+def load_image(source: ImageSource) -> np.ndarray:
+    """
+    Accept any supported image source and return the BGR array
+
+    Arrays and IngestedImage are passed through untouched, bytes are decoded,
+    and paths are read from disk (kept for scripts and tools).
+    """
+    if isinstance(source, IngestedImage):
+        return source.array
+    if isinstance(source, np.ndarray):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return decode_image(bytes(source))
+    image = cv2.imread(str(source))
+    if image is None:
+        raise ValueError(f"Failed to load image: {source}")
+    return image
+
+
+async def ingest_bytes(data: bytes) -> IngestedImage:
+    """Decode off the event loop"""
+    return await asyncio.to_thread(IngestedImage.from_bytes, data)
+
+
+async def ingest_attachment(attachment) -> IngestedImage:
+    """Read a discord.Attachment into memory and decode it once"""
+    return await ingest_bytes(await attachment.read())
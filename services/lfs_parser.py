@@ -0,0 +1,171 @@
+"""
+LFS Post Parser
+Grammar for "looking for scrim" posts, shared by the scrim cog and its benchmark
+
+Supported formats:
+    LFS BO3 7PM IST APAC          (1 line: LFS FORMAT TIME REGION)
+    LFS BO3                       (2 lines: LFS FORMAT, then TIME, REGION)
+    7PM IST, APAC
+
+- Patterns are compiled once at import
+- Chatter that does not start with "LFS" is rejected with a prefix check,
+  before any regex runs
+- ZoneInfo objects are built once per timezone abbreviation
+"""
+
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+# Timezone mappings
+TIMEZONE_MAP = {
+    'IST': 'Asia/Kolkata',
+    'CET': 'Europe/Paris',
+    'CEST': 'Europe/Paris',  # Central European Summer Time
+    'EST': 'America/New_York',
+    'EDT': 'America/New_York',  # Eastern Daylight Time
+    'CST': 'America/Chicago',
+    'CDT': 'America/Chicago',  # Central Daylight Time
+    'MST': 'America/Denver',
+    'MDT': 'America/Denver',  # Mountain Daylight Time
+    'PST': 'America/Los_Angeles',
+    'PDT': 'America/Los_Angeles',  # Pacific Daylight Time
+    'GMT': 'Europe/London',
+    'BST': 'Europe/London',  # British Summer Time
+    'JST': 'Asia/Tokyo',
+    'KST': 'Asia/Seoul',
+    'AEST': 'Australia/Sydney',
+    'AEDT': 'Australia/Sydney',  # Australian Eastern Daylight Time
+    'NZST': 'Pacific/Auckland',
+    'NZDT': 'Pacific/Auckland',  # New Zealand Daylight Time
+    'SGT': 'Asia/Singapore',
+    'HKT': 'Asia/Hong_Kong',
+    'PHT': 'Asia/Manila',
+    'WIB': 'Asia/Jakarta',
+    'PKT': 'Asia/Karachi',
+    'GST': 'Asia/Dubai',  # Gulf Standard Time
+    'MSK': 'Europe/Moscow',
+    'EET': 'Europe/Athens',
+    'EEST': 'Europe/Athens',  # Eastern European Summer Time
+    'BRT': 'America/Sao_Paulo',
+    'ART': 'America/Argentina/Buenos_Aires',
+    'VET': 'America/Caracas',
+}
+
+REGIONS = ('APAC', 'EMEA', 'AMERICAS', 'INDIA')
+_REGION_SET = frozenset(REGIONS)
+
+LFS_PREFIX = 'LFS'
+SINGLE_LINE_RE = re.compile(r'LFS\s+(BO[135])\s+(.+?)\s+(' + '|'.join(REGIONS) + r')$')
+FORMAT_LINE_RE = re.compile(r'LFS\s+(BO[135])')
+TIME_RE = re.compile(r'(\d{1,2})(?::(\d{2}))?\s*(AM|PM)\s+([A-Z]{3,4})')
+
+# Parse error kinds (second item of parse_lfs's result)
+NOT_LFS = 'not_lfs'
+INVALID_FORMAT = 'format'
+INVALID_FORMAT_LINE = 'format_line'
+INVALID_TIME_LINE = 'time_line'
+INVALID_REGION = 'region'
+INVALID_TIME = 'time'
+
+
+class LFSPost(NamedTuple):
+    match_type: str   # 'bo1' / 'bo3' / 'bo5'
+    hour: int         # 24-hour clock
+    minute: int
+    timezone: str     # key of TIMEZONE_MAP
+    region: str       # lowercase region
+
+
+@lru_cache(maxsize=None)
+def zone(timezone: str) -> ZoneInfo:
+    """ZoneInfo for a timezone abbreviation (unknown ones fall back to UTC)"""
+    return ZoneInfo(TIMEZONE_MAP.get(timezone, 'UTC'))
+
+
+def parse_time_with_timezone(time_str: str) -> Optional[Tuple[int, int, str]]:
+    """
+    Parse time string like '7PM IST' or '9:30PM CET' and return hour, minute, timezone
+    Returns: (hour_24, minute, timezone_abbr) or None if invalid
+    """
+    match = TIME_RE.search(time_str.upper())
+    if not match:
+        return None
+
+    hour = int(match.group(1))
+    minute = int(match.group(2)) if match.group(2) else 0
+    period = match.group(3)
+    timezone = match.group(4)
+
+    if timezone not in TIMEZONE_MAP:
+        return None
+
+    # Convert to 24-hour format
+    if period == 'PM' and hour != 12:
+        hour += 12
+    elif period == 'AM' and hour == 12:
+        hour = 0
+
+    if hour < 0 or hour > 23 or minute < 0 or minute > 59:
+        return None
+
+    return (hour, minute, timezone)
+
+
+def is_lfs_post(content: str) -> bool:
+    """Cheap check used before any parsing: does the post start with LFS?"""
+    return content.lstrip()[:len(LFS_PREFIX)].upper() == LFS_PREFIX
+
+
+def parse_lfs(content: str) -> Tuple[Optional[LFSPost], Optional[str]]:
+    """
+    Parse an LFS post
+
+    Returns:
+        (post, None) for a valid post, or (None, error_kind) where error_kind is
+        NOT_LFS for chatter or names the part that was invalid
+    """
+    if not is_lfs_post(content):
+        return None, NOT_LFS
+
+    lines = content.strip().split('\n', 2)
+    first_line = lines[0].strip().upper()
+
+    if len(lines) == 1:
+        match = SINGLE_LINE_RE.search(first_line)
+        if match is None:
+            return None, INVALID_FORMAT
+        match_type, time_part, region = match.groups()
+        time_part = time_part.strip()
+    else:
+        match = FORMAT_LINE_RE.search(first_line)
+        if match is None:
+            return None, INVALID_FORMAT_LINE
+        match_type = match.group(1)
+
+        parts = lines[1].split(',', 2)
+        if len(parts) < 2:
+            return None, INVALID_TIME_LINE
+        time_part = parts[0].strip()
+        region = parts[1].strip().upper()
+        if region not in _REGION_SET:
+            return None, INVALID_REGION
+
+    parsed_time = parse_time_with_timezone(time_part)
+    if parsed_time is None:
+        return None, INVALID_TIME
+
+    hour, minute, timezone = parsed_time
+    return LFSPost(match_type.lower(), hour, minute, timezone, region.lower()), None
+
+
+def next_time_slot(post: LFSPost, now: Optional[datetime] = None) -> datetime:
+    """The post's time today in its timezone, or tomorrow if that has passed"""
+    tz = zone(post.timezone)
+    now = now.astimezone(tz) if now is not None else datetime.now(tz)
+    time_slot = now.replace(hour=post.hour, minute=post.minute, second=0, microsecond=0)
+    if time_slot < now:
+        time_slot = time_slot + timedelta(days=1)
+    return time_slot
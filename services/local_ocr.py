@@ -0,0 +1,147 @@
+"""
+Local Profile OCR
+Reads IGN and player ID from a VALORANT Mobile profile screenshot with Tesseract,
+so registrations do not need a Gemini round-trip when the screenshot is clean
+
+- Only the header band of the profile (where "IGN #ID" is shown) is read
+- Preprocessing is vectorized OpenCV: grayscale, 2x upscale, Otsu threshold,
+  inverted when the text is light on dark
+- Tesseract runs in a small dedicated thread pool (it shells out, so threads
+  run in parallel and the event loop is never blocked)
+- Every read carries the lowest Tesseract word confidence; callers fall back to
+  the remote model below MIN_CONFIDENCE (tools/bench_profile_ocr.py picks it)
+
+Needs the tesseract binary and pytesseract; without them read_profile() returns None.
+"""
+
+import asyncio
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from services import tracing
+from services.config import cfg
+
+try:
+    import pytesseract
+    TESSERACT_AVAILABLE = True
+except ImportError:
+    TESSERACT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# (left, top, right, bottom) as fractions of the screenshot
+PROFILE_REGION: Tuple[float, ...] = tuple(
+    float(v) for v in str(cfg('LOCAL_OCR_PROFILE_REGION', '0,0,1,0.4')).split(','))
+MIN_CONFIDENCE = float(cfg('LOCAL_OCR_MIN_CONFIDENCE', 80))
+WORKERS = int(cfg('LOCAL_OCR_WORKERS', 2))
+
+UPSCALE = 2
+# Sparse text: the header mixes the name, ID, level and badges
+TESSERACT_CONFIG = '--oem 3 --psm 11'
+
+# "#5432", "Name#5432" or a bare number after an "ID" label
+ID_TOKEN = re.compile(r'^(.*?)#(\d{3,})$')
+BARE_ID = re.compile(r'^\d{4,}$')
+ID_LABELS = {'ID', 'ID:', 'UID', 'UID:'}
+
+
+class ProfileRead(NamedTuple):
+    ign: str
+    player_id: str
+    confidence: float  # lowest word confidence, 0-100
+
+
+class _Word(NamedTuple):
+    text: str
+    conf: float
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_disabled = not TESSERACT_AVAILABLE
+
+
+def preprocess(region: np.ndarray) -> np.ndarray:
+    """Binarized, upscaled crop with dark text on a light background"""
+    gray = cv2.cvtColor(region, cv2.COLOR_BGR2GRAY) if region.ndim == 3 else region
+    gray = cv2.resize(gray, None, fx=UPSCALE, fy=UPSCALE, interpolation=cv2.INTER_CUBIC)
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    # Background is the majority class; if it came out black the text is light on dark
+    if cv2.countNonZero(binary) < binary.size // 2:
+        binary = cv2.bitwise_not(binary)
+    return binary
+
+
+def _lines(data: dict) -> List[List[_Word]]:
+    """Group image_to_data output into lines of recognized words"""
+    lines = {}
+    for text, conf, block, par, line in zip(data['text'], data['conf'], data['block_num'],
+                                           data['par_num'], data['line_num']):
+        text = text.strip()
+        conf = float(conf)
+        if not text or conf < 0:
+            continue
+        lines.setdefault((block, par, line), []).append(_Word(text, conf))
+    return list(lines.values())
+
+
+def parse_profile_words(data: dict) -> Optional[ProfileRead]:
+    """Find "IGN #ID" (or "IGN ... ID 12345") in Tesseract word data"""
+    fallback = None
+    for words in _lines(data):
+        for i, word in enumerate(words):
+            match = ID_TOKEN.match(word.text)
+            if match:
+                name_part, player_id = match.groups()
+                name_words = words[:i] + ([_Word(name_part, word.conf)] if name_part else [])
+                if name_words:
+                    ign = " ".join(w.text for w in name_words)
+                    return ProfileRead(ign, player_id, min(w.conf for w in name_words + [word]))
+            elif fallback is None and BARE_ID.match(word.text) and i > 0 and words[i - 1].text.upper() in ID_LABELS:
+                name_words = words[:i - 1]
+                if name_words:
+                    ign = " ".join(w.text for w in name_words)
+                    fallback = ProfileRead(ign, word.text, min(w.conf for w in name_words + [word]))
+    return fallback
+
+
+def read_profile_sync(image: np.ndarray) -> Optional[ProfileRead]:
+    """Blocking read of a BGR screenshot (call from a worker thread)"""
+    height, width = image.shape[:2]
+    left, top, right, bottom = PROFILE_REGION
+    region = image[int(top * height):int(bottom * height), int(left * width):int(right * width)]
+    if region.size == 0:
+        return None
+    data = pytesseract.image_to_data(preprocess(region), config=TESSERACT_CONFIG,
+                                     output_type=pytesseract.Output.DICT)
+    return parse_profile_words(data)
+
+
+@tracing.traced('ocr.local_profile')
+async def read_profile(image) -> Optional[ProfileRead]:
+    """
+    Read IGN and ID from an IngestedImage (or BGR array) off the event loop
+
+    Returns:
+        ProfileRead (check .confidence against MIN_CONFIDENCE), or None if nothing
+        was found or Tesseract is not installed
+    """
+    global _executor, _disabled
+    if _disabled:
+        return None
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='tesseract')
+
+    array = getattr(image, 'array', image)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, read_profile_sync, array)
+    except pytesseract.TesseractNotFoundError:
+        _disabled = True
+        logger.warning("⚠️ tesseract binary not found, local profile OCR disabled")
+    except Exception as e:
+        logger.warning("⚠️ Local profile OCR failed: %s", e)
+    return None
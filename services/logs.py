@@ -0,0 +1,107 @@
+"""
+Logging Pipeline
+Log records are queued on the calling thread and written to stdout by a
+background listener thread, so logging never blocks the event loop on I/O
+
+- setup_logging() installs a single QueueHandler on the root logger
+- LOG_LEVEL sets the level (default INFO)
+- DEBUG records are sampled per call site: the first one, then one in
+  LOG_DEBUG_SAMPLE (default 10), so per-message debug output stays bounded
+- print() calls that have not been migrated yet go through the same queue
+  (logger "print"), one record per line
+"""
+
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from typing import Dict, Optional, Tuple
+
+from services.config import cfg
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_original_stdout = None
+
+
+class DebugSampler(logging.Filter):
+    """Passes every INFO+ record and one in `every` DEBUG records per call site"""
+
+    def __init__(self, every: int):
+        super().__init__()
+        self.every = max(1, every)
+        self._seen: Dict[Tuple[str, int], int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.every == 1:
+            return True
+        site = (record.pathname, record.lineno)
+        seen = self._seen.get(site, 0)
+        self._seen[site] = seen + 1
+        return seen % self.every == 0
+
+
+class _PrintToLog:
+    """sys.stdout replacement: complete lines become records on the "print" logger"""
+
+    encoding = 'utf-8'
+
+    def __init__(self):
+        self._logger = logging.getLogger('print')
+        self._local = threading.local()
+
+    def write(self, text: str) -> int:
+        buffered = getattr(self._local, 'buffer', '') + text
+        *lines, self._local.buffer = buffered.split('\n')
+        for line in lines:
+            if line.strip():
+                self._logger.info(line)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+
+def setup_logging(capture_print: bool = True):
+    """Install the queue pipeline; safe to call more than once"""
+    global _listener, _original_stdout
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    _original_stdout = sys.stdout
+    output = logging.StreamHandler(_original_stdout)
+    output.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    handler = logging.handlers.QueueHandler(log_queue)
+    handler.addFilter(DebugSampler(int(cfg('LOG_DEBUG_SAMPLE', 10))))
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(str(cfg('LOG_LEVEL', 'INFO')).upper())
+    # discord.py's gateway chatter stays at INFO even when we debug our own code
+    logging.getLogger('discord').setLevel(max(root.level, logging.INFO))
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+    if capture_print:
+        sys.stdout = _PrintToLog()
+
+
+def stop_logging():
+    """Drain the queue and restore stdout"""
+    global _listener
+    if _listener is None:
+        return
+    if _original_stdout is not None:
+        sys.stdout = _original_stdout
+    _listener.stop()
+    _listener = None
@@ -0,0 +1,312 @@
+"""
+Map Index
+Identifies the map on a VALORANT Mobile scoreboard locally, so no separate
+Gemini call is needed just to read the map name
+
+- Banner text: the header line reads "<mode>-<sub mode>-<map>" in Chinese
+  (e.g. 自定义-普通模式-亚海悬城). The glyphs after the last hyphen are cropped
+  and average-hashed, then compared with the hashes of known map names. Those
+  come from labeled screenshots and, if a CJK font is installed, from the
+  MAP_NAMES strings rendered in it
+- Map art: ORB descriptors of imports/maps, stacked into one matrix so a single
+  kNN query votes for every map, for screenshots that show the map art
+- The index is built once per process, or loaded from data/map_index.npz when
+  that file exists (tools/build_map_index.py writes it)
+"""
+
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from services import tracing
+from services.config import cfg
+from services.image_ingest import ImageSource, load_image
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).parent.parent
+MAPS_DIR = ROOT / "imports" / "maps"
+INDEX_PATH = Path(cfg('MAP_INDEX_PATH', str(ROOT / "data" / "map_index.npz")))
+INDEX_VERSION = 1
+
+# Chinese map names as shown in the scoreboard header -> English
+MAP_NAMES: Dict[str, str] = {
+    '亚海悬城': 'Ascent',
+    '源工重镇': 'Bind',
+    '极寒冬港': 'Icebox',
+    '隐世修所': 'Haven',
+    '霓虹町': 'Split',
+    '微风岛屿': 'Breeze',
+    '裂变峡谷': 'Fracture',
+}
+
+# Fonts tried for rendering MAP_NAMES when MAP_INDEX_FONT is not set
+CJK_FONT_CANDIDATES = [
+    '/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc',
+    '/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc',
+    '/usr/share/fonts/truetype/wqy/wqy-microhei.ttc',
+    'C:/Windows/Fonts/msyh.ttc',
+    '/System/Library/Fonts/PingFang.ttc',
+]
+
+# (left, top, right, bottom) as fractions of the screenshot
+BANNER_REGION = (0.0, 0.08, 0.35, 0.2)
+# Header text is white; the date line under it is grey and the background dark teal
+TEXT_MIN_VALUE = 170
+TEXT_MAX_SATURATION = 60
+MIN_LINE_HEIGHT = 6
+
+HASH_WIDTH, HASH_HEIGHT = 64, 16
+TEXT_MAX_DISTANCE = 0.2   # fraction of differing bits
+TEXT_MIN_MARGIN = 0.05    # over the nearest entry for a different map
+
+ART_WIDTH = 640
+ART_QUERY_WIDTH = 800
+ART_FEATURES = 500
+ART_MIN_MATCHES = 25
+ART_MIN_RATIO = 1.5
+
+
+class MapMatch(NamedTuple):
+    name: Optional[str]  # English map name, None if nothing matched clearly
+    score: float         # banner: 1 - hash distance, art: good ORB matches
+    method: str          # 'banner', 'art' or '' when nothing matched
+
+
+def _text_mask(region: np.ndarray) -> np.ndarray:
+    hsv = cv2.cvtColor(region, cv2.COLOR_BGR2HSV)
+    return ((hsv[..., 2] > TEXT_MIN_VALUE) & (hsv[..., 1] < TEXT_MAX_SATURATION)).astype(np.uint8) * 255
+
+
+def _tight(mask: np.ndarray) -> Optional[np.ndarray]:
+    ys, xs = np.nonzero(mask)
+    if len(xs) == 0:
+        return None
+    return mask[ys.min():ys.max() + 1, xs.min():xs.max() + 1]
+
+
+def banner_name_mask(image: np.ndarray) -> Optional[np.ndarray]:
+    """Tight mask of the map name (glyphs after the last hyphen of the header line)"""
+    height, width = image.shape[:2]
+    left, top, right, bottom = BANNER_REGION
+    region = image[int(top * height):int(bottom * height), int(left * width):int(right * width)]
+    if region.size == 0:
+        return None
+    mask = _text_mask(region)
+
+    # First run of text rows is the header line
+    rows = np.flatnonzero(mask.any(axis=1))
+    if len(rows) == 0:
+        return None
+    breaks = np.flatnonzero(np.diff(rows) > 1)
+    line_end = rows[breaks[0]] if len(breaks) else rows[-1]
+    line = mask[rows[0]:line_end + 1]
+    line_height = line.shape[0]
+    if line_height < MIN_LINE_HEIGHT:
+        return None
+
+    # Hyphens: short, wide components around mid-height
+    count, _, stats, _ = cv2.connectedComponentsWithStats(line)
+    hyphen_ends = [
+        x + w for x, y, w, h, _ in stats[1:count]
+        if h <= 0.25 * line_height and w >= 1.5 * h and 0.25 * line_height <= y + h / 2 <= 0.75 * line_height
+    ]
+    if not hyphen_ends:
+        return None
+    name = _tight(line[:, max(hyphen_ends):])
+    if name is None or name.shape[1] < line_height:
+        return None
+    return name
+
+
+def text_hash(mask: np.ndarray) -> np.ndarray:
+    """Average hash of a text mask: HASH_WIDTH x HASH_HEIGHT bits"""
+    small = cv2.resize(mask, (HASH_WIDTH, HASH_HEIGHT), interpolation=cv2.INTER_AREA)
+    return (small > 127).ravel()
+
+
+def _render_text(text: str, font_path: str) -> Optional[np.ndarray]:
+    from PIL import Image, ImageDraw, ImageFont
+    font = ImageFont.truetype(font_path, 48)
+    canvas = Image.new('L', (60 * len(text) + 20, 80))
+    ImageDraw.Draw(canvas).text((10, 10), text, font=font, fill=255)
+    return _tight((np.array(canvas) > 127).astype(np.uint8) * 255)
+
+
+def find_cjk_font() -> Optional[str]:
+    configured = cfg('MAP_INDEX_FONT')
+    if configured:
+        return configured
+    return next((path for path in CJK_FONT_CANDIDATES if Path(path).exists()), None)
+
+
+class MapIndex:
+    def __init__(self, path: Path = INDEX_PATH):
+        self.path = Path(path)
+        self.names: List[str] = []
+        self.art_descriptors: Optional[np.ndarray] = None
+        self.art_owner: Optional[np.ndarray] = None
+        self.text_hashes = np.zeros((0, HASH_WIDTH * HASH_HEIGHT), dtype=bool)
+        self.text_owner = np.zeros(0, dtype=np.int64)
+        self._orb = None
+        self._matcher = None
+        self._ready = False
+        self._lock = threading.Lock()
+
+    # ---- building ----
+
+    def _name_id(self, name: str) -> int:
+        if name not in self.names:
+            self.names.append(name)
+        return self.names.index(name)
+
+    def _get_orb(self):
+        if self._orb is None:
+            self._orb = cv2.ORB_create(nfeatures=ART_FEATURES)
+            self._matcher = cv2.BFMatcher(cv2.NORM_HAMMING)
+        return self._orb
+
+    def build(self, font_path: Optional[str] = None):
+        """Index imports/maps art and, if a CJK font is available, the rendered MAP_NAMES"""
+        descriptors, owners = [], []
+        for path in sorted(MAPS_DIR.glob('*.jpg')):
+            image = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+            if image is None:
+                continue
+            image = cv2.resize(image, (ART_WIDTH, int(image.shape[0] * ART_WIDTH / image.shape[1])),
+                               interpolation=cv2.INTER_AREA)
+            _, found = self._get_orb().detectAndCompute(image, None)
+            if found is not None:
+                owners.append(np.full(len(found), self._name_id(path.stem)))
+                descriptors.append(found)
+        if descriptors:
+            self.art_descriptors = np.vstack(descriptors)
+            self.art_owner = np.concatenate(owners)
+
+        font_path = font_path or find_cjk_font()
+        if font_path:
+            for chinese, english in MAP_NAMES.items():
+                rendered = _render_text(chinese, font_path)
+                if rendered is not None:
+                    self._add_hash(text_hash(rendered), english)
+
+    def _add_hash(self, bits: np.ndarray, name: str):
+        self.text_hashes = np.vstack([self.text_hashes, bits[None, :]])
+        self.text_owner = np.append(self.text_owner, self._name_id(name))
+
+    def add_banner_sample(self, image: ImageSource, name: str) -> bool:
+        """Add the banner of a labeled screenshot; False if no banner text was found"""
+        mask = banner_name_mask(load_image(image))
+        if mask is None:
+            return False
+        self._add_hash(text_hash(mask), name)
+        return True
+
+    def save(self, path: Optional[Path] = None):
+        path = Path(path or self.path)
+        np.savez_compressed(
+            path,
+            version=np.array(INDEX_VERSION),
+            names=np.array(self.names),
+            art_descriptors=self.art_descriptors if self.art_descriptors is not None else np.zeros((0, 32), np.uint8),
+            art_owner=self.art_owner if self.art_owner is not None else np.zeros(0, np.int64),
+            text_hashes=np.packbits(self.text_hashes, axis=1),
+            text_owner=self.text_owner,
+        )
+
+    def load(self, path: Optional[Path] = None) -> bool:
+        """Load a saved index; False (and nothing changed) if it is missing or outdated"""
+        path = Path(path or self.path)
+        if not path.exists():
+            return False
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data['version']) != INDEX_VERSION:
+                    logger.warning("⚠️ Map index %s is outdated, rebuilding", path)
+                    return False
+                self.names = [str(name) for name in data['names']]
+                self.art_descriptors = data['art_descriptors'] if len(data['art_descriptors']) else None
+                self.art_owner = data['art_owner'] if len(data['art_owner']) else None
+                self.text_hashes = np.unpackbits(data['text_hashes'], axis=1)[:, :HASH_WIDTH * HASH_HEIGHT].astype(bool)
+                self.text_owner = data['text_owner']
+        except Exception as e:
+            logger.warning("⚠️ Could not load map index %s: %s", path, e)
+            return False
+        return True
+
+    def _ensure_ready(self):
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            if self.load():
+                logger.info("🗺️ Map index loaded from %s", self.path)
+            else:
+                self.build()
+                logger.info("🗺️ Map index built (%s art descriptors, %s banner hashes)",
+                            0 if self.art_descriptors is None else len(self.art_descriptors), len(self.text_owner))
+            self._ready = True
+
+    # ---- matching ----
+
+    def match_banner(self, image: np.ndarray) -> MapMatch:
+        if not len(self.text_owner):
+            return MapMatch(None, 0.0, '')
+        mask = banner_name_mask(image)
+        if mask is None:
+            return MapMatch(None, 0.0, '')
+        distances = (self.text_hashes != text_hash(mask)).mean(axis=1)
+        order = np.argsort(distances)
+        best = order[0]
+        best_name = self.text_owner[best]
+        other = next((distances[i] for i in order[1:] if self.text_owner[i] != best_name), 1.0)
+        score = 1.0 - float(distances[best])
+        if distances[best] > TEXT_MAX_DISTANCE or other - distances[best] < TEXT_MIN_MARGIN:
+            return MapMatch(None, score, '')
+        return MapMatch(self.names[int(best_name)], score, 'banner')
+
+    def match_art(self, image: np.ndarray) -> MapMatch:
+        if self.art_descriptors is None:
+            return MapMatch(None, 0.0, '')
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+        scale = ART_QUERY_WIDTH / gray.shape[1]
+        if scale < 1:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        _, descriptors = self._get_orb().detectAndCompute(gray, None)
+        if descriptors is None or len(descriptors) < 2:
+            return MapMatch(None, 0.0, '')
+
+        pairs = self._matcher.knnMatch(descriptors, self.art_descriptors, k=2)
+        good = [pair[0].trainIdx for pair in pairs if len(pair) == 2 and pair[0].distance < 0.75 * pair[1].distance]
+        if not good:
+            return MapMatch(None, 0.0, '')
+        votes = np.bincount(self.art_owner[good], minlength=len(self.names))
+        order = np.argsort(votes)
+        best = int(votes[order[-1]])
+        runner_up = int(votes[order[-2]]) if len(votes) > 1 else 0
+        if best < ART_MIN_MATCHES or best < ART_MIN_RATIO * runner_up:
+            return MapMatch(None, float(best), '')
+        return MapMatch(self.names[int(order[-1])], float(best), 'art')
+
+    @tracing.traced('map_index.detect')
+    def detect(self, image: ImageSource) -> MapMatch:
+        """Banner text first (cheap), then map art"""
+        self._ensure_ready()
+        array = load_image(image)
+        match = self.match_banner(array)
+        if match.name is None:
+            match = self.match_art(array)
+        return match
+
+    def detect_name(self, image: ImageSource) -> str:
+        """English map name, or 'Unknown'"""
+        return self.detect(image).name or 'Unknown'
+
+
+# Global map index instance
+map_index = MapIndex()
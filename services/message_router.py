@@ -0,0 +1,114 @@
+"""
+Message Router
+One on_message listener for the whole bot instead of one per cog
+
+- Each message is classified once: bot author (dropped), DM, or guild message
+- Guild messages are routed by channel id (or channel name, for channels that are
+  configured by name), so unrelated guild traffic costs one dict lookup
+- DMs are routed by author id: cogs watch the users they are waiting on
+  (a captain in an active scrim chat, a user mid-registration) under a key,
+  and drop the whole key when that flow ends
+- Handlers registered with add_dm_handler() see every DM
+
+Works on discord.py objects by duck typing; bot.py forwards on_message here.
+"""
+
+import logging
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Set
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[object], Awaitable[None]]
+
+
+class MessageRouter:
+    def __init__(self):
+        self._channels: Dict[int, List[Handler]] = defaultdict(list)
+        self._channel_names: Dict[str, List[Handler]] = defaultdict(list)
+        self._dm_users: Dict[int, Dict[str, Handler]] = defaultdict(dict)
+        self._dm_keys: Dict[str, Set[int]] = defaultdict(set)
+        self._any_dm: List[Handler] = []
+
+    # ---- registration ----
+
+    def add_channel(self, channel_id: int, handler: Handler):
+        """Route guild messages in `channel_id` to `handler`"""
+        if handler not in self._channels[channel_id]:
+            self._channels[channel_id].append(handler)
+
+    def add_channel_name(self, name: str, handler: Handler):
+        """Route guild messages in any channel called `name` to `handler`"""
+        if handler not in self._channel_names[name]:
+            self._channel_names[name].append(handler)
+
+    def add_dm_handler(self, handler: Handler):
+        """Route every DM to `handler`"""
+        if handler not in self._any_dm:
+            self._any_dm.append(handler)
+
+    def watch_dm(self, user_id: int, key: str, handler: Handler):
+        """Route DMs from `user_id` to `handler` until unwatch_dm(key)"""
+        self._dm_users[user_id][key] = handler
+        self._dm_keys[key].add(user_id)
+
+    def unwatch_dm(self, key: str):
+        """Stop every DM route registered under `key`; unknown keys are ignored"""
+        for user_id in self._dm_keys.pop(key, ()):
+            routes = self._dm_users.get(user_id)
+            if routes is None:
+                continue
+            routes.pop(key, None)
+            if not routes:
+                del self._dm_users[user_id]
+
+    def is_watching(self, user_id: int) -> bool:
+        return user_id in self._dm_users
+
+    def remove(self, handler: Handler):
+        """Drop every route to `handler` (cog unload)"""
+        for table in (self._channels, self._channel_names):
+            for key in list(table):
+                if handler in table[key]:
+                    table[key].remove(handler)
+                if not table[key]:
+                    del table[key]
+        if handler in self._any_dm:
+            self._any_dm.remove(handler)
+        for user_id, routes in list(self._dm_users.items()):
+            for key, routed in list(routes.items()):
+                if routed == handler:
+                    del routes[key]
+                    self._dm_keys[key].discard(user_id)
+                    if not self._dm_keys[key]:
+                        del self._dm_keys[key]
+            if not routes:
+                del self._dm_users[user_id]
+
+    # ---- dispatch ----
+
+    def handlers_for(self, message) -> List[Handler]:
+        """Handlers interested in a message, in registration order (no duplicates)"""
+        if message.author.bot:
+            return []
+        if message.guild is None:
+            routes = self._dm_users.get(message.author.id)
+            handlers = list(routes.values()) if routes else []
+            return list(dict.fromkeys(self._any_dm + handlers))
+        channel = message.channel
+        handlers = self._channels.get(channel.id)
+        if handlers is None and self._channel_names:
+            handlers = self._channel_names.get(getattr(channel, 'name', None))
+        return list(handlers) if handlers else []
+
+    async def dispatch(self, message):
+        """Run every interested handler; one failing handler does not stop the others"""
+        for handler in self.handlers_for(message):
+            try:
+                await handler(message)
+            except Exception as e:
+                logger.exception("❌ Message handler %s failed: %s", getattr(handler, '__qualname__', handler), e)
+
+
+# Global router instance
+router = MessageRouter()
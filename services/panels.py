@@ -0,0 +1,108 @@
+"""
+Panel Reconciler
+Keeps the bot's standing UI messages ("panels": registration, helpdesk, LFS
+instructions...) in place across restarts instead of purging and reposting
+
+- The message id and a hash of each panel's content are stored in bot_state
+- On startup the stored message is fetched (one request); it is edited only if
+  the hash changed, and reposted only if it was deleted
+- Panels posted before the reconciler existed are adopted by embed title from
+  the channel's recent history instead of being duplicated
+
+Works on discord.py objects by duck typing; persistent views still have to be
+registered with bot.add_view so their buttons keep working.
+"""
+
+import hashlib
+import json
+import logging
+from typing import Optional
+
+from services import db
+
+logger = logging.getLogger(__name__)
+
+ADOPT_HISTORY_LIMIT = 25
+
+
+def panel_hash(embed, view=None) -> str:
+    """Hash of everything that is visible on the panel"""
+    content = {
+        'embed': embed.to_dict() if embed is not None else None,
+        'components': view.to_components() if view is not None else [],
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+async def _load_state(key: str) -> Optional[dict]:
+    try:
+        return await db.get_bot_state(key)
+    except Exception as e:
+        logger.warning("⚠️ Could not read panel state %s: %s", key, e)
+        return None
+
+
+async def _fetch(channel, message_id: int):
+    try:
+        return await channel.fetch_message(message_id)
+    except Exception as e:
+        # discord.NotFound has status 404: the panel was deleted
+        if getattr(e, 'status', None) == 404:
+            return None
+        raise
+
+
+async def _adopt(channel, author_id: int, title: Optional[str]):
+    """Most recent message by the bot with the same embed title"""
+    if not title:
+        return None
+    async for message in channel.history(limit=ADOPT_HISTORY_LIMIT):
+        if message.author.id == author_id and message.embeds and message.embeds[0].title == title:
+            return message
+    return None
+
+
+async def reconcile_panel(name: str, channel, author_id: int, embed, view=None):
+    """
+    Make sure `channel` shows one up-to-date copy of a panel
+
+    Args:
+        name: Stable panel name (bot_state key suffix)
+        channel: Channel the panel lives in
+        author_id: The bot's user id (for adopting older panels)
+        embed: Panel embed
+        view: Optional persistent view attached to the panel
+
+    Returns:
+        The panel message
+    """
+    key = f"panel:{name}"
+    digest = panel_hash(embed, view)
+    state = await _load_state(key)
+
+    message = None
+    if state and state.get('channel_id') == channel.id:
+        message = await _fetch(channel, state['message_id'])
+    if message is None:
+        message = await _adopt(channel, author_id, embed.title)
+        # Content of an adopted message is unknown, so it is always refreshed
+        state = None
+
+    if message is None:
+        message = await channel.send(embed=embed, view=view) if view is not None else await channel.send(embed=embed)
+        logger.info("📌 Posted %s panel in %s", name, channel.name)
+    elif not state or state.get('hash') != digest:
+        if view is not None:
+            await message.edit(embed=embed, view=view)
+        else:
+            await message.edit(embed=embed)
+        logger.info("✏️ Updated %s panel in %s", name, channel.name)
+    else:
+        logger.info("✅ %s panel in %s is up to date", name, channel.name)
+        return message
+
+    try:
+        await db.set_bot_state(key, {'channel_id': channel.id, 'message_id': message.id, 'hash': digest})
+    except Exception as e:
+        logger.warning("⚠️ Could not store panel state %s: %s", key, e)
+    return message
@@ -0,0 +1,178 @@
+"""
+Vision Payload Optimizer
+Smallest image payload that still reads correctly, per remote vision task
+
+- Each task has a profile: the region of interest to crop to, the longest side
+  after downscaling, and the format / quality to encode at
+- Defaults are below; tools/tune_payloads.py sweeps them over a labeled corpus
+  and writes the smallest profile that kept accuracy to data/payload_profiles.json,
+  which overrides the defaults at startup
+- Payloads of an IngestedImage are encoded once and cached on it
+- measure() records payload size and end-to-end latency per task for /payloads
+"""
+
+import base64
+import json
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, NamedTuple, Optional, Tuple
+
+from services import tracing
+from services.config import cfg
+
+# image_ingest pulls in OpenCV/NumPy; it is imported on the first encode, not when a cog loads
+if TYPE_CHECKING:
+    from services.image_ingest import ImageSource
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).parent.parent
+PROFILES_PATH = Path(cfg('PAYLOAD_PROFILES_PATH', str(ROOT / "data" / "payload_profiles.json")))
+LATENCY_SAMPLES = 256
+
+Region = Tuple[float, float, float, float]  # (left, top, right, bottom) fractions
+
+
+class PayloadProfile(NamedTuple):
+    region: Optional[Region]  # None keeps the whole image
+    max_size: Optional[int]   # longest side; None keeps the resolution
+    fmt: str                  # 'jpeg', 'webp' or 'png'
+    quality: int
+
+
+# WebP costs ~100ms to encode a full screenshot, so it is only used for small crops
+DEFAULT_PROFILES: Dict[str, PayloadProfile] = {
+    # IGN and ID sit in the profile header
+    'profile': PayloadProfile((0.0, 0.0, 1.0, 0.5), 1280, 'jpeg', 85),
+    # Score at the top centre, map name in the banner at the top left
+    'scrim_score': PayloadProfile((0.0, 0.0, 1.0, 0.25), 1280, 'webp', 80),
+    # Every row is needed for names and K/D/A
+    'scoreboard': PayloadProfile(None, 1600, 'jpeg', 85),
+    # Agent icons are small; keep the resolution up
+    'agents': PayloadProfile(None, 2048, 'jpeg', 90),
+    'agent_icon': PayloadProfile(None, None, 'jpeg', 90),
+    'map': PayloadProfile((0.0, 0.0, 0.5, 0.25), 1024, 'jpeg', 85),
+}
+
+
+class Payload(NamedTuple):
+    task: str
+    data: bytes
+    mime_type: str
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    @property
+    def b64(self) -> str:
+        return base64.b64encode(self.data).decode('ascii')
+
+
+def profile_from_dict(data: dict) -> PayloadProfile:
+    region = data.get('region')
+    return PayloadProfile(
+        tuple(float(v) for v in region) if region else None,
+        int(data['max_size']) if data.get('max_size') else None,
+        str(data.get('fmt', 'jpeg')),
+        int(data.get('quality', 90)),
+    )
+
+
+def profile_to_dict(profile: PayloadProfile) -> dict:
+    return profile._asdict() | {'region': list(profile.region) if profile.region else None}
+
+
+def load_profiles(path: Path = PROFILES_PATH) -> Dict[str, PayloadProfile]:
+    """Defaults, overridden by the tuned profiles file if there is one"""
+    profiles = dict(DEFAULT_PROFILES)
+    if not path.exists():
+        return profiles
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            tuned = json.load(f)
+        for task, data in tuned.items():
+            profiles[task] = profile_from_dict(data)
+        logger.info("📦 Loaded tuned payload profiles for %s", ", ".join(sorted(tuned)))
+    except Exception as e:
+        logger.warning("⚠️ Could not load payload profiles %s: %s", path, e)
+    return profiles
+
+
+class _TaskStats:
+    __slots__ = ('calls', 'bytes', 'max_bytes', 'latencies')
+
+    def __init__(self):
+        self.calls = 0
+        self.bytes = 0
+        self.max_bytes = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+
+class PayloadOptimizer:
+    def __init__(self, profiles: Optional[Dict[str, PayloadProfile]] = None):
+        self.profiles = profiles if profiles is not None else load_profiles()
+        self._stats: Dict[str, _TaskStats] = {}
+
+    def profile(self, task: str) -> PayloadProfile:
+        return self.profiles.get(task, DEFAULT_PROFILES['scoreboard'])
+
+    def encode(self, image: "ImageSource", task: str, profile: Optional[PayloadProfile] = None) -> Payload:
+        """
+        Crop, downscale and encode a screenshot for `task` (CPU-bound: run big images in a thread)
+
+        IngestedImage results are cached on the image, so retries and fallbacks reuse them.
+        """
+        from services.image_ingest import IngestedImage, encode_image, load_image
+
+        region, max_size, fmt, quality = profile or self.profile(task)
+        if isinstance(image, IngestedImage):
+            data, mime_type = image.encode(max_size, fmt, quality, region)
+            return Payload(task, data, mime_type)
+
+        array = load_image(image)
+        if region:
+            height, width = array.shape[:2]
+            left, top, right, bottom = region
+            array = array[int(top * height):int(bottom * height), int(left * width):int(right * width)]
+        data, mime_type = encode_image(array, fmt, quality, max_size)
+        return Payload(task, data, mime_type)
+
+    @contextmanager
+    def measure(self, task: str, size: int):
+        """Time one remote call end to end and record it with its payload size"""
+        started = time.perf_counter()
+        try:
+            with tracing.span(f"payload.{task}"):
+                yield
+        finally:
+            stats = self._stats.setdefault(task, _TaskStats())
+            stats.calls += 1
+            stats.bytes += size
+            stats.max_bytes = max(stats.max_bytes, size)
+            stats.latencies.append((time.perf_counter() - started) * 1000)
+
+    def stats(self) -> Dict[str, dict]:
+        """Per task: calls, average / max payload KB, p50 / p95 end-to-end latency (ms)"""
+        summary = {}
+        for task, stats in sorted(self._stats.items()):
+            ordered = sorted(stats.latencies)
+            summary[task] = {
+                'calls': stats.calls,
+                'avg_kb': stats.bytes / stats.calls / 1024 if stats.calls else 0.0,
+                'max_kb': stats.max_bytes / 1024,
+                'p50_ms': ordered[len(ordered) // 2] if ordered else 0.0,
+                'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0,
+                'profile': self.profile(task),
+            }
+        return summary
+
+    def reset_stats(self):
+        self._stats.clear()
+
+
+# Global payload optimizer instance
+payloads = PayloadOptimizer()
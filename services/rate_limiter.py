@@ -0,0 +1,254 @@
+"""
+Vision Rate Limiter
+One token bucket per paid vision API key, shared by every cog, with a priority queue
+
+- Every outbound call (each model attempt, each retry) takes a token from its
+  key's bucket: '<KEY>_RATE_LIMIT' is "requests/seconds" (e.g. GEMINI_RATE_LIMIT=15/60)
+  and '<KEY>_RATE_BURST' how many may go out back to back
+- When the bucket is empty, calls wait in a queue ordered by task priority
+  (scrim score validation before scoreboard scans before agent detection before
+  profile OCR); waiting raises a call's priority so nothing starves
+- A 429 empties the bucket and holds the key for Retry-After, so the model
+  fallback chain waits instead of hammering the next model with the same key
+- Queue waits are recorded as tracing spans (ratelimit.<key>.<task>);
+  backpressure_notice() gives callers a message for users when the queue is deep
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from services import tracing
+from services.config import cfg
+
+logger = logging.getLogger(__name__)
+
+GEMINI = 'gemini'
+CLAUDE = 'claude'
+
+# "requests/seconds" per key when not configured
+DEFAULT_LIMITS = {GEMINI: '15/60', CLAUDE: '50/60'}
+DEFAULT_BURST = 5
+
+# Lower runs first
+PRIORITIES = {
+    'scrim_score': 0,
+    'scoreboard': 1,
+    'agents': 2,
+    'map': 2,
+    'agent_icon': 2,
+    'profile': 3,
+}
+DEFAULT_PRIORITY = 2
+PRIORITY_AGING_SECONDS = 20  # every 20s in the queue counts as one priority level
+
+THROTTLE_SECONDS = 15        # hold after a 429 without a Retry-After header
+NOTICE_WAIT_SECONDS = float(cfg('VISION_QUEUE_NOTICE_SECONDS', 15))
+WAIT_SAMPLES = 256
+
+
+class TokenBucket:
+    """Classic token bucket; thread-safe because detector calls run in worker threads"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate          # tokens per second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until a token is available (0 if one is available now)"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            blocked = max(0.0, self.blocked_until - now)
+            return max(blocked, (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0)
+
+    def try_take(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self.blocked_until or self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+    def block(self, seconds: float):
+        """Empty the bucket and refuse tokens for `seconds` (after a 429)"""
+        with self._lock:
+            self.tokens = 0.0
+            self.updated = time.monotonic()
+            self.blocked_until = max(self.blocked_until, self.updated + seconds)
+
+
+class _Waiter:
+    __slots__ = ('task', 'priority', 'seq', 'enqueued', 'future')
+
+    def __init__(self, task: str, seq: int, future: asyncio.Future):
+        self.task = task
+        self.priority = PRIORITIES.get(task, DEFAULT_PRIORITY)
+        self.seq = seq
+        self.enqueued = time.monotonic()
+        self.future = future
+
+    def rank(self, now: float):
+        return self.priority - (now - self.enqueued) / PRIORITY_AGING_SECONDS, self.seq
+
+
+def parse_limit(value: str) -> float:
+    """'15/60' -> 0.25 tokens per second"""
+    count, _, seconds = str(value).partition('/')
+    return float(count) / float(seconds or 1)
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Retry-After header in seconds (HTTP-date values are ignored)"""
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+class RateLimiter:
+    def __init__(self):
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._queues: Dict[str, List[_Waiter]] = {}
+        self._pumps: Dict[str, asyncio.Task] = {}
+        self._waits: Dict[str, deque] = {}
+        self._seq = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bucket(self, key: str) -> TokenBucket:
+        if key not in self._buckets:
+            prefix = key.upper()
+            rate = parse_limit(cfg(f'{prefix}_RATE_LIMIT', DEFAULT_LIMITS.get(key, '30/60')))
+            burst = float(cfg(f'{prefix}_RATE_BURST', DEFAULT_BURST))
+            self._buckets[key] = TokenBucket(rate, max(1.0, burst))
+        return self._buckets[key]
+
+    def _record_wait(self, key: str, task: str, seconds: float):
+        tracing.record(f"ratelimit.{key}.{task}", seconds)
+        self._waits.setdefault(f"{key}.{task}", deque(maxlen=WAIT_SAMPLES)).append(seconds * 1000)
+
+    async def acquire(self, key: str, task: str):
+        """Wait for a token for one call to `key` (queued by the priority of `task`)"""
+        self._loop = asyncio.get_running_loop()
+        bucket = self.bucket(key)
+        queue = self._queues.setdefault(key, [])
+        if not queue and bucket.try_take():
+            self._record_wait(key, task, 0.0)
+            return
+
+        self._seq += 1
+        waiter = _Waiter(task, self._seq, self._loop.create_future())
+        queue.append(waiter)
+        if key not in self._pumps:
+            self._pumps[key] = asyncio.ensure_future(self._pump(key))
+        try:
+            await waiter.future
+        finally:
+            if waiter in queue:
+                queue.remove(waiter)  # cancelled while waiting
+            self._record_wait(key, task, time.monotonic() - waiter.enqueued)
+
+    async def _pump(self, key: str):
+        """Hand out tokens to the best-ranked waiter as they become available"""
+        bucket = self.bucket(key)
+        queue = self._queues[key]
+        try:
+            while queue:
+                wait = bucket.wait_time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    continue
+                now = time.monotonic()
+                waiter = min(queue, key=lambda w: w.rank(now))
+                if waiter.future.done():
+                    queue.remove(waiter)
+                elif bucket.try_take():  # a worker thread may have taken the token first
+                    queue.remove(waiter)
+                    waiter.future.set_result(None)
+        finally:
+            self._pumps.pop(key, None)
+
+    def acquire_sync(self, key: str, task: str):
+        """
+        Blocking acquire for code running in worker threads (the google SDK detectors)
+
+        Joins the bot loop's priority queue when there is one; otherwise (scripts,
+        or called on the loop itself) it simply waits for the bucket.
+        """
+        loop = self._loop
+        try:
+            asyncio.get_running_loop()
+            on_loop = True
+        except RuntimeError:
+            on_loop = False
+        if loop is not None and loop.is_running() and not on_loop:
+            asyncio.run_coroutine_threadsafe(self.acquire(key, task), loop).result()
+            return
+
+        bucket = self.bucket(key)
+        started = time.monotonic()
+        while not bucket.try_take():
+            time.sleep(max(0.05, bucket.wait_time()))
+        self._record_wait(key, task, time.monotonic() - started)
+
+    def throttle(self, key: str, retry_after: Optional[float] = None):
+        """The API answered 429: hold every call to `key` for a while"""
+        seconds = retry_after if retry_after else THROTTLE_SECONDS
+        self.bucket(key).block(seconds)
+        logger.warning("🚦 %s rate limited, holding calls for %.0fs (%s queued)",
+                       key, seconds, self.queue_depth(key))
+
+    def queue_depth(self, key: str) -> int:
+        return len(self._queues.get(key, ()))
+
+    def estimated_wait(self, key: str, task: str) -> float:
+        """Rough seconds a new `task` call would wait: the bucket plus everyone queued ahead of it"""
+        bucket = self.bucket(key)
+        priority = PRIORITIES.get(task, DEFAULT_PRIORITY)
+        now = time.monotonic()
+        ahead = sum(1 for w in self._queues.get(key, ()) if w.rank(now)[0] <= priority)
+        return bucket.wait_time() + ahead / bucket.rate
+
+    def backpressure_notice(self, key: str, task: str) -> Optional[str]:
+        """User-facing message when a `task` call would queue for long, else None"""
+        wait = self.estimated_wait(key, task)
+        if wait < NOTICE_WAIT_SECONDS:
+            return None
+        eta = f"about {round(wait / 60)} min" if wait >= 90 else f"about {wait:.0f}s"
+        return f"⏳ Lots of screenshots are being read right now - you're in the queue ({eta})."
+
+    def stats(self) -> Dict[str, dict]:
+        """Per key: queue depth, tokens, hold time; per key.task: wait count and p50/p95 (ms)"""
+        summary = {}
+        for key, bucket in self._buckets.items():
+            bucket.wait_time()  # refill before reading tokens
+            summary[key] = {
+                'queued': self.queue_depth(key),
+                'tokens': round(bucket.tokens, 2),
+                'rate_per_min': round(bucket.rate * 60, 1),
+                'held_for_s': round(max(0.0, bucket.blocked_until - time.monotonic()), 1),
+            }
+        for name, waits in self._waits.items():
+            ordered = sorted(waits)
+            summary[name] = {
+                'calls': len(ordered),
+                'p50_ms': ordered[len(ordered) // 2],
+                'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            }
+        return summary
+
+
+# Global rate limiter instance
+limiter = RateLimiter()
@@ -5,43 +5,203 @@ This module sends an image to a deployed Roboflow workflow URL (the one you past
 and converts the JSON response into the same shape used by local detectors
 (agents list, map placeholder, and raw detections list).
 
+Requests go through one shared aiohttp connection pool per detector, are retried
+with exponential backoff on transient errors, and a circuit breaker stops calling
+the workflow for a while after repeated failures.
+
 Usage:
     from services.roboflow_agent_detector import get_roboflow_agent_detector
     det = get_roboflow_agent_detector("https://app.roboflow.com/workflows/...")
-    result = det.detect_agents_from_screenshot("/path/to/image.png")
+    result = await det.detect_agents_from_screenshot(image_bytes)
 """
 
 from pathlib import Path
-from typing import List, Dict, Any
-import json
-import requests
+from typing import List, Dict, Any, Optional, Union
+import asyncio
+import random
+import time
+
+import aiohttp
+
+from services import tracing
+
+
+class RoboflowUnavailableError(RuntimeError):
+    """Raised when the circuit breaker is open and the workflow is not being called"""
+
+
+class CircuitBreaker:
+    """
+    Minimal circuit breaker
+
+    closed    -> requests flow; consecutive failures are counted
+    open      -> requests are rejected until reset_timeout has passed
+    half-open -> one trial request; success closes, failure re-opens,
+                 every other caller is rejected until the trial finishes
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trips = 0
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a request may go out; in half-open only the first caller gets the trial"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "open" or self.trial_in_flight:
+            return False
+        self.trial_in_flight = True
+        return True
+
+    def end_trial(self):
+        """Give up the trial without a verdict (cancelled, or a non-retryable 4xx)"""
+        self.trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.state == "half-open" or (self.opened_at is None and self.failures >= self.failure_threshold):
+            self.opened_at = time.monotonic()
+            self.trips += 1
+
+
+def _guess_mime_type(data: bytes) -> str:
+    """Sniff the image type from its magic bytes"""
+    if data[:3] == b"\xff\xd8\xff":
+        return "image/jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/png"
 
 
 class RoboflowAgentDetector:
-    def __init__(self, workflow_url: str):
+    # HTTP statuses worth retrying; other 4xx responses are returned to the caller as errors
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(self, workflow_url: str, timeout: float = 30.0, max_retries: int = 3,
+                 backoff_base: float = 0.5, max_connections: int = 10,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0):
         if not workflow_url:
             raise ValueError("workflow_url must be provided")
         self.workflow_url = workflow_url
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_connections = max_connections
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
 
-    def detect_agents_from_screenshot(self, image_path: str, confidence_threshold: float = 0.25) -> Dict[str, Any]:
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Shared session (and connection pool), created on first use inside the running loop"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=self.timeout,
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                trace_configs=[tracing.http_trace_config()],
+            )
+        return self._session
+
+    async def close(self):
+        """Close the shared connection pool"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def detect_agents_from_screenshot(self, image: Union[bytes, str, Path],
+                                            confidence_threshold: float = 0.25,
+                                            filename: str = "screenshot.png") -> Dict[str, Any]:
         """
         Send image to Roboflow hosted workflow and parse detections.
 
+        Args:
+            image: Encoded image bytes (preferred - e.g. an attachment already in memory) or a file path
+            confidence_threshold: Detections below this confidence are dropped
+            filename: Name reported in the multipart upload
+
         Returns a dict with keys: 'agents' (list of 10 agent names), 'map' and 'detections' (list of raw detections)
+
+        Raises:
+            RoboflowUnavailableError: if the circuit breaker is open
+            aiohttp.ClientError / asyncio.TimeoutError: if all retries failed
         """
-        p = Path(image_path)
-        if not p.exists():
-            raise ValueError(f"Image not found: {image_path}")
+        if isinstance(image, (str, Path)):
+            p = Path(image)
+            if not p.exists():
+                raise ValueError(f"Image not found: {image}")
+            filename = p.name
+            image = await asyncio.to_thread(p.read_bytes)
+
+        data = await self._post_with_retry(bytes(image), filename)
+        return self._parse_response(data, confidence_threshold)
+
+    async def _post_with_retry(self, image_bytes: bytes, filename: str) -> Dict[str, Any]:
+        """POST the image, retrying transient failures with exponential backoff and jitter"""
+        if not self.breaker.allow():
+            raise RoboflowUnavailableError("Roboflow workflow circuit is open, skipping request")
+        trial = self.breaker.trial_in_flight
+        try:
+            return await self._post_attempts(image_bytes, filename)
+        finally:
+            if trial:
+                self.breaker.end_trial()
 
-        # Post the image file (multipart/form-data). Roboflow hosted workflows accept file uploads.
-        with p.open("rb") as f:
-            files = {"file": (p.name, f, "image/png")}
-            # The provided workflow URL may already include query params (e.g., ?dark=true). Send directly.
-            resp = requests.post(self.workflow_url, files=files, timeout=30)
+    async def _post_attempts(self, image_bytes: bytes, filename: str) -> Dict[str, Any]:
+        session = self._get_session()
+        mime_type = _guess_mime_type(image_bytes)
+        last_error: Optional[Exception] = None
 
-        resp.raise_for_status()
-        data = resp.json()
+        for attempt in range(self.max_retries + 1):
+            # Multipart/form-data: Roboflow hosted workflows accept file uploads.
+            form = aiohttp.FormData()
+            form.add_field("file", image_bytes, filename=filename, content_type=mime_type)
+            try:
+                # The provided workflow URL may already include query params (e.g., ?dark=true). Send directly.
+                async with session.post(self.workflow_url, data=form) as resp:
+                    if resp.status in self.RETRY_STATUSES:
+                        last_error = aiohttp.ClientResponseError(
+                            resp.request_info, resp.history, status=resp.status,
+                            message=await resp.text(),
+                        )
+                    else:
+                        resp.raise_for_status()
+                        data = await resp.json(content_type=None)
+                        self.breaker.record_success()
+                        return data
+            except aiohttp.ClientResponseError:
+                # Non-retryable HTTP error (4xx): the workflow is up, the request is bad
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = e
 
+            self.breaker.record_failure()
+            if attempt == self.max_retries or not self.breaker.allow():
+                break
+            delay = self.backoff_base * (2 ** attempt)
+            await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+        raise last_error
+
+    @staticmethod
+    def _parse_response(data: Dict[str, Any], confidence_threshold: float = 0.0) -> Dict[str, Any]:
+        """Convert a workflow JSON response into the local detector result shape"""
         # Roboflow hosted inference commonly returns a JSON with a 'predictions' array
         predictions = data.get("predictions") or data.get("preds") or []
 
@@ -50,6 +210,8 @@ class RoboflowAgentDetector:
             # Roboflow fields may include: 'class' or 'label' for text, 'confidence', and bbox coords
             label = p.get("class") or p.get("label") or p.get("name") or p.get("object")
             confidence = float(p.get("confidence", p.get("score", 0)))
+            if confidence < confidence_threshold:
+                continue
 
             # Try to compute a center Y for ordering. Roboflow often returns 'y' and 'height' (center-based)
             if "y" in p and "height" in p:
@@ -84,5 +246,11 @@ class RoboflowAgentDetector:
         return {"agents": agents, "map": data.get("map", "Unknown"), "detections": detections}
 
 
-def get_roboflow_agent_detector(workflow_url: str) -> RoboflowAgentDetector:
-    return RoboflowAgentDetector(workflow_url)
+# One detector (and connection pool) per workflow URL
+_roboflow_detectors: Dict[str, RoboflowAgentDetector] = {}
+
+def get_roboflow_agent_detector(workflow_url: str, **kwargs) -> RoboflowAgentDetector:
+    """Get or create the shared RoboflowAgentDetector for a workflow URL"""
+    if workflow_url not in _roboflow_detectors:
+        _roboflow_detectors[workflow_url] = RoboflowAgentDetector(workflow_url, **kwargs)
+    return _roboflow_detectors[workflow_url]
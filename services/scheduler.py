@@ -0,0 +1,201 @@
+"""
+Persistent delayed-job scheduler
+
+Replaces one-off `asyncio.create_task(sleep(...))` timers with jobs stored in the
+scheduled_jobs table, so thread deletions, staff ghost pings and scrim request
+expiry survive restarts. One background loop sleeps until the next job is due,
+claims due jobs in batches and runs the registered handler for each. A job is
+only deleted after its handler finishes; if the bot dies mid-run, the job runs
+again once its claim lease expires.
+
+Handlers are `async def handler(payload: dict)` and may return a timedelta to
+run again later with the (possibly modified) payload.
+
+Usage:
+    from services.scheduler import scheduler
+    scheduler.register('delete_thread', handle_delete_thread)
+    await scheduler.schedule('delete_thread', delay=timedelta(hours=12), payload={'thread_id': 123})
+"""
+
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Optional
+
+from services import db
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[dict], Awaitable[Optional[timedelta]]]
+
+# Staff reminder cadence for helpdesk threads: every 10 minutes for 12 hours
+GHOST_PING_INTERVAL = timedelta(minutes=10)
+GHOST_PING_COUNT = 72
+
+
+class JobScheduler:
+    BATCH_SIZE = 50
+    # Upper bound on how long the loop sleeps without re-checking the table
+    # (picks up jobs written by another process or a missed wakeup)
+    IDLE_POLL = 60.0
+    MAX_ATTEMPTS = 3
+    RETRY_DELAY = timedelta(minutes=1)
+    # A claimed job that is neither completed nor rescheduled within this runs again
+    CLAIM_LEASE = timedelta(minutes=10)
+
+    def __init__(self):
+        self.handlers: Dict[str, JobHandler] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._next_run: Optional[datetime] = None
+
+    def register(self, kind: str, handler: JobHandler):
+        self.handlers[kind] = handler
+
+    async def schedule(self, kind: str, delay: Optional[timedelta] = None, run_at: Optional[datetime] = None,
+                       payload: Optional[dict] = None, dedupe_key: Optional[str] = None) -> Optional[int]:
+        """
+        Persist a job to run after `delay` (or at `run_at`, naive UTC)
+
+        Returns the job id, or None if it could not be stored.
+        """
+        if run_at is None:
+            run_at = datetime.utcnow() + (delay or timedelta())
+        try:
+            job_id = await db.create_scheduled_job(kind, run_at, json.dumps(payload or {}), dedupe_key)
+        except Exception as e:
+            logger.error("❌ Failed to schedule %s job: %s", kind, e)
+            return None
+
+        # Wake the loop early if this job is due before whatever it is sleeping towards
+        if self._wakeup is not None and (self._next_run is None or run_at < self._next_run):
+            self._wakeup.set()
+        return job_id
+
+    async def cancel(self, dedupe_key: str):
+        try:
+            await db.delete_scheduled_job(dedupe_key)
+        except Exception as e:
+            logger.warning("⚠️ Failed to cancel job %s: %s", dedupe_key, e)
+
+    def start(self):
+        """Start the background loop (idempotent)"""
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._wakeup = None
+
+    async def _run(self):
+        logger.info("⏰ Job scheduler started (%s)", ', '.join(sorted(self.handlers)) or 'no handlers')
+        while True:
+            # Cleared before reading the table so a schedule() that lands mid-pass still wakes us
+            self._wakeup.clear()
+            try:
+                kinds = list(self.handlers)
+                while True:
+                    now = datetime.utcnow()
+                    jobs = await db.claim_due_jobs(kinds, now, now + self.CLAIM_LEASE, self.BATCH_SIZE)
+                    if not jobs:
+                        break
+                    await asyncio.gather(*(self._fire(job) for job in jobs))
+                    if len(jobs) < self.BATCH_SIZE:
+                        break
+
+                self._next_run = await db.get_next_job_run_at(kinds)
+                timeout = self.IDLE_POLL
+                if self._next_run is not None:
+                    timeout = min(timeout, max(0.0, (self._next_run - datetime.utcnow()).total_seconds()))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("❌ Job scheduler error: %s", e)
+                timeout = self.IDLE_POLL
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fire(self, job: dict):
+        """Run one claimed job; reschedule it if the handler asks, retry it if the handler fails"""
+        payload = job['payload']
+        if isinstance(payload, str):
+            payload = json.loads(payload)
+
+        try:
+            again = await self.handlers[job['kind']](payload)
+        except Exception as e:
+            attempts = job['attempts'] + 1
+            if attempts >= self.MAX_ATTEMPTS:
+                logger.error("❌ Job %s #%s failed %s times, dropping: %s", job['kind'], job['id'], attempts, e)
+                await self._complete(job)
+                return
+            logger.warning("⚠️ Job %s #%s failed (attempt %s), retrying: %s", job['kind'], job['id'], attempts, e)
+            await self._requeue(job, payload, self.RETRY_DELAY * attempts, attempts)
+            return
+
+        if again is not None:
+            await self._requeue(job, payload, again, 0)
+        else:
+            await self._complete(job)
+
+    async def _complete(self, job: dict):
+        try:
+            await db.complete_scheduled_job(job['id'], job['run_at'])
+        except Exception as e:
+            logger.error("❌ Failed to remove finished job %s #%s: %s", job['kind'], job['id'], e)
+
+    async def _requeue(self, job: dict, payload: dict, delay: timedelta, attempts: int):
+        try:
+            await db.reschedule_scheduled_job(job['id'], job['run_at'], datetime.utcnow() + delay,
+                                              json.dumps(payload), attempts)
+        except Exception as e:
+            logger.error("❌ Failed to requeue job %s #%s: %s", job['kind'], job['id'], e)
+
+
+# Global scheduler instance
+scheduler = JobScheduler()
+
+
+async def schedule_thread_deletion(thread, hours: float):
+    """Delete a thread after `hours`, even if the bot restarts in between"""
+    await scheduler.schedule(
+        'delete_thread',
+        delay=timedelta(hours=hours),
+        payload={'thread_id': thread.id},
+        dedupe_key=f"delete_thread:{thread.id}"
+    )
+
+
+async def schedule_ghost_pings(thread, role_mentions: list):
+    """Ghost ping staff roles in a thread every 10 minutes until it is gone (max 12 hours)"""
+    if not role_mentions:
+        return
+    await scheduler.schedule(
+        'ghost_ping',
+        delay=GHOST_PING_INTERVAL,
+        payload={'thread_id': thread.id, 'mentions': " ".join(role_mentions), 'remaining': GHOST_PING_COUNT},
+        dedupe_key=f"ghost_ping:{thread.id}"
+    )
+
+
+async def schedule_scrim_request_expiry(request_id: int, expires_at):
+    """Flip a pending scrim request to 'expired' as soon as its expires_at passes"""
+    if expires_at is None:
+        return
+    await scheduler.schedule(
+        'expire_scrim_requests',
+        run_at=expires_at,
+        payload={'request_id': request_id},
+        dedupe_key=f"expire_scrim_request:{request_id}"
+    )
@@ -0,0 +1,198 @@
+"""
+Local Scoreboard Score Reader
+Reads the final score (and, when it can, the map) off a VALORANT Mobile end-game
+screenshot without a network call, so most scrim results skip Gemini
+
+- Score: the two large numbers at the top centre are the only saturated text
+  there ("10 获胜 5": coloured digits, white characters), so an HSV mask plus
+  connected components isolates the digits in one vectorized pass
+- Digits are classified by nearest neighbour (cosine similarity, one matrix
+  product) against glyphs rendered from the bundled fonts, plus any real crops
+  saved under data/score_digits/<digit>/
+- Confidence is the smallest margin between a digit's best class and the
+  runner-up; callers use the remote model below MIN_CONFIDENCE
+- Map: services/map_index.py (banner text hash, then map art); None unless one
+  map clearly wins
+"""
+
+import logging
+import threading
+from pathlib import Path
+from typing import NamedTuple, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from services import tracing
+from services.config import cfg
+from services.map_index import map_index
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).parent.parent
+FONT_DIR = ROOT / "imports" / "font"
+SAMPLES_DIR = ROOT / "data" / "score_digits"
+
+# (left, top, right, bottom) as fractions of the screenshot
+SCORE_REGION = (0.35, 0.0, 0.65, 0.18)
+# Score digits are saturated and bright; the background is dark, the "获胜/败北" text white
+MIN_SATURATION = 90
+MIN_VALUE = 150
+MIN_DIGIT_AREA = 20
+MIN_DIGIT_HEIGHT = 0.04  # fraction of the screenshot height
+
+DIGIT_WIDTH, DIGIT_HEIGHT = 16, 24
+NARROW_ASPECT = 0.35  # narrower than this is kept narrow (the "1") instead of stretched
+TEMPLATE_FONTS = [
+    'Valorant Font.ttf', 'Poppins-Bold.ttf', 'Poppins-SemiBold.ttf', 'Poppins-ExtraBold.ttf',
+    'Lato-Black.ttf', 'Lato-Heavy.ttf', 'Lato-Bold.ttf',
+]
+TEMPLATE_WIDTHS = (1.0, 0.7, 0.5)  # game font is condensed; rendered fonts are squeezed to match
+
+MIN_SIMILARITY = 0.6
+MIN_CONFIDENCE = float(cfg('SCORE_READER_MIN_CONFIDENCE', 0.08))
+
+
+class ScoreRead(NamedTuple):
+    left: int
+    right: int
+    confidence: float         # smallest best-vs-runner-up margin over all digits
+    map_name: Optional[str]   # English map name, None if no clear match
+    map_score: float          # see map_index.MapMatch.score
+
+
+def digit_vector(mask: np.ndarray) -> np.ndarray:
+    """Fixed-size, zero-mean, unit-length vector for a binary glyph mask"""
+    ys, xs = np.nonzero(mask)
+    glyph = mask[ys.min():ys.max() + 1, xs.min():xs.max() + 1]
+    height, width = glyph.shape
+    aspect = width / height
+    if aspect < NARROW_ASPECT:
+        # Stretching a "1" to the full box would make it look like any other digit
+        narrow = max(1, round(DIGIT_WIDTH * aspect / 0.6))
+        canvas = np.zeros((DIGIT_HEIGHT, DIGIT_WIDTH), np.float32)
+        x = (DIGIT_WIDTH - narrow) // 2
+        canvas[:, x:x + narrow] = cv2.resize(glyph, (narrow, DIGIT_HEIGHT), interpolation=cv2.INTER_AREA)
+    else:
+        canvas = cv2.resize(glyph, (DIGIT_WIDTH, DIGIT_HEIGHT), interpolation=cv2.INTER_AREA).astype(np.float32)
+    vector = canvas.ravel()
+    vector = vector - vector.mean()
+    return vector / (np.linalg.norm(vector) + 1e-6)
+
+
+def _render_digit(font: ImageFont.FreeTypeFont, digit: int) -> np.ndarray:
+    canvas = Image.new('L', (96, 100))
+    ImageDraw.Draw(canvas).text((10, 5), str(digit), font=font, fill=255)
+    return (np.array(canvas) > 127).astype(np.uint8) * 255
+
+
+class ScoreReader:
+    def __init__(self):
+        self._vectors: Optional[np.ndarray] = None
+        self._labels: Optional[np.ndarray] = None
+        # Reads run in worker threads; assets are built once by whichever gets there first
+        self._load_lock = threading.Lock()
+
+    # ---- lazy assets ----
+
+    def _load_templates(self):
+        vectors, labels = [], []
+        kernel = np.ones((3, 3), np.uint8)
+        for font_name in TEMPLATE_FONTS:
+            path = FONT_DIR / font_name
+            if not path.exists():
+                continue
+            font = ImageFont.truetype(str(path), 64)
+            for digit in range(10):
+                glyph = _render_digit(font, digit)
+                for scale in TEMPLATE_WIDTHS:
+                    squeezed = cv2.resize(glyph, None, fx=scale, fy=1.0, interpolation=cv2.INTER_AREA)
+                    for variant in (squeezed, cv2.dilate(squeezed, kernel)):
+                        vectors.append(digit_vector(variant))
+                        labels.append(digit)
+
+        # Real digit crops from screenshots, if anyone has saved some
+        if SAMPLES_DIR.exists():
+            for digit in range(10):
+                for path in sorted((SAMPLES_DIR / str(digit)).glob('*.png')):
+                    sample = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+                    if sample is not None and np.count_nonzero(sample > 127):
+                        vectors.append(digit_vector((sample > 127).astype(np.uint8) * 255))
+                        labels.append(digit)
+
+        # _vectors last: it is the "loaded" flag checked outside the lock
+        self._labels = np.array(labels)
+        self._vectors = np.array(vectors, dtype=np.float32)
+        logger.info("🔢 Score reader loaded %s digit templates", len(labels))
+
+    # ---- score ----
+
+    def classify(self, mask: np.ndarray) -> Tuple[int, float, float]:
+        """(digit, similarity, margin over the best other digit) for one glyph mask"""
+        if self._vectors is None:
+            with self._load_lock:
+                if self._vectors is None:
+                    self._load_templates()
+        similarities = self._vectors @ digit_vector(mask)
+        best = np.full(10, -1.0, dtype=np.float32)
+        np.maximum.at(best, self._labels, similarities)
+        order = np.argsort(best)
+        digit, runner_up = int(order[-1]), int(order[-2])
+        return digit, float(best[digit]), float(best[digit] - best[runner_up])
+
+    def read_score(self, image: np.ndarray) -> Optional[Tuple[int, int, float]]:
+        """(left, right, confidence) from a BGR screenshot, or None if no score was found"""
+        height, width = image.shape[:2]
+        left, top, right, bottom = SCORE_REGION
+        region = image[int(top * height):int(bottom * height), int(left * width):int(right * width)]
+        if region.size == 0:
+            return None
+
+        hsv = cv2.cvtColor(region, cv2.COLOR_BGR2HSV)
+        mask = ((hsv[..., 1] > MIN_SATURATION) & (hsv[..., 2] > MIN_VALUE)).astype(np.uint8) * 255
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(mask)
+
+        min_height = MIN_DIGIT_HEIGHT * height
+        boxes = [(i, *stats[i][:4]) for i in range(1, count)
+                 if stats[i][cv2.CC_STAT_AREA] >= MIN_DIGIT_AREA and stats[i][cv2.CC_STAT_HEIGHT] >= min_height]
+        if len(boxes) < 2:
+            return None
+        # The score digits are the tallest saturated glyphs and share a baseline
+        tallest = max(box[4] for box in boxes)
+        boxes = sorted((box for box in boxes if box[4] >= 0.7 * tallest), key=lambda box: box[1])
+        if not 2 <= len(boxes) <= 4:
+            return None
+
+        # Split at the widest horizontal gap: left score | "获胜" | right score
+        gaps = [boxes[i + 1][1] - (boxes[i][1] + boxes[i][3]) for i in range(len(boxes) - 1)]
+        split = int(np.argmax(gaps)) + 1
+        groups = (boxes[:split], boxes[split:])
+        if any(not 1 <= len(group) <= 2 for group in groups):
+            return None
+
+        numbers = []
+        confidence = 1.0
+        for group in groups:
+            digits = ""
+            for i, x, y, w, h in group:
+                digit, similarity, margin = self.classify((labels[y:y + h, x:x + w] == i).astype(np.uint8) * 255)
+                if similarity < MIN_SIMILARITY:
+                    return None
+                digits += str(digit)
+                confidence = min(confidence, margin)
+            numbers.append(int(digits))
+        return numbers[0], numbers[1], confidence
+
+    @tracing.traced('scoreboard.local_read')
+    def read(self, image: np.ndarray) -> Optional[ScoreRead]:
+        """Score and map from a BGR screenshot (blocking; run it in a thread)"""
+        score = self.read_score(image)
+        if score is None:
+            return None
+        match = map_index.detect(image)
+        return ScoreRead(score[0], score[1], score[2], match.name, match.score)
+
+
+# Global score reader instance
+score_reader = ScoreReader()
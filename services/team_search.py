@@ -0,0 +1,177 @@
+"""
+Team Search Service
+In-memory index over team names and tags
+
+- Exact tag / name / captain lookups are dict hits
+- Fuzzy name search ranks candidates by trigram similarity (same measure as pg_trgm)
+  with a bonus for prefix matches, so partial input works for autocomplete
+- Loaded once from the database; db.on_team_write marks changed teams so only
+  those rows are re-read before the next lookup
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from services import db
+
+logger = logging.getLogger(__name__)
+
+# Prefix matches rank above mid-word matches with the same similarity
+PREFIX_BONUS = 0.5
+MIN_SIMILARITY = 0.1
+
+
+def _normalize(text: str) -> str:
+    return " ".join((text or "").lower().split())
+
+
+def _trigrams(text: str) -> Set[str]:
+    """pg_trgm-style trigrams: each word padded with two leading spaces and one trailing space"""
+    grams = set()
+    for word in _normalize(text).split(" "):
+        if not word:
+            continue
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TeamSearchIndex:
+    def __init__(self):
+        self._teams: Dict[int, dict] = {}
+        self._by_tag: Dict[str, int] = {}
+        self._by_name: Dict[str, int] = {}
+        self._by_captain: Dict[int, int] = {}
+        self._grams: Dict[int, Set[str]] = {}
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._loaded = False
+        self._stale: Set[int] = set()
+        self._lock = asyncio.Lock()
+        db.on_team_write(self.mark_stale)
+
+    # ---- maintenance ----
+
+    def mark_stale(self, team_id: int):
+        """Called by db after a team write; the row is re-read on the next lookup"""
+        self._stale.add(team_id)
+
+    async def refresh(self):
+        """Rebuild the whole index from the database"""
+        async with self._lock:
+            teams = await db.get_all_team_summaries()
+            self._clear()
+            for team in teams:
+                self._add(team)
+            self._stale.clear()
+            self._loaded = True
+            logger.info("🔎 Team search index loaded (%s teams)", len(self._teams))
+
+    async def _ensure_fresh(self):
+        if not self._loaded:
+            await self.refresh()
+            return
+        if not self._stale:
+            return
+        async with self._lock:
+            stale, self._stale = self._stale, set()
+            for team_id in stale:
+                self._remove(team_id)
+                team = await db.get_team_summary(team_id)
+                if team:
+                    self._add(team)
+
+    def _clear(self):
+        self._teams.clear()
+        self._by_tag.clear()
+        self._by_name.clear()
+        self._by_captain.clear()
+        self._grams.clear()
+        self._postings.clear()
+
+    def _add(self, team: dict):
+        team = dict(team)
+        team_id = team['id']
+        self._teams[team_id] = team
+        self._by_name[_normalize(team['name'])] = team_id
+        if team.get('tag'):
+            self._by_tag[_normalize(team['tag'])] = team_id
+        if team.get('captain_id'):
+            self._by_captain[team['captain_id']] = team_id
+        grams = _trigrams(team['name']) | _trigrams(team.get('tag') or "")
+        self._grams[team_id] = grams
+        for gram in grams:
+            self._postings[gram].add(team_id)
+
+    def _remove(self, team_id: int):
+        team = self._teams.pop(team_id, None)
+        if not team:
+            return
+        for key_map, key in ((self._by_name, _normalize(team['name'])),
+                             (self._by_tag, _normalize(team.get('tag') or "")),
+                             (self._by_captain, team.get('captain_id'))):
+            if key_map.get(key) == team_id:
+                del key_map[key]
+        for gram in self._grams.pop(team_id, set()):
+            self._postings[gram].discard(team_id)
+            if not self._postings[gram]:
+                del self._postings[gram]
+
+    # ---- lookups (return copies of team summaries: id/name/tag/region/captain_id/logo_url) ----
+
+    def _get(self, team_id: Optional[int]) -> Optional[dict]:
+        team = self._teams.get(team_id) if team_id is not None else None
+        return dict(team) if team else None
+
+    async def get_by_tag(self, tag: str) -> Optional[dict]:
+        await self._ensure_fresh()
+        return self._get(self._by_tag.get(_normalize(tag)))
+
+    async def get_by_name(self, name: str) -> Optional[dict]:
+        await self._ensure_fresh()
+        return self._get(self._by_name.get(_normalize(name)))
+
+    async def get_by_captain(self, captain_id: int) -> Optional[dict]:
+        await self._ensure_fresh()
+        return self._get(self._by_captain.get(captain_id))
+
+    async def find(self, name_or_tag: str) -> Optional[dict]:
+        """Exact name match first, then exact tag"""
+        return await self.get_by_name(name_or_tag) or await self.get_by_tag(name_or_tag)
+
+    async def all_teams(self) -> List[dict]:
+        """Every team summary, newest first"""
+        await self._ensure_fresh()
+        return [dict(team) for team in sorted(self._teams.values(), key=lambda t: t['id'], reverse=True)]
+
+    async def search(self, query: str, limit: int = 25) -> List[dict]:
+        """Teams ranked by similarity of their name/tag to the query"""
+        await self._ensure_fresh()
+        query = _normalize(query)
+        if not query:
+            return (await self.all_teams())[:limit]
+
+        query_grams = _trigrams(query)
+        overlap: Dict[int, int] = defaultdict(int)
+        for gram in query_grams:
+            for team_id in self._postings.get(gram, ()):
+                overlap[team_id] += 1
+
+        scored = []
+        for team_id, shared in overlap.items():
+            grams = self._grams[team_id]
+            score = shared / (len(query_grams) + len(grams) - shared)
+            team = self._teams[team_id]
+            if _normalize(team['name']).startswith(query) or _normalize(team.get('tag') or "").startswith(query):
+                score += PREFIX_BONUS
+            if score >= MIN_SIMILARITY:
+                scored.append((score, team_id))
+
+        scored.sort(key=lambda item: (-item[0], self._teams[item[1]]['name'].lower()))
+        return [dict(self._teams[team_id]) for _, team_id in scored[:limit]]
+
+
+# Global team search instance
+team_search = TeamSearchIndex()
+
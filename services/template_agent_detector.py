@@ -8,6 +8,8 @@ from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 import json
 
+from services.image_ingest import load_image, ImageSource
+
 class TemplateAgentDetector:
     def __init__(self):
         self.template_dir = Path(__file__).parent.parent / 'data' / 'agent_templates'
@@ -142,34 +144,38 @@ class TemplateAgentDetector:
         
         return None
     
-    def detect_agents(self, image_path: str, debug: bool = False) -> List[Dict]:
+    def detect_agents(self, image_path: ImageSource, debug: bool = False) -> List[Dict]:
         """
         Detect all 10 agents from scoreboard screenshot
         
         Args:
-            image_path: Path to the screenshot
+            image_path: Path to the screenshot, or an already decoded image (see image_ingest)
             debug: If True, save debug images showing detected regions
         
         Returns:
             List of 10 dicts with 'agent' and 'confidence'
         """
-        image = cv2.imread(image_path)
-        if image is None:
-            print(f"❌ Failed to load image: {image_path}")
+        try:
+            image = load_image(image_path)
+        except ValueError:
+            print(f"❌ Failed to load image: {image_path if isinstance(image_path, (str, Path)) else 'in-memory image'}")
             return [{'agent': 'unknown', 'confidence': 0}] * 10
         
         height, width = image.shape[:2]
         regions = self.get_agent_icon_regions(height, width)
         
         results = []
-        debug_dir = Path(image_path).parent / 'debug_templates'
+        if isinstance(image_path, (str, Path)):
+            debug_dir = Path(image_path).parent / 'debug_templates'
+        else:
+            debug_dir = Path(__file__).parent.parent / 'data' / 'debug_templates'
         if debug and not debug_dir.exists():
             debug_dir.mkdir(parents=True)
         
         for i, region in enumerate(regions):
             x, y, w, h = region['x'], region['y'], region['width'], region['height']
             
-            # Crop the agent icon region
+            # Crop the agent icon region (view, no copy)
             crop = image[y:y+h, x:x+w]
             
             if debug:
@@ -0,0 +1,292 @@
+"""
+Tracing Service
+Lightweight spans and in-memory latency histograms
+
+- span(name) / @traced(name) time a block or a function (sync or async)
+- Spans opened while an interaction trace is active are labelled with it, so the
+  histograms answer "where does /profile spend its time"
+- DB queries are recorded through an asyncpg query logger (see db.get_pool),
+  HTTP calls through an aiohttp TraceConfig
+- render_prometheus() gives the text exposition format, summary() feeds /latency
+"""
+
+import functools
+import inspect
+import logging
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+
+from services.config import cfg
+
+logger = logging.getLogger(__name__)
+
+# Bucket upper bounds in seconds (Prometheus histogram convention)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RECENT_SAMPLES = 256
+
+# Traces slower than this print a per-span breakdown
+SLOW_TRACE_MS = float(cfg('TRACE_SLOW_MS', 3000))
+
+
+class Histogram:
+    __slots__ = ('counts', 'count', 'total', 'errors', 'max', 'recent')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.max = 0.0
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, seconds: float, error: bool = False):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+        if error:
+            self.errors += 1
+
+    def percentile(self, q: float) -> float:
+        """Percentile over the most recent samples (seconds)"""
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class Trace:
+    """One interaction: its start time and how long each child span took"""
+
+    __slots__ = ('name', 'started', 'spans', 'finished')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.spans: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0])
+        self.finished = False
+
+
+# (interaction, span) -> histogram; interaction is "" for work outside any trace
+_histograms: Dict[Tuple[str, str], Histogram] = defaultdict(Histogram)
+_current: ContextVar[Optional[Trace]] = ContextVar('trace', default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    """The interaction trace still running in this context, if any"""
+    trace = _current.get()
+    return trace if trace is not None and not trace.finished else None
+
+
+def record(name: str, seconds: float, error: bool = False):
+    """Record a finished span under the active interaction (if any)"""
+    trace = current_trace()
+    _histograms[(trace.name if trace else "", name)].observe(seconds, error)
+    if trace is not None:
+        entry = trace.spans[name]
+        entry[0] += 1
+        entry[1] += seconds
+
+
+def start_trace(name: str) -> Trace:
+    """
+    Open an interaction trace in the current context
+
+    For hooks where start and end live in different callbacks (the command tree);
+    everything else should use span(), which opens a trace when none is active.
+    """
+    trace = Trace(name)
+    _current.set(trace)
+    return trace
+
+
+def finish_trace(trace: Optional[Trace], error: bool = False):
+    """Close a trace opened with start_trace; safe to call more than once"""
+    if trace is None or trace.finished:
+        return
+    trace.finished = True
+    elapsed = time.perf_counter() - trace.started
+    _histograms[(trace.name, trace.name)].observe(elapsed, error)
+    if elapsed * 1000 >= SLOW_TRACE_MS:
+        parts = sorted(trace.spans.items(), key=lambda item: item[1][1], reverse=True)[:6]
+        breakdown = ", ".join(f"{name} {total * 1000:.0f}ms x{count}" for name, (count, total) in parts)
+        logger.warning("🐢 %s took %.0fms (%s)", trace.name, elapsed * 1000, breakdown or 'no spans')
+
+
+@contextmanager
+def span(name: str):
+    """
+    Time a block
+
+    Inside an interaction trace it is recorded as a child span; outside one it
+    starts its own trace, so spans nested in it are attributed to it.
+    """
+    root = current_trace() is None
+    token = _current.set(Trace(name)) if root else None
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        if root:
+            trace = _current.get()
+            _current.reset(token)
+            finish_trace(trace, error)
+        else:
+            record(name, time.perf_counter() - started, error)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator form of span(); defaults to module.qualname"""
+    def decorator(func):
+        label = name or f"{func.__module__.split('.')[-1]}.{func.__qualname__}"
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(label):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ---- integrations ----
+
+def query_logger(query):
+    """asyncpg query logger callback (Connection.add_query_logger)"""
+    verb = (query.query or "").lstrip().split(None, 1)
+    record(f"db.{verb[0].lower() if verb else 'query'}", query.elapsed, query.exception is not None)
+
+
+_http_config: Optional[aiohttp.TraceConfig] = None
+
+
+def http_trace_config() -> aiohttp.TraceConfig:
+    """Shared aiohttp TraceConfig recording each request as http.<host>"""
+    global _http_config
+    if _http_config is not None:
+        return _http_config
+    config = aiohttp.TraceConfig()
+
+    async def on_request_start(session, ctx, params):
+        ctx.started = time.perf_counter()
+
+    async def on_request_end(session, ctx, params):
+        record(f"http.{params.url.host}", time.perf_counter() - ctx.started,
+               params.response.status >= 400)
+
+    async def on_request_exception(session, ctx, params):
+        record(f"http.{params.url.host}", time.perf_counter() - ctx.started, True)
+
+    config.on_request_start.append(on_request_start)
+    config.on_request_end.append(on_request_end)
+    config.on_request_exception.append(on_request_exception)
+    _http_config = config
+    return config
+
+
+# ---- reporting ----
+
+def summary(interaction: Optional[str] = None, limit: int = 20) -> List[dict]:
+    """Histogram rows ordered by total time spent (milliseconds)"""
+    rows = []
+    for (trace_name, span_name), hist in list(_histograms.items()):
+        if interaction is not None and trace_name != interaction:
+            continue
+        rows.append({
+            'interaction': trace_name,
+            'span': span_name,
+            'count': hist.count,
+            'errors': hist.errors,
+            'total_ms': hist.total * 1000,
+            'avg_ms': hist.total / hist.count * 1000 if hist.count else 0.0,
+            'p50_ms': hist.percentile(0.50) * 1000,
+            'p95_ms': hist.percentile(0.95) * 1000,
+            'max_ms': hist.max * 1000,
+        })
+    rows.sort(key=lambda row: row['total_ms'], reverse=True)
+    return rows[:limit]
+
+
+def _label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+def render_prometheus() -> str:
+    """All histograms in Prometheus text exposition format"""
+    lines = [
+        "# HELP valm_span_duration_seconds Time spent in traced spans",
+        "# TYPE valm_span_duration_seconds histogram",
+    ]
+    errors = []
+    for (trace_name, span_name), hist in sorted(_histograms.items()):
+        labels = f'interaction="{_label(trace_name)}",span="{_label(span_name)}"'
+        cumulative = 0
+        for bound, count in zip(BUCKETS, hist.counts):
+            cumulative += count
+            lines.append(f'valm_span_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'valm_span_duration_seconds_bucket{{{labels},le="+Inf"}} {hist.count}')
+        lines.append(f'valm_span_duration_seconds_sum{{{labels}}} {hist.total:.6f}')
+        lines.append(f'valm_span_duration_seconds_count{{{labels}}} {hist.count}')
+        errors.append(f'valm_span_errors_total{{{labels}}} {hist.errors}')
+    lines += ["# HELP valm_span_errors_total Spans that raised or returned an HTTP error",
+              "# TYPE valm_span_errors_total counter"] + errors
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    _histograms.clear()
+
+
+# ---- Prometheus endpoint ----
+
+_runner: Optional[web.AppRunner] = None
+
+
+async def _metrics(request: web.Request) -> web.Response:
+    return web.Response(text=render_prometheus(), content_type='text/plain', charset='utf-8')
+
+
+async def start_metrics_server(host: str = '127.0.0.1', port: int = 9464):
+    """Serve /metrics locally; a port already in use only prints a warning"""
+    global _runner
+    if _runner is not None:
+        return
+    app = web.Application()
+    app.router.add_get('/metrics', _metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except OSError as e:
+        await runner.cleanup()
+        logger.warning("⚠️ Metrics endpoint not started on %s:%s: %s", host, port, e)
+        return
+    _runner = runner
+    logger.info("📈 Metrics endpoint on http://%s:%s/metrics", host, port)
+
+
+async def stop_metrics_server():
+    global _runner
+    if _runner is not None:
+        await _runner.cleanup()
+        _runner = None
@@ -0,0 +1,480 @@
+"""
+Vision Extraction Service
+One async Gemini REST client for every feature that reads data off a screenshot
+
+- Named tasks bundle the prompt and the validation of the returned JSON:
+  'profile' (IGN + player ID), 'scrim_score' (final score + map),
+  'scoreboard' (map, result, score and all 10 players' K/D/A)
+- Models are tried in a shared order ranked by health: models that keep failing
+  are cooled down and moved to the back, and the model that last answered a task
+  is tried first for that task, so a dead model does not cost a round-trip per call
+- Hedged mode (latency-critical callers): if the first model has not answered
+  after its p90 latency, the next model is started in parallel; the first valid
+  answer wins and the rest are cancelled. Extra calls are capped by a budget
+- Every model call waits for a token from the shared Gemini rate limiter
+  (services/rate_limiter.py); a 429 holds all Gemini callers instead of
+  cooling down the model, and no hedge is started while calls are queued
+- One aiohttp session (connection pool) for all calls
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from services import tracing
+from services.config import cfg
+from services.rate_limiter import GEMINI, limiter, retry_after_seconds
+
+logger = logging.getLogger(__name__)
+
+API_URL = "https://generativelanguage.googleapis.com/{version}/models/{model}:generateContent"
+
+# Default order; the health ranking reorders these at runtime
+MODELS: List[Tuple[str, str]] = [
+    ("v1", "gemini-2.5-flash"),
+    ("v1", "gemini-2.0-flash"),
+    ("v1beta", "gemini-2.0-flash-exp"),
+    ("v1", "gemini-1.5-flash"),
+    ("v1beta", "gemini-1.5-pro"),
+]
+
+REQUEST_TIMEOUT = 30             # seconds per model call
+FAILURE_COOLDOWN = 5 * 60        # seconds a model sits out after repeated failures
+FAILURES_BEFORE_COOLDOWN = 3
+MISSING_MODEL_COOLDOWN = 60 * 60  # 404: model retired or not available for this key
+LATENCY_EWMA_ALPHA = 0.3
+LATENCY_SAMPLES = 50
+
+# Hedging: delay before starting the next model when no per-model p90 is known yet,
+# the floor for that delay, and how many hedged calls are allowed per primary call
+# (plus a small burst) so a slow period cannot double the API bill
+HEDGE_DEFAULT_DELAY_MS = float(cfg('VISION_HEDGE_DELAY_MS', 4000))
+HEDGE_MIN_DELAY_MS = 500
+HEDGE_MIN_SAMPLES = 5
+HEDGE_BUDGET_RATIO = float(cfg('VISION_HEDGE_BUDGET', 0.2))
+HEDGE_BUDGET_BURST = 3
+HEDGE_MAX_IN_FLIGHT = 2
+
+PROFILE_PROMPT = """
+You are analyzing a VALORANT Mobile player profile screenshot.
+
+Your task: Extract the player's IGN (username) and Player ID (numeric ID).
+
+Look for:
+- IGN: The player name/username (may be displayed at top of screen, profile section, or player card)
+- Player ID: A numeric code, may have # symbol (example: #12345 or 12345)
+
+Return ONLY valid JSON (no markdown, no code blocks):
+{"ign": "found_username", "id": "numeric_id"}
+
+If IGN not found: {"ign": null, "id": null}
+If ID not found: {"ign": "found_username", "id": null}
+
+Examples:
+- If you see "DarkWizard #5432" return: {"ign": "DarkWizard", "id": "5432"}
+- If you see username "ProPlayer" and ID "98765" return: {"ign": "ProPlayer", "id": "98765"}
+
+CRITICAL: Return ONLY the JSON object, nothing else.
+"""
+
+SCRIM_SCORE_PROMPT = """You are analyzing a VALORANT Mobile end-game scoreboard screenshot.
+
+Your task: Extract the final match score and map name.
+
+Look for:
+- The large score numbers at the top (e.g., "10 获胜 3" or "13 : 11")
+- The first number is the WINNING team's score
+- The second number is the LOSING team's score
+- Map name (e.g., Haven, Ascent, Bind, etc.)
+
+In the image, look for:
+- Large colored numbers at the top center showing the score
+- The winning team's score is usually on the LEFT and larger/highlighted
+- The losing team's score is on the RIGHT
+
+Return ONLY valid JSON (no markdown, no code blocks):
+{"winner_score": winning_team_number, "loser_score": losing_team_number, "map": "map_name"}
+
+Example: If you see "10 获胜 3" or "10 : 3", return: {"winner_score": 10, "loser_score": 3, "map": "Haven"}
+Example: If you see "13 获胜 11", return: {"winner_score": 13, "loser_score": 11, "map": "Bind"}
+
+CRITICAL: Return ONLY the JSON object, nothing else."""
+
+SCOREBOARD_PROMPT = """You are analyzing a VALORANT Mobile end-game scoreboard screenshot.
+
+Extract the following information:
+
+1. MAP NAME (e.g., Haven, Bind, Ascent)
+2. MATCH RESULT TEXT: Look for Chinese text "获胜" (Win) or "败北" (Defeat) - this indicates if CYAN team won or lost
+3. SCORES: Two numbers separated by dash or space (e.g., "10 - 5" or "10  5")
+4. For EACH of the 10 PLAYERS (top to bottom):
+   - IGN (in-game name)
+   - K/D/A (Kills/Deaths/Assists)
+
+Return ONLY valid JSON in this format:
+{
+  "map": "Haven",
+  "result_text": "获胜",
+  "score_left": 10,
+  "score_right": 5,
+  "players": [
+    {"ign": "player1", "kills": 17, "deaths": 10, "assists": 5},
+    {"ign": "player2", "kills": 11, "deaths": 12, "assists": 4},
+    ... (10 players total)
+  ]
+}
+
+Rules:
+- Return ONLY JSON, no markdown, no explanation
+- Extract ALL 10 players in order from top to bottom
+- result_text should be "获胜" (win) or "败北" (defeat) - look for this text on the screen
+- If you can't read a value, use null
+- score_left is the LEFT score number
+- score_right is the RIGHT score number"""
+
+
+# ---- task validation: return the cleaned result, or None if the answer is unusable ----
+
+def _validate_profile(data: dict) -> Optional[dict]:
+    ign = data.get('ign')
+    player_id = data.get('id')
+    if player_id is not None:
+        player_id = str(player_id).replace('#', '').strip()
+    if not ign or not player_id or ign == "null" or player_id == "null" or not player_id.isdigit():
+        return None
+    return {'ign': str(ign).strip(), 'id': player_id}
+
+
+def _validate_scrim_score(data: dict) -> Optional[dict]:
+    try:
+        winner = int(data.get('winner_score'))
+        loser = int(data.get('loser_score'))
+    except (TypeError, ValueError):
+        return None
+    # Valorant matches: winner has 10+ (unrated) or 13+ (competitive), loser fewer
+    if winner <= loser or winner < 10 or loser < 0:
+        return None
+    return {'winner_score': winner, 'loser_score': loser, 'map': data.get('map') or 'Unknown'}
+
+
+def _validate_scoreboard(data: dict) -> Optional[dict]:
+    players = data.get('players')
+    if not isinstance(players, list) or not players:
+        return None
+    try:
+        data['score_left'] = int(data.get('score_left') or 0)
+        data['score_right'] = int(data.get('score_right') or 0)
+    except (TypeError, ValueError):
+        return None
+    return data
+
+
+class VisionTask:
+    """Prompt plus validation for one kind of screenshot"""
+
+    def __init__(self, name: str, prompt: str, validate: Callable[[dict], Optional[dict]]):
+        self.name = name
+        self.prompt = prompt
+        self.validate = validate
+
+
+TASKS: Dict[str, VisionTask] = {
+    'profile': VisionTask('profile', PROFILE_PROMPT, _validate_profile),
+    'scrim_score': VisionTask('scrim_score', SCRIM_SCORE_PROMPT, _validate_scrim_score),
+    'scoreboard': VisionTask('scoreboard', SCOREBOARD_PROMPT, _validate_scoreboard),
+}
+
+
+def extract_json(text: str) -> Optional[dict]:
+    """First balanced {...} object in a model response (code fences tolerated)"""
+    start = text.find("{")
+    while start != -1:
+        depth = 0
+        in_string = False
+        escaped = False
+        for i in range(start, len(text)):
+            ch = text[i]
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    try:
+                        parsed = json.loads(text[start:i + 1])
+                    except json.JSONDecodeError:
+                        break
+                    return parsed if isinstance(parsed, dict) else None
+        start = text.find("{", start + 1)
+    return None
+
+
+class ModelHealth:
+    """Rolling health of one model: latency EWMA, failure streak, cooldown"""
+
+    def __init__(self):
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency_ms: Optional[float] = None
+        self.samples = deque(maxlen=LATENCY_SAMPLES)
+        self.cooldown_until = 0.0
+
+    @property
+    def cooling_down(self) -> bool:
+        return time.monotonic() < self.cooldown_until
+
+    def record_success(self, elapsed_ms: float):
+        self.successes += 1
+        self.samples.append(elapsed_ms)
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.latency_ms = elapsed_ms if self.latency_ms is None else (
+            LATENCY_EWMA_ALPHA * elapsed_ms + (1 - LATENCY_EWMA_ALPHA) * self.latency_ms)
+
+    def p90(self) -> Optional[float]:
+        """p90 latency over recent successful calls (ms), once enough are known"""
+        if len(self.samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))]
+
+    def record_failure(self, status: Optional[int] = None):
+        self.failures += 1
+        self.consecutive_failures += 1
+        if status == 404:
+            self.cooldown_until = time.monotonic() + MISSING_MODEL_COOLDOWN
+        elif self.consecutive_failures >= FAILURES_BEFORE_COOLDOWN:
+            self.cooldown_until = time.monotonic() + FAILURE_COOLDOWN
+
+
+class VisionError(Exception):
+    """A model call that failed (HTTP error, timeout, malformed response)"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class VisionService:
+    def __init__(self, models: List[Tuple[str, str]] = None):
+        self.models = list(models or MODELS)
+        self.health: Dict[str, ModelHealth] = {model: ModelHealth() for _, model in self.models}
+        self.last_good: Dict[str, str] = {}
+        self.primary_calls = 0
+        self.hedged_calls = 0
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def api_key(self) -> Optional[str]:
+        return cfg('GEMINI_API_KEY')
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Shared session (and connection pool), created on first use inside the running loop"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+                trace_configs=[tracing.http_trace_config()],
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def ranked_models(self, task: str) -> List[Tuple[str, str]]:
+        """
+        Models in the order to try for a task: the task's last good model first,
+        then healthy models by latency (untried ones in default order), cooling-down ones last
+        """
+        default_index = {model: i for i, (_, model) in enumerate(self.models)}
+
+        def key(entry):
+            model = entry[1]
+            health = self.health[model]
+            return (
+                health.cooling_down,
+                model != self.last_good.get(task),
+                health.consecutive_failures > 0,
+                health.latency_ms if health.latency_ms is not None else float('inf'),
+                default_index[model],
+            )
+
+        return sorted(self.models, key=key)
+
+    async def call_model(self, version: str, model: str, task: VisionTask,
+                         image_b64: str, mime_type: str) -> Optional[dict]:
+        """
+        One model call: the validated result, or None if the model answered but the
+        answer was unusable. Raises VisionError if the call itself failed.
+        Health is updated either way.
+        """
+        payload = {
+            "contents": [{
+                "parts": [
+                    {"text": task.prompt},
+                    {"inline_data": {"mime_type": mime_type, "data": image_b64}},
+                ]
+            }]
+        }
+        health = self.health[model]
+        await limiter.acquire(GEMINI, task.name)
+        started = time.perf_counter()
+        try:
+            async with self._get_session().post(
+                API_URL.format(version=version, model=model),
+                params={"key": self.api_key},
+                json=payload,
+            ) as resp:
+                if resp.status != 200:
+                    error_text = await resp.text()
+                    if resp.status == 429:
+                        limiter.throttle(GEMINI, retry_after_seconds(resp.headers.get('Retry-After')))
+                    raise VisionError(f"HTTP {resp.status}: {error_text[:200]}", resp.status)
+                data = await resp.json()
+            text_response = data['candidates'][0]['content']['parts'][0]['text']
+        except VisionError as e:
+            # 429 is the key's quota, not this model's health
+            if e.status != 429:
+                health.record_failure(e.status)
+            raise
+        except Exception as e:
+            health.record_failure()
+            raise VisionError(f"{type(e).__name__}: {e}") from e
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        health.record_success(elapsed_ms)
+        logger.debug("🔍 %s response for %s (%.0fms): %s", model, task.name, elapsed_ms, text_response)
+
+        parsed = extract_json(text_response)
+        return task.validate(parsed) if parsed is not None else None
+
+    async def extract(self, task_name: str, image_b64: str, mime_type: str,
+                      hedge: bool = False) -> Optional[dict]:
+        """
+        Run a named task on a base64 image, trying models in health order
+
+        Args:
+            hedge: Start the next model in parallel when the current one is slower
+                   than its p90 instead of waiting for it to fail
+
+        Returns:
+            The validated task result, or None if no model produced a usable answer
+        """
+        if not self.api_key:
+            logger.error("❌ Gemini API key not configured")
+            return None
+        task = TASKS[task_name]
+
+        with tracing.span(f"vision.{task_name}"):
+            ranked = self.ranked_models(task_name)
+            if hedge:
+                return await self._extract_hedged(task, ranked, image_b64, mime_type)
+
+            for version, model in ranked:
+                self.primary_calls += 1
+                try:
+                    result = await self.call_model(version, model, task, image_b64, mime_type)
+                except VisionError as e:
+                    logger.warning("⚠️ %s failed for %s: %s", model, task.name, e)
+                    continue
+                if result is None:
+                    logger.warning("⚠️ %s gave no usable %s result", model, task.name)
+                    continue
+                return self._accept(task, model, result)
+        return None
+
+    def _accept(self, task: VisionTask, model: str, result: dict) -> dict:
+        self.last_good[task.name] = model
+        logger.info("✅ %s extracted by %s", task.name, model)
+        return result
+
+    def hedge_delay(self, model: str) -> float:
+        """Seconds to wait on `model` before hedging with the next one"""
+        p90 = self.health[model].p90()
+        return max(HEDGE_MIN_DELAY_MS, p90 if p90 is not None else HEDGE_DEFAULT_DELAY_MS) / 1000
+
+    def _hedge_allowed(self) -> bool:
+        # A hedge would only join the rate limiter queue behind other callers
+        return (self.hedged_calls < self.primary_calls * HEDGE_BUDGET_RATIO + HEDGE_BUDGET_BURST
+                and not limiter.queue_depth(GEMINI))
+
+    async def _extract_hedged(self, task: VisionTask, ranked: List[Tuple[str, str]],
+                              image_b64: str, mime_type: str) -> Optional[dict]:
+        queue = list(ranked)
+        in_flight: Dict[asyncio.Task, str] = {}
+        newest = None
+
+        def launch():
+            nonlocal newest
+            version, model = queue.pop(0)
+            call = asyncio.ensure_future(self.call_model(version, model, task, image_b64, mime_type))
+            in_flight[call] = model
+            newest = model
+
+        try:
+            while queue or in_flight:
+                if not in_flight:
+                    # Everything so far failed: plain fallback, not a hedge
+                    self.primary_calls += 1
+                    launch()
+                    continue
+
+                can_hedge = queue and len(in_flight) < HEDGE_MAX_IN_FLIGHT and self._hedge_allowed()
+                done, _ = await asyncio.wait(
+                    in_flight, timeout=self.hedge_delay(newest) if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    self.hedged_calls += 1
+                    logger.info("⏱️ %s slow for %s, hedging with %s", newest, task.name, queue[0][1])
+                    launch()
+                    continue
+
+                for call in done:
+                    model = in_flight.pop(call)
+                    try:
+                        result = call.result()
+                    except VisionError as e:
+                        logger.warning("⚠️ %s failed for %s: %s", model, task.name, e)
+                        continue
+                    if result is None:
+                        logger.warning("⚠️ %s gave no usable %s result", model, task.name)
+                        continue
+                    return self._accept(task, model, result)
+            return None
+        finally:
+            for call in in_flight:
+                call.cancel()
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-model health snapshot"""
+        return {
+            model: {
+                'successes': health.successes,
+                'failures': health.failures,
+                'consecutive_failures': health.consecutive_failures,
+                'latency_ms': health.latency_ms,
+                'cooling_down': health.cooling_down,
+                'p90_ms': health.p90(),
+            }
+            for model, health in self.health.items()
+        }
+
+
+# Global vision service instance
+vision = VisionService()
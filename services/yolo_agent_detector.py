@@ -8,6 +8,9 @@ from typing import List, Dict, Any
 import cv2
 import numpy as np
 
+from services.image_ingest import load_image, ImageSource
+from services.map_index import map_index
+
 try:
     from ultralytics import YOLO
     YOLO_AVAILABLE = True
@@ -91,21 +94,19 @@ class YOLOAgentDetector:
             24: "Yoru"
         }
     
-    def detect_agents_from_screenshot(self, image_path: str, confidence_threshold: float = 0.25) -> Dict[str, Any]:
+    def detect_agents_from_screenshot(self, image_path: ImageSource, confidence_threshold: float = 0.25) -> Dict[str, Any]:
         """
         Detect agents from a scoreboard screenshot
         
         Args:
-            image_path: Path to the screenshot image
+            image_path: Path to the screenshot image, or an already decoded image (see image_ingest)
             confidence_threshold: Minimum confidence for detections (0.0 - 1.0) - Default lowered to 0.25
         
         Returns:
             Dictionary with 'agents' list (10 agents in order) and 'map' name
         """
-        # Read image
-        img = cv2.imread(str(image_path))
-        if img is None:
-            raise ValueError(f"Failed to load image: {image_path}")
+        # Read image (no-op for in-memory arrays)
+        img = load_image(image_path)
         
         # Run YOLO detection
         results = self.model(img, conf=confidence_threshold, verbose=False)
@@ -145,9 +146,12 @@ class YOLOAgentDetector:
             agents[i] = detection['agent']
             print(f"  Row {i+1}: {detection['agent']} (confidence: {detection['confidence']:.2f})")
         
-        # Try to detect map (currently not implemented in YOLO, return Unknown)
-        # You can add map detection logic here if your model supports it
-        detected_map = 'Unknown'
+        # The model has no map class; the local map index reads it instead
+        try:
+            detected_map = map_index.detect_name(img)
+        except Exception as e:
+            print(f"⚠️ Map index failed: {e}")
+            detected_map = 'Unknown'
         
         return {
             'agents': agents,
@@ -168,9 +172,7 @@ class YOLOAgentDetector:
             Dictionary with detection results
         """
         # Read image
-        img = cv2.imread(str(image_path))
-        if img is None:
-            raise ValueError(f"Failed to load image: {image_path}")
+        img = load_image(image_path)
         
         # Run YOLO detection
         results = self.model(img, conf=confidence_threshold, verbose=False)
@@ -183,8 +185,8 @@ class YOLOAgentDetector:
             cv2.imwrite(str(output_path), annotated_img)
             print(f"✅ Visualization saved to {output_path}")
         
-        # Get detection results
-        return self.detect_agents_from_screenshot(image_path, confidence_threshold)
+        # Get detection results (reuse the decoded image)
+        return self.detect_agents_from_screenshot(img, confidence_threshold)
 
 
 def get_yolo_agent_detector(model_path: str = None) -> YOLOAgentDetector:
@@ -4,10 +4,14 @@
 -- ============================================================================
 
 -- Drop existing tables if they exist (optional - comment out if you want to keep existing data)
+-- DROP TABLE IF EXISTS bot_state CASCADE;
+-- DROP TABLE IF EXISTS scheduled_jobs CASCADE;
 -- DROP TABLE IF EXISTS scrim_waitlist CASCADE;
 -- DROP TABLE IF EXISTS scrim_avoid_list CASCADE;
 -- DROP TABLE IF EXISTS scrim_matches CASCADE;
 -- DROP TABLE IF EXISTS scrim_requests CASCADE;
+-- DROP VIEW IF EXISTS team_roster;
+-- DROP TABLE IF EXISTS match_players CASCADE;
 -- DROP TABLE IF EXISTS matches CASCADE;
 -- DROP TABLE IF EXISTS agent_usage CASCADE;
 -- DROP TABLE IF EXISTS team_stats CASCADE;
@@ -100,6 +104,10 @@ CREATE INDEX IF NOT EXISTS idx_teams_tag_lower ON teams (LOWER(tag));
 CREATE INDEX IF NOT EXISTS idx_teams_captain ON teams (captain_id);
 CREATE INDEX IF NOT EXISTS idx_teams_region ON teams (region);
 
+-- Covering indexes for team summary reads (by id / captain)
+CREATE INDEX IF NOT EXISTS idx_teams_id_summary ON teams (id) INCLUDE (name, tag, region, captain_id, logo_url);
+CREATE INDEX IF NOT EXISTS idx_teams_captain_summary ON teams (captain_id) INCLUDE (id, name, tag, region, logo_url);
+
 -- Team members junction table (many-to-many)
 CREATE TABLE IF NOT EXISTS team_members (
     id SERIAL PRIMARY KEY,
@@ -112,6 +120,8 @@ CREATE TABLE IF NOT EXISTS team_members (
 -- Create index for faster member lookups
 CREATE INDEX IF NOT EXISTS idx_team_members_player ON team_members (player_id);
 CREATE INDEX IF NOT EXISTS idx_team_members_team ON team_members (team_id);
+CREATE INDEX IF NOT EXISTS idx_team_members_team_joined ON team_members (team_id, joined_at) INCLUDE (player_id);
+CREATE INDEX IF NOT EXISTS idx_team_members_player_team ON team_members (player_id) INCLUDE (team_id);
 
 -- Team staff table (managers and coach)
 CREATE TABLE IF NOT EXISTS team_staff (
@@ -167,6 +177,47 @@ CREATE INDEX IF NOT EXISTS idx_matches_team_b ON matches (team_b_id);
 CREATE INDEX IF NOT EXISTS idx_matches_created ON matches (created_at DESC);
 CREATE INDEX IF NOT EXISTS idx_matches_players ON matches USING GIN (players);
 
+-- Per-player match stats (one row per player per match)
+CREATE TABLE IF NOT EXISTS match_players (
+    id BIGSERIAL PRIMARY KEY,
+    match_id BIGINT NOT NULL REFERENCES matches(id) ON DELETE CASCADE,
+    player_id BIGINT NOT NULL REFERENCES players(discord_id) ON DELETE CASCADE,
+    agent TEXT,
+    kills INTEGER DEFAULT 0,
+    deaths INTEGER DEFAULT 0,
+    assists INTEGER DEFAULT 0,
+    score INTEGER DEFAULT 0,
+    mvp BOOLEAN DEFAULT FALSE,
+    team INTEGER,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create indexes for match player queries
+CREATE INDEX IF NOT EXISTS idx_match_players_match ON match_players (match_id);
+CREATE INDEX IF NOT EXISTS idx_match_players_player ON match_players (player_id);
+CREATE INDEX IF NOT EXISTS idx_match_players_player_totals ON match_players (player_id) INCLUDE (kills, deaths, assists);
+
+-- Team roster view (members + match_players totals), read by every team lookup
+CREATE OR REPLACE VIEW team_roster AS
+SELECT tm.team_id,
+       tm.player_id AS discord_id,
+       p.ign,
+       tm.joined_at,
+       COALESCE(s.kills, 0) AS kills,
+       COALESCE(s.deaths, 0) AS deaths,
+       COALESCE(s.assists, 0) AS assists,
+       COALESCE(s.matches_played, 0) AS matches_played
+FROM team_members tm
+LEFT JOIN players p ON p.discord_id = tm.player_id
+LEFT JOIN LATERAL (
+    SELECT SUM(mp.kills) AS kills,
+           SUM(mp.deaths) AS deaths,
+           SUM(mp.assists) AS assists,
+           COUNT(*) AS matches_played
+    FROM match_players mp
+    WHERE mp.player_id = tm.player_id
+) s ON TRUE;
+
 -- ============================================================================
 -- Scrim System Tables
 -- ============================================================================
@@ -248,6 +299,31 @@ CREATE INDEX IF NOT EXISTS idx_avoid_list_captain1 ON scrim_avoid_list (captain_
 CREATE INDEX IF NOT EXISTS idx_avoid_list_captain2 ON scrim_avoid_list (captain_2_id);
 CREATE INDEX IF NOT EXISTS idx_avoid_list_expires ON scrim_avoid_list (expires_at);
 
+-- ============================================================================
+-- Bot Runtime Tables
+-- ============================================================================
+
+-- Scheduled jobs table (delayed work that must survive restarts)
+CREATE TABLE IF NOT EXISTS scheduled_jobs (
+    id BIGSERIAL PRIMARY KEY,
+    kind VARCHAR(50) NOT NULL,
+    run_at TIMESTAMP NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    dedupe_key VARCHAR(100) UNIQUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create index for the scheduler's "what is due next?" query
+CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_run_at ON scheduled_jobs (run_at);
+
+-- Bot state table (key/value state kept between restarts)
+CREATE TABLE IF NOT EXISTS bot_state (
+    key VARCHAR(150) PRIMARY KEY,
+    value JSONB NOT NULL DEFAULT '{}'::jsonb,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- ============================================================================
 -- Triggers and Functions
 -- ============================================================================
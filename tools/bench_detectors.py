@@ -0,0 +1,268 @@
+"""
+Detector benchmark and accuracy harness
+
+Runs each agent detector over a directory of labeled scoreboard screenshots and
+reports per-slot accuracy, confusion pairs, p50/p95 latency, peak RSS and
+throughput at N concurrent jobs as JSON.
+
+Corpus layout - either a sidecar JSON per image:
+    corpus/match_01.png
+    corpus/match_01.json   {"agents": ["Jett", ...10], "map": "Ascent"}
+or a single corpus/labels.json mapping file name -> the same object.
+
+Each detector runs in its own process so peak RSS is attributable to it.
+
+Usage:
+    python tools/bench_detectors.py corpus/ --detectors template hybrid --concurrency 4 --output bench.json
+    python tools/bench_detectors.py corpus/ --baseline bench.json   # exit 1 on regression
+    python tools/bench_detectors.py corpus/ --update-confusions      # feed data/confused_agents.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import resource
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from tools.corpus import load_corpus  # noqa: E402
+
+ALL_DETECTORS = ['matcher', 'template', 'yolo', 'hybrid']
+CONFUSED_AGENTS_PATH = ROOT / "data" / "confused_agents.json"
+
+
+def _build_detector(name: str, remote: bool):
+    """Return a callable image_path -> {'agents': [...], 'map': ...} plus the detector object"""
+    if name == 'matcher':
+        from services.agent_matcher import AgentMatcher
+        det = AgentMatcher(str(ROOT / "imports" / "agents images"))
+        return (lambda p: {'agents': [r['agent'] for r in det.detect_agents_from_screenshot(p)]}), det
+
+    if name == 'template':
+        from services.template_agent_detector import TemplateAgentDetector
+        det = TemplateAgentDetector()
+        return (lambda p: {'agents': [r['agent'] for r in det.detect_agents(p)]}), det
+
+    if name == 'yolo':
+        from services.yolo_agent_detector import YOLOAgentDetector
+        det = YOLOAgentDetector()
+        return (lambda p: det.detect_agents_from_screenshot(p)), det
+
+    if name == 'hybrid':
+        from services.hybrid_agent_detector import HybridAgentDetector
+        from services.template_agent_detector import TemplateAgentDetector
+        yolo = gemini = None
+        try:
+            from services.yolo_agent_detector import YOLOAgentDetector
+            yolo = YOLOAgentDetector()
+        except Exception as e:
+            print(f"⚠️ hybrid: running without YOLO ({e})", file=sys.stderr)
+        if remote:
+            from services.gemini_agent_detector import GeminiAgentDetector
+            gemini = GeminiAgentDetector()
+        det = HybridAgentDetector(yolo, gemini, template_detector=TemplateAgentDetector())
+        return (lambda p: det.detect_agents_from_screenshot(p)), det
+
+    raise ValueError(f"Unknown detector: {name}")
+
+
+def _percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run_detector(name: str, samples: list, concurrency: int, remote: bool) -> dict:
+    """Benchmark one detector (called in a child process)"""
+    from services.hybrid_agent_detector import canonical_agent_name
+
+    load_start = time.perf_counter()
+    detect, det = _build_detector(name, remote)
+    load_ms = (time.perf_counter() - load_start) * 1000
+
+    slot_correct = [0] * 10
+    slot_total = [0] * 10
+    unknown = 0
+    map_correct = map_total = map_unknown = 0
+    confusions = Counter()
+    latencies = []
+    errors = 0
+
+    # Sequential pass: accuracy and per-image latency
+    for image_path, label in samples:
+        started = time.perf_counter()
+        try:
+            result = detect(image_path)
+        except Exception as e:
+            print(f"⚠️ {name} failed on {image_path}: {e}", file=sys.stderr)
+            errors += 1
+            result = {'agents': ['Unknown'] * 10}
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        predicted = (list(result.get('agents') or []) + ['Unknown'] * 10)[:10]
+        for slot, (truth, pred) in enumerate(zip(label['agents'], predicted)):
+            truth, pred = canonical_agent_name(truth), canonical_agent_name(pred)
+            slot_total[slot] += 1
+            if pred == truth:
+                slot_correct[slot] += 1
+            elif pred == 'Unknown':
+                unknown += 1
+            else:
+                confusions[(truth, pred)] += 1
+
+        if label.get('map'):
+            map_total += 1
+            map_correct += result.get('map') == label['map']
+            map_unknown += result.get('map') in (None, 'Unknown')
+
+    # Concurrent pass: throughput with N jobs in flight
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda s: _safe(detect, s[0]), samples))
+    throughput_elapsed = time.perf_counter() - started
+
+    total_slots = sum(slot_total)
+    report = {
+        'detector': name,
+        'images': len(samples),
+        'errors': errors,
+        'load_ms': round(load_ms, 1),
+        'accuracy': round(sum(slot_correct) / total_slots, 4) if total_slots else 0.0,
+        'slot_accuracy': [round(c / t, 4) if t else 0.0 for c, t in zip(slot_correct, slot_total)],
+        'unknown_rate': round(unknown / total_slots, 4) if total_slots else 0.0,
+        'map_accuracy': round(map_correct / map_total, 4) if map_total else None,
+        'map_unknown_rate': round(map_unknown / map_total, 4) if map_total else None,
+        'confusions': [
+            {'truth': truth, 'predicted': pred, 'count': count}
+            for (truth, pred), count in confusions.most_common()
+        ],
+        'latency_ms': {
+            'p50': round(_percentile(latencies, 50), 1),
+            'p95': round(_percentile(latencies, 95), 1),
+            'mean': round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+        },
+        'throughput': {
+            'concurrency': concurrency,
+            'images_per_s': round(len(samples) / throughput_elapsed, 2) if throughput_elapsed else 0.0,
+        },
+        # ru_maxrss is KiB on Linux
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    if hasattr(det, 'get_stage_stats'):
+        report['stages'] = det.get_stage_stats()
+    return report
+
+
+def _safe(detect, image_path):
+    try:
+        return detect(image_path)
+    except Exception:
+        return None
+
+
+def find_regressions(report: dict, baseline: dict, max_accuracy_drop: float, max_latency_increase: float) -> list:
+    """Compare against a previous report; returns human-readable regression messages"""
+    previous = {d['detector']: d for d in baseline.get('detectors', [])}
+    problems = []
+    for current in report['detectors']:
+        before = previous.get(current['detector'])
+        if not before or 'error' in current or 'error' in before:
+            continue
+        if before['accuracy'] - current['accuracy'] > max_accuracy_drop:
+            problems.append(f"{current['detector']}: accuracy {before['accuracy']:.2%} -> {current['accuracy']:.2%}")
+        old_p95, new_p95 = before['latency_ms']['p95'], current['latency_ms']['p95']
+        if old_p95 and (new_p95 - old_p95) / old_p95 > max_latency_increase:
+            problems.append(f"{current['detector']}: p95 latency {old_p95}ms -> {new_p95}ms")
+    return problems
+
+
+def update_confused_agents(report: dict, min_count: int) -> int:
+    """Append newly observed confusion pairs to data/confused_agents.json; returns how many were added"""
+    with open(CONFUSED_AGENTS_PATH, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    known = {frozenset(pair['agents']) for pair in data.get('confusion_pairs', [])}
+
+    observed = Counter()
+    for det in report['detectors']:
+        for c in det.get('confusions', []):
+            observed[(c['truth'], c['predicted'])] += c['count']
+
+    added = 0
+    for (truth, pred), count in observed.most_common():
+        if count < min_count or frozenset((truth, pred)) in known:
+            continue
+        data.setdefault('confusion_pairs', []).append({
+            'agents': [truth, pred],
+            'note': f"Observed {count}x in detector benchmark: {truth} read as {pred}. Add a visual distinction note."
+        })
+        known.add(frozenset((truth, pred)))
+        added += 1
+
+    if added:
+        with open(CONFUSED_AGENTS_PATH, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark agent detectors over a labeled screenshot corpus")
+    parser.add_argument('corpus', type=Path, help="directory of labeled scoreboard screenshots")
+    parser.add_argument('--detectors', nargs='+', default=ALL_DETECTORS, choices=ALL_DETECTORS)
+    parser.add_argument('--concurrency', type=int, default=4, help="jobs in flight for the throughput pass")
+    parser.add_argument('--remote', action='store_true', help="let the hybrid detector call Gemini")
+    parser.add_argument('--output', type=Path, help="write the JSON report here (default: stdout)")
+    parser.add_argument('--baseline', type=Path, help="previous report; exit 1 if this run regresses")
+    parser.add_argument('--max-accuracy-drop', type=float, default=0.01)
+    parser.add_argument('--max-latency-increase', type=float, default=0.25, help="allowed relative p95 increase")
+    parser.add_argument('--update-confusions', action='store_true', help="append new pairs to data/confused_agents.json")
+    parser.add_argument('--min-confusions', type=int, default=2)
+    args = parser.parse_args()
+
+    samples = [(str(path), label)
+               for path, label in load_corpus(args.corpus, lambda label: len(label.get('agents', [])) == 10)]
+    if not samples:
+        print(f"❌ No labeled screenshots found in {args.corpus}", file=sys.stderr)
+        raise SystemExit(2)
+
+    report = {'corpus': str(args.corpus), 'images': len(samples), 'detectors': []}
+    ctx = multiprocessing.get_context('spawn')
+    for name in args.detectors:
+        print(f"⏱️ Benchmarking {name} on {len(samples)} screenshots...", file=sys.stderr)
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            try:
+                report['detectors'].append(
+                    pool.submit(run_detector, name, samples, args.concurrency, args.remote).result()
+                )
+            except Exception as e:
+                report['detectors'].append({'detector': name, 'error': str(e)})
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output, encoding='utf-8')
+        print(f"✅ Report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+    if args.update_confusions:
+        added = update_confused_agents(report, args.min_confusions)
+        print(f"📝 Added {added} confusion pair(s) to {CONFUSED_AGENTS_PATH}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            problems = find_regressions(report, json.load(f), args.max_accuracy_drop, args.max_latency_increase)
+        for problem in problems:
+            print(f"❌ Regression: {problem}", file=sys.stderr)
+        if problems:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+LFS parser fuzz and benchmark harness
+
+Fuzz: generates valid 1-line and 2-line LFS posts, mutates them (dropped,
+duplicated and swapped characters, case flips, stray commas and newlines) and
+mixes in ordinary chatter. Every post is parsed by services/lfs_parser.py and by
+a copy of the inline parser the scrim cog used before it, and the results
+must agree. Chatter rejected by both counts as agreement (it gets the same
+format help). The only allowed difference is a valid post with text before
+"LFS", which the prefix check now rejects on purpose.
+
+Benchmark: per-post parse time for both parsers over the same corpus, split into
+LFS posts and chatter.
+
+Usage:
+    python tools/bench_lfs_parser.py                      # 20k fuzz cases + benchmark
+    python tools/bench_lfs_parser.py --cases 200000 --seed 7 --output lfs_bench.json
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from services import lfs_parser  # noqa: E402
+from services.lfs_parser import TIMEZONE_MAP, parse_lfs  # noqa: E402
+
+CHATTER = [
+    "anyone up for scrims tonight?", "gg wp", "lf 2 players for ranked", "who's free at 9",
+    "hey LFS BO3 7PM IST APAC", "lol", "can someone ping the admins", "LF scrim bo3 tmrw",
+    "", "   ", "🔥🔥🔥", "https://discord.gg/example", "LFG", "lfs?", "L F S BO3 7PM IST APAC",
+]
+
+
+# ---- reference: the parser as it was inlined in Scrim.on_message ----
+
+def legacy_parse_time(time_str):
+    match = re.search(r'(\d{1,2})(?::(\d{2}))?\s*(AM|PM)\s+([A-Z]{3,4})', time_str.upper())
+    if not match:
+        return None
+    hour = int(match.group(1))
+    minute = int(match.group(2)) if match.group(2) else 0
+    period = match.group(3)
+    timezone = match.group(4)
+    if timezone not in TIMEZONE_MAP:
+        return None
+    if period == 'PM' and hour != 12:
+        hour += 12
+    elif period == 'AM' and hour == 12:
+        hour = 0
+    if hour < 0 or hour > 23 or minute < 0 or minute > 59:
+        return None
+    return (hour, minute, timezone)
+
+
+def legacy_parse(content):
+    """(match_type, hour, minute, timezone, region) or the error kind"""
+    lines = content.strip().split('\n')
+    if len(lines) == 1:
+        first_line = lines[0].strip().upper()
+        match = re.search(r'LFS\s+(BO[135])\s+(.+?)\s+(APAC|EMEA|AMERICAS|INDIA)$', first_line)
+        if not match:
+            return lfs_parser.INVALID_FORMAT
+        match_type = match.group(1).lower()
+        time_part = match.group(2).strip()
+        region_input = match.group(3).strip().upper()
+    else:
+        first_line = lines[0].strip().upper()
+        match = re.search(r'LFS\s+(BO[135])', first_line)
+        if not match:
+            return lfs_parser.INVALID_FORMAT_LINE
+        match_type = match.group(1).lower()
+        parts = [p.strip() for p in lines[1].strip().split(',')]
+        if len(parts) < 2:
+            return lfs_parser.INVALID_TIME_LINE
+        time_part = parts[0].strip()
+        region_input = parts[1].strip().upper()
+    if region_input not in ['APAC', 'EMEA', 'AMERICAS', 'INDIA']:
+        return lfs_parser.INVALID_REGION
+    parsed_time = legacy_parse_time(time_part)
+    if not parsed_time:
+        return lfs_parser.INVALID_TIME
+    hour, minute, timezone = parsed_time
+    return (match_type, hour, minute, timezone, region_input.lower())
+
+
+def new_parse(content):
+    post, error = parse_lfs(content)
+    return error or tuple(post)
+
+
+# ---- corpus ----
+
+def random_time(rng):
+    hour = rng.randint(0, 13)
+    minute = rng.choice(["", f":{rng.randint(0, 61):02d}"])
+    period = rng.choice(["AM", "PM", "am", "pm", "Pm"])
+    space = rng.choice(["", " "])
+    tz = rng.choice(list(TIMEZONE_MAP) + ["XYZ", "UTC", "IS", "ISTX"])
+    return f"{hour}{minute}{space}{period} {tz}"
+
+
+def random_post(rng):
+    match_type = rng.choice(["BO1", "BO3", "BO5", "bo3", "BO2"])
+    region = rng.choice(list(lfs_parser.REGIONS) + ["apac", "Emea", "NA", "EU"])
+    lfs = rng.choice(["LFS", "lfs", "Lfs"])
+    if rng.random() < 0.5:
+        return f"{lfs} {match_type} {random_time(rng)} {region}"
+    sep = rng.choice([", ", ",", " ,", " "])
+    return f"{lfs} {match_type}\n{random_time(rng)}{sep}{region}"
+
+
+def mutate(text, rng):
+    chars = list(text)
+    for _ in range(rng.randint(1, 3)):
+        if not chars:
+            break
+        i = rng.randrange(len(chars))
+        op = rng.random()
+        if op < 0.25:
+            del chars[i]
+        elif op < 0.5:
+            chars.insert(i, chars[i])
+        elif op < 0.7:
+            chars[i] = chars[i].swapcase()
+        elif op < 0.85:
+            chars.insert(i, rng.choice([",", "\n", " ", ":"]))
+        elif i + 1 < len(chars):
+            chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    return "".join(chars)
+
+
+def build_corpus(cases, rng):
+    corpus = []
+    for _ in range(cases):
+        roll = rng.random()
+        if roll < 0.4:
+            corpus.append(random_post(rng))
+        elif roll < 0.8:
+            corpus.append(mutate(random_post(rng), rng))
+        else:
+            corpus.append(mutate(rng.choice(CHATTER), rng) if rng.random() < 0.5 else rng.choice(CHATTER))
+    return corpus
+
+
+# ---- runs ----
+
+def fuzz(corpus):
+    mismatches = []
+    allowed = 0
+    for content in corpus:
+        expected = legacy_parse(content)
+        actual = new_parse(content)
+        if expected == actual:
+            continue
+        if actual == lfs_parser.NOT_LFS and isinstance(expected, str):
+            # Both rejected; chatter gets the same format help either way
+            continue
+        if actual == lfs_parser.NOT_LFS and not lfs_parser.is_lfs_post(content):
+            # Old parser searched for "LFS" anywhere in the line
+            allowed += 1
+            continue
+        mismatches.append({'content': content, 'legacy': expected, 'new': actual})
+    return mismatches, allowed
+
+
+def bench(parse, corpus, rounds):
+    best = float('inf')
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for content in corpus:
+            parse(content)
+        best = min(best, time.perf_counter() - started)
+    return best / max(1, len(corpus)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--cases', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--output', type=Path)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = build_corpus(args.cases, rng)
+    mismatches, allowed = fuzz(corpus)
+
+    posts = [c for c in corpus if lfs_parser.is_lfs_post(c)]
+    chatter = [c for c in corpus if not lfs_parser.is_lfs_post(c)]
+    report = {
+        'cases': len(corpus),
+        'accepted': sum(1 for c in corpus if isinstance(new_parse(c), tuple)),
+        'mismatches': len(mismatches),
+        'allowed_differences': allowed,
+        'us_per_post': {
+            name: {'legacy': round(bench(legacy_parse, sample, args.rounds), 3),
+                   'parser': round(bench(new_parse, sample, args.rounds), 3)}
+            for name, sample in (('all', corpus), ('lfs', posts), ('chatter', chatter))
+        },
+    }
+
+    for mismatch in mismatches[:10]:
+        print(f"❌ {mismatch['content']!r}: legacy={mismatch['legacy']} new={mismatch['new']}")
+    print(json.dumps(report, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding='utf-8')
+
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""
+Profile OCR benchmark
+
+Compares local Tesseract reads (services/local_ocr.py) with the Gemini 'profile'
+task over a directory of labeled profile screenshots. Reports accuracy and
+p50/p95 latency for each, plus a confidence-threshold sweep. For every
+threshold the sweep shows how many screenshots stay local, how accurate those
+local reads are, and the accuracy of local-then-Gemini at that threshold. Use
+it to pick LOCAL_OCR_MIN_CONFIDENCE.
+
+Corpus layout - either a sidecar JSON per image:
+    corpus/profile_01.png
+    corpus/profile_01.json   {"ign": "DarkWizard", "id": "5432"}
+or a single corpus/labels.json mapping file name -> the same object.
+
+Usage:
+    python tools/bench_profile_ocr.py corpus/                 # local only
+    python tools/bench_profile_ocr.py corpus/ --remote        # also call Gemini (uses quota)
+    python tools/bench_profile_ocr.py corpus/ --remote --output ocr_bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from services import local_ocr  # noqa: E402
+from services.image_ingest import IngestedImage  # noqa: E402
+from tools.corpus import load_corpus  # noqa: E402
+
+THRESHOLDS = [0, 50, 60, 70, 75, 80, 85, 90, 95]
+
+
+def _percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def _correct(ign, player_id, label) -> bool:
+    return (str(ign).strip().lower() == str(label['ign']).strip().lower()
+            and str(player_id).lstrip('#') == str(label['id']).lstrip('#'))
+
+
+def run_local(images: list, labels: list) -> list:
+    """[(correct, confidence, ms), ...] per screenshot"""
+    results = []
+    for image, label in zip(images, labels):
+        started = time.perf_counter()
+        read = local_ocr.read_profile_sync(image.array)
+        elapsed = (time.perf_counter() - started) * 1000
+        if read is None:
+            results.append((False, -1.0, elapsed))
+        else:
+            results.append((_correct(read.ign, read.player_id, label), read.confidence, elapsed))
+    return results
+
+
+async def run_remote(images: list, labels: list) -> list:
+    """[(correct, ms), ...] per screenshot"""
+    from services.payload import payloads
+    from services.vision import vision
+
+    results = []
+    try:
+        for image, label in zip(images, labels):
+            payload = payloads.encode(image, 'profile')
+            started = time.perf_counter()
+            result = await vision.extract('profile', payload.b64, payload.mime_type)
+            elapsed = (time.perf_counter() - started) * 1000
+            results.append((bool(result) and _correct(result['ign'], result['id'], label), elapsed))
+    finally:
+        await vision.close()
+    return results
+
+
+def summarize(values: list) -> dict:
+    return {'p50_ms': round(_percentile(values, 50), 1), 'p95_ms': round(_percentile(values, 95), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('corpus', type=Path)
+    parser.add_argument('--remote', action='store_true', help="Also run Gemini on every screenshot")
+    parser.add_argument('--output', type=Path)
+    args = parser.parse_args()
+
+    if not local_ocr.TESSERACT_AVAILABLE:
+        sys.exit("❌ pytesseract is not installed")
+
+    samples = load_corpus(args.corpus, lambda label: label.get('ign') and label.get('id'))
+    if not samples:
+        sys.exit(f"❌ No labeled screenshots in {args.corpus}")
+
+    images = [IngestedImage.from_bytes(path.read_bytes()) for path, _ in samples]
+    labels = [label for _, label in samples]
+    total = len(samples)
+
+    local = run_local(images, labels)
+    report = {
+        'samples': total,
+        'local': {'accuracy': round(sum(c for c, _, _ in local) / total, 3),
+                  **summarize([ms for _, _, ms in local])},
+    }
+
+    remote = asyncio.run(run_remote(images, labels)) if args.remote else None
+    if remote:
+        report['remote'] = {'accuracy': round(sum(c for c, _ in remote) / total, 3),
+                            **summarize([ms for _, ms in remote])}
+
+    sweep = []
+    for threshold in THRESHOLDS:
+        kept = [i for i, (_, conf, _) in enumerate(local) if conf >= threshold]
+        row = {
+            'threshold': threshold,
+            'served_locally': round(len(kept) / total, 3),
+            'local_accuracy': round(sum(local[i][0] for i in kept) / len(kept), 3) if kept else None,
+        }
+        if remote:
+            kept_set = set(kept)
+            combined = [local[i][0] if i in kept_set else remote[i][0] for i in range(total)]
+            latency = [local[i][2] + (0 if i in kept_set else remote[i][1]) for i in range(total)]
+            row['combined_accuracy'] = round(sum(combined) / total, 3)
+            row.update(summarize(latency))
+        sweep.append(row)
+    report['threshold_sweep'] = sweep
+    report['current_threshold'] = local_ocr.MIN_CONFIDENCE
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
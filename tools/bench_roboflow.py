@@ -0,0 +1,142 @@
+"""
+Offline benchmark for the async Roboflow detector
+
+Starts a local stand-in for the Roboflow workflow endpoint (configurable latency
+and failure rate) and fires screenshots at it through RoboflowAgentDetector, so
+throughput, retries and circuit-breaker behaviour can be measured without the
+real API.
+
+Usage:
+    python tools/bench_roboflow.py --requests 200 --concurrency 20 --latency 0.05 --failure-rate 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from aiohttp import web
+
+from services.roboflow_agent_detector import RoboflowAgentDetector, RoboflowUnavailableError
+
+AGENTS = ['Jett', 'Sage', 'Omen', 'Sova', 'Killjoy', 'Reyna', 'Viper', 'Breach', 'Cypher', 'Raze']
+
+
+class FakeInferenceServer:
+    """Local stand-in for a Roboflow hosted workflow"""
+
+    def __init__(self, latency: float = 0.05, failure_rate: float = 0.0, failure_status: int = 503):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.requests = 0
+        self.failures = 0
+        self.bytes_received = 0
+        self._runner = None
+        self.url = None
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        reader = await request.multipart()
+        field = await reader.next()
+        payload = await field.read() if field is not None else b''
+        self.bytes_received += len(payload)
+
+        await asyncio.sleep(self.latency)
+        if random.random() < self.failure_rate:
+            self.failures += 1
+            return web.Response(status=self.failure_status, text="simulated failure")
+
+        predictions = [
+            {'class': agent, 'confidence': 0.9, 'x': 500, 'y': 400 + i * 95, 'width': 90, 'height': 90}
+            for i, agent in enumerate(AGENTS)
+        ]
+        return web.json_response({'predictions': predictions})
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        app = web.Application(client_max_size=32 * 1024 * 1024)
+        app.router.add_post('/workflow', self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}/workflow"
+        return self.url
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+
+async def run_benchmark(total: int, concurrency: int, latency: float, failure_rate: float,
+                        image_bytes: bytes, max_retries: int = 3) -> dict:
+    async with FakeInferenceServer(latency, failure_rate) as server:
+        detector = RoboflowAgentDetector(server.url, max_retries=max_retries, backoff_base=0.05,
+                                         max_connections=concurrency)
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies, outcomes = [], {'ok': 0, 'failed': 0, 'circuit_open': 0}
+
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    await detector.detect_agents_from_screenshot(image_bytes)
+                    outcomes['ok'] += 1
+                except RoboflowUnavailableError:
+                    outcomes['circuit_open'] += 1
+                except Exception:
+                    outcomes['failed'] += 1
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - started
+        await detector.close()
+
+        latencies.sort()
+        return {
+            'requests': total,
+            'concurrency': concurrency,
+            'server_latency_ms': latency * 1000,
+            'failure_rate': failure_rate,
+            'elapsed_s': round(elapsed, 3),
+            'throughput_rps': round(total / elapsed, 1),
+            'p50_ms': round(latencies[len(latencies) // 2], 1),
+            'p95_ms': round(latencies[int(len(latencies) * 0.95) - 1], 1),
+            'outcomes': outcomes,
+            'server_requests': server.requests,
+            'server_failures': server.failures,
+            'breaker_trips': detector.breaker.trips,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark RoboflowAgentDetector against a local fake server")
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.05, help="simulated server latency (seconds)")
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--image', type=str, default=None, help="screenshot to upload (default: 256 KiB of noise)")
+    args = parser.parse_args()
+
+    image_bytes = Path(args.image).read_bytes() if args.image else b'\x89PNG' + random.randbytes(256 * 1024)
+    result = asyncio.run(run_benchmark(args.requests, args.concurrency, args.latency,
+                                       args.failure_rate, image_bytes))
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Team read benchmark
+
+Seeds a scratch schema (bench_team_reads) with synthetic players, teams, rosters
+and match history, then times the tiered team reads in services/db.py against
+the old get_player_team query (double team_members self-join + GROUP BY) as
+team counts and roster sizes grow. The scratch schema is dropped afterwards;
+nothing in the real tables is touched.
+
+Usage:
+    python tools/bench_team_reads.py --teams 100 1000 5000 --roster 5 10 --lookups 300
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import asyncpg
+
+from services import db
+
+SCHEMA = "bench_team_reads"
+
+# get_player_team as it was before the tiered API
+LEGACY_PLAYER_TEAM = """
+    SELECT t.*,
+           COALESCE(
+               json_agg(
+                   json_build_object('discord_id', tm2.player_id, 'ign', p.ign, 'joined_at', tm2.joined_at)
+                   ORDER BY tm2.joined_at
+               ) FILTER (WHERE tm2.player_id IS NOT NULL),
+               '[]'::json
+           ) as members
+    FROM teams t
+    JOIN team_members tm ON t.id = tm.team_id
+    LEFT JOIN team_members tm2 ON t.id = tm2.team_id
+    LEFT JOIN players p ON tm2.player_id = p.discord_id
+    WHERE tm.player_id = $1
+    GROUP BY t.id
+"""
+
+SCHEMA_SQL = f"""
+    DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+    CREATE SCHEMA {SCHEMA};
+    SET search_path TO {SCHEMA};
+    CREATE TABLE players (discord_id BIGINT PRIMARY KEY, ign TEXT NOT NULL);
+    CREATE TABLE teams (
+        id BIGSERIAL PRIMARY KEY, name TEXT NOT NULL, tag TEXT NOT NULL, captain_id BIGINT NOT NULL,
+        region TEXT NOT NULL, logo_url TEXT, wins INTEGER DEFAULT 0, losses INTEGER DEFAULT 0,
+        created_at TIMESTAMPTZ DEFAULT NOW(), updated_at TIMESTAMPTZ DEFAULT NOW()
+    );
+    CREATE TABLE team_members (
+        id BIGSERIAL PRIMARY KEY, team_id BIGINT NOT NULL, player_id BIGINT NOT NULL,
+        discord_id BIGINT, joined_at TIMESTAMPTZ DEFAULT NOW(), UNIQUE(team_id, player_id)
+    );
+    CREATE TABLE match_players (
+        id BIGSERIAL PRIMARY KEY, match_id BIGINT NOT NULL, player_id BIGINT NOT NULL,
+        kills INTEGER DEFAULT 0, deaths INTEGER DEFAULT 0, assists INTEGER DEFAULT 0
+    );
+    CREATE TABLE team_staff (
+        team_id BIGINT PRIMARY KEY, coach_id BIGINT, manager_1_id BIGINT, manager_2_id BIGINT
+    );
+    CREATE INDEX idx_teams_captain ON teams (captain_id);
+    CREATE INDEX idx_team_members_player ON team_members (player_id);
+    CREATE INDEX idx_team_members_team ON team_members (team_id);
+    CREATE INDEX idx_match_players_player ON match_players (player_id);
+"""
+
+# Same definitions as migrations/normalize_team_members.py and add_team_read_indexes.py
+TIERED_SQL = """
+    CREATE INDEX idx_match_players_player_totals ON match_players(player_id) INCLUDE (kills, deaths, assists);
+    CREATE INDEX idx_team_members_team_joined ON team_members(team_id, joined_at) INCLUDE (player_id);
+    CREATE INDEX idx_teams_id_summary ON teams(id) INCLUDE (name, tag, region, captain_id, logo_url);
+    CREATE INDEX idx_teams_captain_summary ON teams(captain_id) INCLUDE (id, name, tag, region, logo_url);
+    CREATE INDEX idx_team_members_player_team ON team_members(player_id) INCLUDE (team_id);
+    CREATE VIEW team_roster AS
+    SELECT tm.team_id, tm.player_id AS discord_id, p.ign, tm.joined_at,
+           COALESCE(s.kills, 0) AS kills, COALESCE(s.deaths, 0) AS deaths,
+           COALESCE(s.assists, 0) AS assists, COALESCE(s.matches_played, 0) AS matches_played
+    FROM team_members tm
+    LEFT JOIN players p ON p.discord_id = tm.player_id
+    LEFT JOIN LATERAL (
+        SELECT SUM(mp.kills) AS kills, SUM(mp.deaths) AS deaths, SUM(mp.assists) AS assists,
+               COUNT(*) AS matches_played
+        FROM match_players mp
+        WHERE mp.player_id = tm.player_id
+    ) s ON TRUE;
+"""
+
+
+async def seed(conn, teams: int, roster: int, matches_per_player: int):
+    await conn.execute(SCHEMA_SQL)
+    players = [(pid, f"player{pid}") for pid in range(1, teams * roster + 1)]
+    await conn.copy_records_to_table('players', records=players, schema_name=SCHEMA)
+    await conn.copy_records_to_table(
+        'teams', schema_name=SCHEMA,
+        columns=['name', 'tag', 'captain_id', 'region'],
+        records=[(f"Team {t}", f"T{t}", t * roster + 1 - roster, 'apac') for t in range(1, teams + 1)],
+    )
+    await conn.copy_records_to_table(
+        'team_members', schema_name=SCHEMA,
+        columns=['team_id', 'player_id', 'discord_id'],
+        records=[(t, t * roster - roster + i, t * roster - roster + i)
+                 for t in range(1, teams + 1) for i in range(1, roster + 1)],
+    )
+    await conn.copy_records_to_table(
+        'match_players', schema_name=SCHEMA,
+        columns=['match_id', 'player_id', 'kills', 'deaths', 'assists'],
+        records=[(m, pid, random.randint(0, 30), random.randint(0, 25), random.randint(0, 15))
+                 for pid, _ in players for m in range(matches_per_player)],
+    )
+    await conn.execute(TIERED_SQL)
+    await conn.execute("ANALYZE")
+
+
+async def time_calls(label: str, make_call, ids: list) -> dict:
+    latencies = []
+    for target in ids:
+        started = time.perf_counter()
+        await make_call(target)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return {
+        'query': label,
+        'p50_ms': round(latencies[len(latencies) // 2], 3),
+        'p95_ms': round(latencies[max(0, int(len(latencies) * 0.95) - 1)], 3),
+    }
+
+
+async def run_size(teams: int, roster: int, lookups: int, matches_per_player: int) -> dict:
+    conn = await asyncpg.connect(db.DATABASE_URL)
+    try:
+        await seed(conn, teams, roster, matches_per_player)
+    finally:
+        await conn.close()
+
+    # Point the real db helpers at the scratch schema
+    db._pool = await asyncpg.create_pool(db.DATABASE_URL, min_size=1, max_size=2,
+                                         server_settings={'search_path': SCHEMA})
+    try:
+        player_ids = random.choices(range(1, teams * roster + 1), k=lookups)
+        team_ids = random.choices(range(1, teams + 1), k=lookups)
+
+        async def legacy(pid):
+            async with db._pool.acquire() as c:
+                return await c.fetchrow(LEGACY_PLAYER_TEAM, pid)
+
+        results = [
+            await time_calls('legacy get_player_team', legacy, player_ids),
+            await time_calls('get_player_team', db.get_player_team, player_ids),
+            await time_calls('get_player_team_summary', db.get_player_team_summary, player_ids),
+            await time_calls('get_team_summary', db.get_team_summary, team_ids),
+            await time_calls('get_team_roster', db.get_team_roster, team_ids),
+            await time_calls('get_team_full', db.get_team_full, team_ids),
+        ]
+    finally:
+        await db.close_pool()
+
+    return {'teams': teams, 'roster': roster, 'matches_per_player': matches_per_player, 'results': results}
+
+
+async def main_async(args):
+    report = []
+    try:
+        for teams in args.teams:
+            for roster in args.roster:
+                print(f"⏱️ {teams} teams x {roster} players...", file=sys.stderr)
+                report.append(await run_size(teams, roster, args.lookups, args.matches))
+    finally:
+        conn = await asyncpg.connect(db.DATABASE_URL)
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+    print(json.dumps(report, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tiered team reads on a scratch schema")
+    parser.add_argument('--teams', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--roster', type=int, nargs='+', default=[5, 10])
+    parser.add_argument('--matches', type=int, default=20, help="match_players rows per player")
+    parser.add_argument('--lookups', type=int, default=300)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
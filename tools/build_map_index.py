@@ -0,0 +1,83 @@
+"""
+Map index builder
+
+Builds the local map index (services/map_index.py) and saves it to
+data/map_index.npz, which the bot then loads at startup instead of rebuilding.
+The index holds ORB descriptors of imports/maps, hashes of MAP_NAMES rendered
+in a CJK font (when one is found or given with --font), and the banner of every
+labeled scoreboard screenshot passed in.
+
+Before adding a screenshot's banner, its map is detected with the index built so
+far, so the report shows how well the index did on screenshots it had not seen.
+
+Corpus layout - the same as tools/bench_detectors.py (only "map" is used):
+    corpus/match_01.png
+    corpus/match_01.json   {"map": "Ascent", ...}
+or a single corpus/labels.json mapping file name -> the same object.
+
+Usage:
+    python tools/build_map_index.py                                  # map art + rendered names only
+    python tools/build_map_index.py --corpus corpus/
+    python tools/build_map_index.py --sample data/temp_screenshot.png Ascent --font NotoSansCJK.ttc
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from services.image_ingest import load_image  # noqa: E402
+from services.map_index import INDEX_PATH, MAP_NAMES, MapIndex, find_cjk_font  # noqa: E402
+from tools.corpus import load_corpus  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--corpus', type=Path)
+    parser.add_argument('--sample', nargs=2, action='append', default=[], metavar=('IMAGE', 'MAP'))
+    parser.add_argument('--font', help="CJK font for rendering the Chinese map names")
+    parser.add_argument('--output', type=Path, default=INDEX_PATH)
+    args = parser.parse_args()
+
+    samples = []
+    if args.corpus:
+        samples = [(path, label['map'])
+                   for path, label in load_corpus(args.corpus, lambda label: label.get('map') in MAP_NAMES.values())]
+    for image, name in args.sample:
+        if name not in MAP_NAMES.values():
+            sys.exit(f"❌ Unknown map {name!r} (expected one of {', '.join(MAP_NAMES.values())})")
+        samples.append((Path(image), name))
+
+    index = MapIndex(args.output)
+    index.build(font_path=args.font)
+
+    results = {'correct': 0, 'wrong': 0, 'unknown': 0}
+    no_banner = []
+    for image_path, name in samples:
+        image = load_image(image_path)
+        match = index.match_banner(image)
+        if match.name is None:
+            match = index.match_art(image)
+        results['correct' if match.name == name else 'unknown' if match.name is None else 'wrong'] += 1
+        if not index.add_banner_sample(image, name):
+            no_banner.append(str(image_path))
+
+    index.save(args.output)
+    report = {
+        'output': str(args.output),
+        'font': args.font or find_cjk_font(),
+        'maps': index.names,
+        'art_descriptors': 0 if index.art_descriptors is None else len(index.art_descriptors),
+        'banner_hashes': len(index.text_owner),
+        'samples': len(samples),
+        'unseen_detection': results,
+        'no_banner_found': no_banner,
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
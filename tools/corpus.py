@@ -0,0 +1,36 @@
+"""
+Labeled screenshot corpus loader shared by the benchmark and tuning tools
+
+Corpus layout - either a sidecar JSON per image:
+    corpus/shot_01.png
+    corpus/shot_01.json   {...label...}
+or a single corpus/labels.json mapping file name -> the same object.
+"""
+
+import json
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+IMAGE_SUFFIXES = {'.png', '.jpg', '.jpeg', '.webp'}
+
+
+def load_corpus(corpus_dir: Path, accept: Callable[[dict], bool] = bool) -> List[Tuple[Path, dict]]:
+    """Return [(image_path, label_dict), ...] for every screenshot whose label `accept` keeps"""
+    labels = {}
+    labels_file = corpus_dir / "labels.json"
+    if labels_file.exists():
+        with open(labels_file, 'r', encoding='utf-8') as f:
+            labels = json.load(f)
+
+    samples = []
+    for image_path in sorted(corpus_dir.iterdir()):
+        if image_path.suffix.lower() not in IMAGE_SUFFIXES:
+            continue
+        label = labels.get(image_path.name)
+        sidecar = image_path.with_suffix('.json')
+        if label is None and sidecar.exists():
+            with open(sidecar, 'r', encoding='utf-8') as f:
+                label = json.load(f)
+        if label and accept(label):
+            samples.append((image_path, label))
+    return samples
@@ -0,0 +1,107 @@
+"""
+Startup import profile
+
+Imports each cog in a fresh interpreter with `python -X importtime` and reports
+how long the import took and which modules dominated it. Use it to check that
+heavy libraries (numpy, cv2, pandas, google.generativeai, ultralytics) stay out
+of the startup path.
+
+Usage:
+    python tools/startup_profile.py                 # every cog
+    python tools/startup_profile.py ocr profiles    # selected cogs
+    python tools/startup_profile.py --top 15 --json
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+
+
+def profile_import(module: str) -> dict:
+    """Import `module` in a subprocess and parse the -X importtime report"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    modules = []
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            modules.append({
+                'module': name.strip(),
+                'depth': (len(name) - len(name.lstrip())) // 2,
+                'self_ms': int(self_us) / 1000,
+                'cumulative_ms': int(cumulative_us) / 1000,
+            })
+        except ValueError:
+            continue
+
+    errors = [line for line in proc.stderr.splitlines() if not line.startswith("import time:")]
+    # Top-level entries (depth 0) add up to the whole import
+    total_ms = sum(m['cumulative_ms'] for m in modules if m['depth'] == 0)
+    return {
+        'module': module,
+        'ok': proc.returncode == 0,
+        'error': errors[-1] if proc.returncode != 0 and errors else None,
+        'total_ms': round(total_ms, 1),
+        'modules': modules,
+    }
+
+
+def heaviest(modules: list, top: int) -> list:
+    """Third-party/top-level packages ranked by cumulative import time"""
+    packages = {}
+    for m in modules:
+        root = m['module'].split(".")[0]
+        # Keep the outermost (largest cumulative) entry per package
+        if m['cumulative_ms'] > packages.get(root, 0):
+            packages[root] = m['cumulative_ms']
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    return [{'package': name, 'cumulative_ms': round(ms, 1)} for name, ms in ranked[:top]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile cog import times")
+    parser.add_argument('cogs', nargs='*', help="cog names (default: every cog)")
+    parser.add_argument('--top', type=int, default=8, help="heaviest packages to show per cog")
+    parser.add_argument('--json', action='store_true', help="print a JSON report")
+    args = parser.parse_args()
+
+    names = args.cogs or sorted(p.stem for p in (ROOT / "cogs").glob("*.py"))
+    baseline = profile_import("discord.ext.commands")
+    report = []
+    for name in names:
+        print(f"⏱️ cogs.{name}...", file=sys.stderr)
+        result = profile_import(f"cogs.{name}")
+        report.append({
+            'cog': name,
+            'ok': result['ok'],
+            'error': result['error'],
+            'total_ms': result['total_ms'],
+            # discord.py itself is paid once by bot.py; this is what the cog adds
+            'over_discord_ms': round(result['total_ms'] - baseline['total_ms'], 1),
+            'heaviest': heaviest(result['modules'], args.top),
+        })
+
+    if args.json:
+        print(json.dumps({'discord_baseline_ms': baseline['total_ms'], 'cogs': report}, indent=2))
+        return
+
+    print(f"discord.ext.commands baseline: {baseline['total_ms']:.0f}ms")
+    for entry in sorted(report, key=lambda e: e['total_ms'], reverse=True):
+        if not entry['ok']:
+            print(f"❌ {entry['cog']}: {entry['error']}")
+            continue
+        print(f"{entry['cog']:<28} {entry['total_ms']:>7.0f}ms  ({entry['over_discord_ms']:+.0f}ms over discord)")
+        print("    " + ", ".join(f"{h['package']} {h['cumulative_ms']:.0f}ms" for h in entry['heaviest']))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Vision payload tuner
+
+Sweeps payload profiles (region crop, longest side, format, quality) for one
+remote vision task over a labeled corpus. It keeps the smallest profile whose
+accuracy matches the current profile's and writes it to
+data/payload_profiles.json, which services/payload.py loads at startup.
+Every candidate is reported with its accuracy, average payload KB, encode time
+and p50/p95 end-to-end latency.
+
+Every candidate calls Gemini once per screenshot, so keep the corpus small
+(10-20 screenshots) and the grid narrow.
+
+Corpus layout - either a sidecar JSON per image:
+    corpus/shot_01.png
+    corpus/shot_01.json   {"ign": "DarkWizard", "id": "5432"}          (profile)
+                          {"score": [10, 5], "map": "Ascent"}           (scrim_score / scoreboard)
+or a single corpus/labels.json mapping file name -> the same object.
+
+Usage:
+    python tools/tune_payloads.py scrim_score corpus/scoreboards/
+    python tools/tune_payloads.py profile corpus/profiles/ --sizes 768 1024 1280 --formats jpeg webp
+    python tools/tune_payloads.py scoreboard corpus/scoreboards/ --dry-run --output tune.json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from services.image_ingest import IngestedImage  # noqa: E402
+from services.payload import (PROFILES_PATH, PayloadProfile, payloads,  # noqa: E402
+                              profile_to_dict)
+from tools.corpus import load_corpus  # noqa: E402
+
+TASKS = ['profile', 'scrim_score', 'scoreboard']
+
+
+def correct(task: str, result: dict, label: dict) -> bool:
+    if not result:
+        return False
+    if task == 'profile':
+        return (str(result['ign']).strip().lower() == str(label['ign']).strip().lower()
+                and str(result['id']).lstrip('#') == str(label['id']).lstrip('#'))
+    if task == 'scrim_score':
+        return sorted([result['winner_score'], result['loser_score']]) == sorted(label['score'])
+    return [result['score_left'], result['score_right']] == list(label['score'])
+
+
+def _percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def evaluate(task: str, profile: PayloadProfile, images: list, labels: list) -> dict:
+    """Accuracy, payload size, encode time and latency of one profile over the corpus"""
+    from services.vision import vision
+
+    hits, sizes, encode_ms, latency_ms = 0, [], [], []
+    for image, label in zip(images, labels):
+        started = time.perf_counter()
+        payload = payloads.encode(image, task, profile)
+        encoded = time.perf_counter()
+        result = await vision.extract(task, payload.b64, payload.mime_type)
+        finished = time.perf_counter()
+
+        hits += correct(task, result, label)
+        sizes.append(payload.size)
+        encode_ms.append((encoded - started) * 1000)
+        latency_ms.append((finished - started) * 1000)
+    return {
+        'profile': profile_to_dict(profile),
+        'accuracy': round(hits / len(images), 3),
+        'avg_kb': round(sum(sizes) / len(sizes) / 1024, 1),
+        'encode_ms': round(sum(encode_ms) / len(encode_ms), 1),
+        'p50_ms': round(_percentile(latency_ms, 50), 1),
+        'p95_ms': round(_percentile(latency_ms, 95), 1),
+    }
+
+
+def candidates(current: PayloadProfile, args) -> list:
+    regions = [current.region, None] if current.region else [None]
+    grid = [
+        PayloadProfile(region, size, fmt, quality)
+        for region in regions
+        for size in args.sizes
+        for fmt in args.formats
+        for quality in args.qualities
+    ]
+    return [profile for profile in grid if profile != current]
+
+
+async def tune(args) -> dict:
+    from services.vision import vision
+
+    samples = load_corpus(args.corpus)
+    if not samples:
+        sys.exit(f"❌ No labeled screenshots in {args.corpus}")
+    images = [IngestedImage.from_bytes(path.read_bytes()) for path, _ in samples]
+    labels = [label for _, label in samples]
+
+    current = payloads.profile(args.task)
+    try:
+        baseline = await evaluate(args.task, current, images, labels)
+        print(f"📏 current: {baseline}", file=sys.stderr)
+
+        # Only profiles smaller than the current one, cheapest first: the first one
+        # that keeps accuracy is the smallest, so no API calls are spent past it
+        sizes = {profile: sum(payloads.encode(image, args.task, profile).size for image in images) / len(images)
+                 for profile in candidates(current, args)}
+        smaller = sorted((p for p in sizes if sizes[p] / 1024 < baseline['avg_kb']), key=sizes.get)
+        results = []
+        chosen = baseline
+        for profile in smaller:
+            row = await evaluate(args.task, profile, images, labels)
+            results.append(row)
+            print(f"   {row}", file=sys.stderr)
+            if row['accuracy'] >= baseline['accuracy'] - args.tolerance:
+                chosen = row
+                break
+    finally:
+        await vision.close()
+
+    return {'task': args.task, 'samples': len(samples), 'baseline': baseline,
+            'candidates': results, 'chosen': chosen}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('task', choices=TASKS)
+    parser.add_argument('corpus', type=Path)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[768, 1024, 1280, 1600])
+    parser.add_argument('--formats', nargs='+', default=['jpeg', 'webp'])
+    parser.add_argument('--qualities', type=int, nargs='+', default=[75, 85])
+    parser.add_argument('--tolerance', type=float, default=0.0, help="Accuracy a smaller profile may lose")
+    parser.add_argument('--dry-run', action='store_true', help="Report only; do not update the profiles file")
+    parser.add_argument('--output', type=Path)
+    args = parser.parse_args()
+
+    report = asyncio.run(tune(args))
+    print(json.dumps(report, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding='utf-8')
+
+    if not args.dry_run and report['chosen'] is not report['baseline']:
+        tuned = json.loads(PROFILES_PATH.read_text(encoding='utf-8')) if PROFILES_PATH.exists() else {}
+        tuned[args.task] = report['chosen']['profile']
+        PROFILES_PATH.write_text(json.dumps(tuned, indent=2), encoding='utf-8')
+        print(f"✅ Saved {args.task} profile to {PROFILES_PATH}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -289,5 +289,31 @@ CREATE INDEX IF NOT EXISTS idx_match_players_match ON match_players(match_id);
 CREATE INDEX IF NOT EXISTS idx_match_players_player ON match_players(player_id);
 CREATE INDEX IF NOT EXISTS idx_scrim_requests_status ON scrim_requests(status, time_slot);
 CREATE INDEX IF NOT EXISTS idx_scrim_matches_status ON scrim_matches(status, time_slot);
+CREATE INDEX IF NOT EXISTS idx_match_players_player_totals ON match_players(player_id) INCLUDE (kills, deaths, assists);
+CREATE INDEX IF NOT EXISTS idx_team_members_team_joined ON team_members(team_id, joined_at) INCLUDE (player_id);
+CREATE INDEX IF NOT EXISTS idx_teams_id_summary ON teams(id) INCLUDE (name, tag, region, captain_id, logo_url);
+CREATE INDEX IF NOT EXISTS idx_teams_captain_summary ON teams(captain_id) INCLUDE (id, name, tag, region, logo_url);
+CREATE INDEX IF NOT EXISTS idx_team_members_player_team ON team_members(player_id) INCLUDE (team_id);
+
+-- Team roster with per-member totals (single source of truth for team membership)
+CREATE OR REPLACE VIEW team_roster AS
+SELECT tm.team_id,
+       tm.player_id AS discord_id,
+       p.ign,
+       tm.joined_at,
+       COALESCE(s.kills, 0) AS kills,
+       COALESCE(s.deaths, 0) AS deaths,
+       COALESCE(s.assists, 0) AS assists,
+       COALESCE(s.matches_played, 0) AS matches_played
+FROM team_members tm
+LEFT JOIN players p ON p.discord_id = tm.player_id
+LEFT JOIN LATERAL (
+    SELECT SUM(mp.kills) AS kills,
+           SUM(mp.deaths) AS deaths,
+           SUM(mp.assists) AS assists,
+           COUNT(*) AS matches_played
+    FROM match_players mp
+    WHERE mp.player_id = tm.player_id
+) s ON TRUE;
 
 COMMIT;